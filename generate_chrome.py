@@ -4,9 +4,12 @@
 import os
 from pathlib import Path
 
-from huggingface_hub import InferenceClient
 from PIL import Image, ImageChops
 
+from src.huggingface.client import HFClientService
+
+
+MODEL = "black-forest-labs/FLUX.1-dev"
 
 PROMPT = """Orthographic front view of a 9-slice UI frame template: a single rectangular window chrome divided into a 3x3 grid (top-left, top, top-right / left, center, right / bottom-left, bottom, bottom-right). The center cell is a large solid BRIGHT MAGENTA #FF00FF rectangle (terminal viewport placeholder). The 8 surrounding border cells form the chrome and are clearly separated by thick black dividers. Each chrome border cell uses ONLY these colors: orange, brown, black, white, green. Use low-resolution pixelated patterns: animal prints (zebra/leopard/tiger), snake-skin patterns, leaf patterns, lo-fi tie-dye in earth tones. White background outside the outer window. CRITICAL: DO NOT use any pink or magenta colors in the 8 border cells - pink is ONLY for the center cell. No text, no icons, no window controls, no logos. Flat, crisp edges, no shadows, no gradients. The 3x3 grid lines must be explicit and evenly spaced like a 9-patch sprite sheet. The center cell must be pure #FF00FF magenta; border cells must contain NO pink whatsoever."""
 
@@ -34,14 +37,17 @@ def main():
     print("Generating window chrome image via HuggingFace API...")
     print(f"Prompt: {PROMPT[:100]}...")
     
-    client = InferenceClient(token=hf_token)
+    service = HFClientService(token=hf_token, attempt_timeout=120.0)
     
     try:
-        image = client.text_to_image(
-            prompt=PROMPT,
-            model="black-forest-labs/FLUX.1-dev",
-            width=768,
-            height=512
+        image = service.call(
+            lambda client: client.text_to_image(
+                prompt=PROMPT,
+                width=768,
+                height=512
+            ),
+            model=MODEL,
+            deadline=300.0
         )
         
         if isinstance(image, Image.Image):
@@ -60,6 +66,9 @@ def main():
     except Exception as e:
         print(f"Error generating image: {e}")
         return 1
+    
+    finally:
+        service.shutdown()
 
 
 if __name__ == "__main__":
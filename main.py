@@ -6,10 +6,14 @@ import os
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from src.app import BrutalTermApp
-
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--daemon":
+        from src.terminal.session_daemon import run_daemon
+        run_daemon(sys.argv[2] if len(sys.argv) > 2 else None)
+        return
+    
+    from src.app import BrutalTermApp
     app = BrutalTermApp()
     app.run()
 
@@ -3,24 +3,37 @@
 import os
 import sys
 import platform
+import shutil
+import subprocess
 import threading
 import time
-from typing import Optional, List, Callable
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, List, Callable, Dict
 
 from imgui_bundle import imgui, immapp, hello_imgui
-from imgui_bundle import immvision
 from PIL import Image
 import numpy as np
 import cv2
 
+from src.terminal.char_width import load_width_table
 from src.terminal.pty_manager import PtyManager
+from src.terminal.session_client import SessionClient
+from src.terminal.session_store import SessionStore
 from src.terminal.terminal_tab import TerminalTab
+from src.terminal.triggers import Trigger, TriggerEngine
 from src.ui.chrome import ChromeRenderer
+from src.ui.texture_cache import TextureCache
 from src.ui.theme import ThemeManager
 from src.ui.effects import StartupEffects
+from src.huggingface.client import HFClientService
 from src.huggingface.image_fetcher import ImageFetcher
 from src.huggingface.message_fetcher import MessageFetcher
+from src.utils.config import Config
+from src.utils.latency_probe import LatencyProbe
+from src.utils.memory_governor import MemoryGovernor
+from src.utils.output_logger import OutputLogger
 from src.utils.scheduler import BackgroundScheduler
+from src.utils.tracing import TRACER, traced
 
 
 class BrutalTermApp:
@@ -28,18 +41,43 @@ class BrutalTermApp:
         self.window_width = 1200
         self.window_height = 800
         
+        self.config = Config()
+        TRACER.configure(TRACER.enabled or self.config["trace_enabled"],
+                         self.config["trace_buffer_events"])
+        load_width_table()
+        
         self.terminal_tabs: List[TerminalTab] = []
         self.active_tab_idx: int = 0
         
         self.pty_manager = PtyManager()
+        self.session_client: Optional[SessionClient] = None
+        self.session_store: Optional[SessionStore] = None
+        self._next_session_key = 1
+        self._last_session_save = 0.0
+        self._session_save: Optional[Future] = None
+        self._session_saver: Optional[ThreadPoolExecutor] = None
+        self.latency_probe: Optional[LatencyProbe] = None
+        if self.config["latency_probe"]:
+            self.latency_probe = LatencyProbe()
+        self.output_logger: Optional[OutputLogger] = None
+        if self.config["log_output"]:
+            self.output_logger = OutputLogger.from_config(self.config)
+        self.memory_governor = MemoryGovernor.from_config(self.config)
+        self.texture_cache = TextureCache(self.config["texture_cache_mb"] * 1024 * 1024)
         self.theme_manager = ThemeManager()
         self.chrome_renderer: Optional[ChromeRenderer] = None
         self.startup_effects: Optional[StartupEffects] = None
         
+        self.hf_service: Optional[HFClientService] = None
         self.image_fetcher: Optional[ImageFetcher] = None
         self.message_fetcher: Optional[MessageFetcher] = None
         self.scheduler: Optional[BackgroundScheduler] = None
         
+        self._last_hibernation_check = 0.0
+        self._init_executor: Optional[ThreadPoolExecutor] = None
+        self._init_stages: Dict[str, Future] = {}
+        self._load_base_font = False
+        
         self.show_startup_effect = True
         self.running = False
         self._hf_enabled = False
@@ -60,28 +98,210 @@ class BrutalTermApp:
             print(f"HF_TOKEN found (length: {len(hf_token)})")
             self._hf_enabled = True
 
-    def _init_components(self) -> None:
+    def _start_init_stages(self) -> None:
         self.theme_manager.apply_random_theme()
         
         self.chrome_renderer = ChromeRenderer(self.theme_manager)
         self.startup_effects = StartupEffects()
         
-        self._load_chrome_background()
-        
+        restored = self._restore_tabs()
+        tab = restored or self._create_initial_tab()
+        
+        self._init_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="brutal-init")
+        submit = self._init_executor.submit
+        self._init_stages = {
+            "shell": submit(restored.start) if restored else submit(self._start_shell, tab),
+            "chrome": submit(self._load_chrome_background),
+            "fonts": submit(self.theme_manager.font_loader.reload_fonts),
+        }
+        if restored:
+            self._init_stages["history"] = submit(self._decode_history)
         if self._hf_enabled:
-            self.image_fetcher = ImageFetcher()
-            self.message_fetcher = MessageFetcher()
+            self._init_stages["hf"] = submit(self._build_hf_components)
+
+    def _poll_init_stages(self) -> None:
+        for name, future in list(self._init_stages.items()):
+            if not future.done():
+                continue
+            del self._init_stages[name]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Startup stage '{name}' failed: {e}")
+                continue
             
-            self.scheduler = BackgroundScheduler()
-            self.scheduler.schedule("image_fetch", 3600, self._fetch_image)
-            self.scheduler.schedule("message_fetch", 1800, self._fetch_message)
-            self.scheduler.start()
+            if name == "chrome" and result:
+                self._chrome_image_array, self._chrome_image_size, self._chrome_center_rect = result
+            elif name == "fonts":
+                # The atlas belongs to the UI thread; load between frames.
+                self._load_base_font = True
+            elif name == "shell" and result:
+                for session_id in result:
+                    self._adopt_session(session_id)
+            elif name == "history":
+                for tab, history in result:
+                    if history is not None:
+                        tab.install_history(history)
+            elif name == "hf" and result:
+                self._start_hf_components(*result)
+        
+        if not self._init_stages and self._init_executor:
+            self._init_executor.shutdown(wait=False)
+            self._init_executor = None
+
+    def _restore_tabs(self) -> Optional[TerminalTab]:
+        # Daemon-backed tabs already outlive the GUI, so restore only applies to local shells.
+        if not self.config["restore_sessions"] or self.config["session_daemon"]:
+            return None
         
-        self._create_initial_tab()
+        self.session_store = SessionStore(max_history_lines=self.config["scrollback_lines"])
+        try:
+            self.session_store.open()
+            states = self.session_store.load()
+        except Exception as e:
+            print(f"Failed to read session snapshot: {e}")
+            states = []
+        
+        active = None
+        for state in states:
+            tab = TerminalTab(self.pty_manager, self.theme_manager, spawn=False, config=self.config)
+            try:
+                tab.restore_state(state)
+            except Exception as e:
+                print(f"Failed to restore tab: {e}")
+                self.session_store.forget(state["key"])
+                continue
+            self.terminal_tabs.append(tab)
+            tab.latency_probe = self.latency_probe
+            tab.texture_cache = self.texture_cache
+            self._attach_triggers(tab)
+            self._open_output_log(tab)
+            self._track_memory(tab)
+            self._next_session_key = max(self._next_session_key, tab.session_key + 1)
+            if state.get("active") or active is None:
+                active = tab
+        
+        if active is not None:
+            self.active_tab_idx = self.terminal_tabs.index(active)
+        return active
+
+    def _decode_history(self) -> list:
+        return [(tab, tab.decode_history()) for tab in list(self.terminal_tabs) if tab.restored]
+
+    def _register_tab(self, tab: TerminalTab) -> None:
+        tab.session_key = self._next_session_key
+        self._next_session_key += 1
+        self.terminal_tabs.append(tab)
+        tab.latency_probe = self.latency_probe
+        tab.texture_cache = self.texture_cache
+        self._attach_triggers(tab)
+        self._open_output_log(tab)
+        self._track_memory(tab)
+
+    def _attach_triggers(self, tab: TerminalTab) -> None:
+        tab.triggers = TriggerEngine.from_config(
+            self.config, lambda trigger, text: self._on_trigger_notify(tab, trigger, text))
+
+    def _on_trigger_notify(self, tab: TerminalTab, trigger: Trigger, text: str) -> None:
+        print(f"[{tab.title}] {trigger.name}: {text}")
+        if self.terminal_tabs.index(tab) != self.active_tab_idx:
+            tab.alert = True
+        if self.config["trigger_desktop_notify"] and shutil.which("notify-send"):
+            try:
+                subprocess.Popen(["notify-send", f"{tab.title}: {trigger.name}", text],
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            except Exception as e:
+                print(f"Desktop notification failed: {e}")
+
+    def _track_memory(self, tab: TerminalTab) -> None:
+        tab.memory_governor = self.memory_governor
+        self.memory_governor.register(f"tab{tab.session_key}", "terminals", tab.memory_usage,
+                                      evict=tab.release_memory, last_used=lambda: tab.last_viewed)
+
+    def _register_memory_subsystems(self) -> None:
+        governor = self.memory_governor
+        governor.register("chrome", "images", lambda: getattr(self._chrome_image_array, "nbytes", 0))
+        governor.register("font_atlas", "fonts", self._font_atlas_bytes, evict=self._compact_fonts)
+        governor.register("textures", "textures", lambda: self.texture_cache.nbytes,
+                          evict=self.texture_cache.evict)
 
-    def _load_chrome_background(self) -> None:
-        immvision.use_rgb_color_order()
+    @staticmethod
+    def _font_atlas_bytes() -> int:
+        tex = imgui.get_io().fonts.tex_data
+        return tex.get_size_in_bytes() if tex is not None else 0
+
+    def _compact_fonts(self, wanted: int) -> int:
+        # Drops baked sizes that haven't been drawn recently; they re-bake on demand.
+        before = self._font_atlas_bytes()
+        imgui.get_io().fonts.compact_cache()
+        self.theme_manager.reset_prewarm()
+        return before - self._font_atlas_bytes()
+
+    def _open_output_log(self, tab: TerminalTab) -> None:
+        # Daemon-backed tabs only receive screen diffs; the daemon logs their raw output.
+        if self.output_logger and not tab.remote:
+            tab.output_log = self.output_logger.open(f"tab{tab.session_key}")
+
+    def _save_sessions(self, force: bool = False) -> None:
+        if not self.session_store:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_session_save < self.config["session_save_interval"]:
+            return
+        if self._session_save and not self._session_save.done():
+            return
+        self._last_session_save = now
         
+        tabs = [(tab, i, i == self.active_tab_idx) for i, tab in enumerate(self.terminal_tabs)]
+        if force:
+            self._write_sessions(tabs)
+        else:
+            self._session_save = self._session_executor().submit(self._write_sessions, tabs)
+
+    def _session_executor(self) -> ThreadPoolExecutor:
+        if self._session_saver is None:
+            self._session_saver = ThreadPoolExecutor(max_workers=1, thread_name_prefix="brutal-save")
+        return self._session_saver
+
+    def _write_sessions(self, tabs: list) -> None:
+        for tab, order, active in tabs:
+            try:
+                tab.save_state(self.session_store, order, active)
+            except Exception as e:
+                print(f"Failed to save tab '{tab.title}': {e}")
+        self.session_store.flush()
+        self.session_store.compact_if_needed()
+
+    def _start_shell(self, tab: TerminalTab) -> List[int]:
+        if self.config["session_daemon"]:
+            client = SessionClient.connect(self.config["session_socket"], spawn=True)
+            if client:
+                self.session_client = client
+                tab.pty_manager = client
+                tab.output_log = None
+                session_ids = [info["id"] for info in client.list_sessions()]
+                if session_ids:
+                    tab.attach(session_ids[0])
+                    return session_ids[1:]
+        tab.start()
+        return []
+
+    def _build_hf_components(self) -> tuple:
+        hf_service = HFClientService()
+        return hf_service, ImageFetcher(hf_service), MessageFetcher(hf_service)
+
+    def _start_hf_components(self, hf_service: HFClientService, image_fetcher: ImageFetcher,
+                             message_fetcher: MessageFetcher) -> None:
+        self.hf_service = hf_service
+        self.image_fetcher = image_fetcher
+        self.message_fetcher = message_fetcher
+        
+        self.scheduler = BackgroundScheduler()
+        self.scheduler.schedule("image_fetch", 3600, self._fetch_image)
+        self.scheduler.schedule("message_fetch", 1800, self._fetch_message)
+        self.scheduler.start()
+
+    def _load_chrome_background(self) -> Optional[tuple]:
         chrome_path = os.path.join(os.path.dirname(__file__), "..", "assets", "window_chrome.png")
         chrome_path = os.path.abspath(chrome_path)
         
@@ -100,19 +320,20 @@ class BrutalTermApp:
                 
                 pink_mask = cv2.inRange(hsv, lower_pink, upper_pink)
                 arr[pink_mask > 0] = [0, 0, 0]
+                # Uploaded through the shared texture cache, which takes RGBA.
+                arr = np.dstack([arr, np.full(arr.shape[:2], 255, dtype=np.uint8)])
                 
-                self._chrome_image_array = arr
-                self._chrome_image_size = img.size
-                self._detect_chrome_center(img)
-                print(f"Loaded chrome background: {chrome_path} ({self._chrome_image_size})")
-                if self._chrome_center_rect:
-                    print(f"Detected center region: {self._chrome_center_rect}")
+                center_rect = self._detect_chrome_center(img)
+                print(f"Loaded chrome background: {chrome_path} ({img.size})")
+                print(f"Detected center region: {center_rect}")
+                return arr, img.size, center_rect
             except Exception as e:
                 print(f"Failed to load chrome background: {e}")
         else:
             print(f"Chrome background not found: {chrome_path}")
+        return None
 
-    def _detect_chrome_center(self, img: Image.Image) -> None:
+    def _detect_chrome_center(self, img: Image.Image) -> tuple:
         arr = np.array(img)
         h, w = arr.shape[:2]
         
@@ -148,29 +369,48 @@ class BrutalTermApp:
             rw = min(w - x, rw + 2 * padding)
             rh = min(h - y, rh + 2 * padding)
             
-            self._chrome_center_rect = (x / w, y / h, rw / w, rh / h)
-        else:
-            self._chrome_center_rect = (0.1, 0.1, 0.8, 0.8)
+            return (x / w, y / h, rw / w, rh / h)
+        return (0.1, 0.1, 0.8, 0.8)
 
-    def _create_initial_tab(self) -> None:
-        tab = TerminalTab(self.pty_manager, self.theme_manager)
-        self.terminal_tabs.append(tab)
+    def _create_initial_tab(self) -> TerminalTab:
+        tab = TerminalTab(self.pty_manager, self.theme_manager, spawn=False, config=self.config)
+        self._register_tab(tab)
         self.active_tab_idx = 0
+        return tab
 
     def _create_new_tab(self) -> None:
-        tab = TerminalTab(self.pty_manager, self.theme_manager)
-        self.terminal_tabs.append(tab)
+        backend = self.session_client or self.pty_manager
+        tab = TerminalTab(backend, self.theme_manager, config=self.config)
+        self._register_tab(tab)
         self.active_tab_idx = len(self.terminal_tabs) - 1
 
+    def _adopt_session(self, session_id: int) -> None:
+        tab = TerminalTab(self.session_client, self.theme_manager, spawn=False, config=self.config)
+        tab.attach(session_id)
+        self._register_tab(tab)
+
     def _close_tab(self, idx: int) -> None:
         if len(self.terminal_tabs) <= 1:
             return
         if 0 <= idx < len(self.terminal_tabs):
-            self.terminal_tabs[idx].close()
-            self.terminal_tabs.pop(idx)
+            tab = self.terminal_tabs.pop(idx)
+            tab.close()
+            self.memory_governor.unregister(f"tab{tab.session_key}")
+            if self.session_store:
+                self.session_store.forget(tab.session_key)
             if self.active_tab_idx >= len(self.terminal_tabs):
                 self.active_tab_idx = len(self.terminal_tabs) - 1
 
+    def _manage_hibernation(self) -> None:
+        now = time.monotonic()
+        if now - self._last_hibernation_check < 1.0:
+            return
+        self._last_hibernation_check = now
+        
+        for i, tab in enumerate(self.terminal_tabs):
+            if i != self.active_tab_idx and tab.should_hibernate(now):
+                tab.hibernate()
+
     def _fetch_image(self) -> None:
         if self.image_fetcher:
             try:
@@ -181,13 +421,14 @@ class BrutalTermApp:
     def _fetch_message(self) -> None:
         if self.message_fetcher:
             try:
-                self.message_fetcher.fetch_async()
+                self.message_fetcher.rotate()
             except Exception as e:
                 print(f"Message fetch error: {e}")
 
     def _render_tab_bar(self) -> None:
         for i, tab in enumerate(self.terminal_tabs):
-            label = f" {tab.title} ##{i}"
+            marker = "* " if tab.alert else ""
+            label = f" {marker}{tab.title} ##{i}"
             if i == self.active_tab_idx:
                 imgui.push_style_color(imgui.Col_.button, self.theme_manager.accent_color)
             
@@ -225,6 +466,7 @@ class BrutalTermApp:
             
             self.chrome_renderer.render(message, image)
 
+    @traced("chrome.background", "render")
     def _render_chrome_background(self) -> None:
         if self._chrome_image_array is None:
             return
@@ -244,12 +486,9 @@ class BrutalTermApp:
         
         imgui.set_cursor_pos((offset_x, offset_y))
         
-        params = immvision.ImageParams()
-        params.image_display_size = scaled_w, scaled_h
-        params.show_options_button = False
-        params.zoom_key = ""
-        
-        immvision.image("##chrome_bg", self._chrome_image_array, params)
+        # Re-uploaded from the kept pixels if memory pressure evicted the texture.
+        texture = self.texture_cache.get("chrome_background", self._chrome_image_array)
+        imgui.image(texture, (scaled_w, scaled_h))
 
     def _get_center_screen_rect(self) -> tuple | None:
         if self._chrome_center_rect is None or self._chrome_image_size is None:
@@ -277,16 +516,49 @@ class BrutalTermApp:
         
         return (int(screen_x), int(screen_y), int(screen_w), int(screen_h))
 
+    def _handle_shortcuts(self) -> None:
+        io = imgui.get_io()
+        if not io.key_ctrl:
+            return
+        
+        if io.key_shift:
+            if imgui.is_key_pressed(imgui.Key.t):
+                TRACER.enabled = not TRACER.enabled
+                print(f"Tracing {'enabled' if TRACER.enabled else 'disabled'}")
+            elif imgui.is_key_pressed(imgui.Key.l) and self.latency_probe:
+                print(self.latency_probe.report())
+            elif imgui.is_key_pressed(imgui.Key.m):
+                print(self.memory_governor.report())
+            elif imgui.is_key_pressed(imgui.Key.p):
+                try:
+                    print(f"Trace written to {TRACER.dump()}")
+                except Exception as e:
+                    print(f"Failed to write trace: {e}")
+            return
+        
+        if imgui.is_key_pressed(imgui.Key.equal) or imgui.is_key_pressed(imgui.Key.keypad_add):
+            self.theme_manager.zoom_in()
+        elif imgui.is_key_pressed(imgui.Key.minus) or imgui.is_key_pressed(imgui.Key.keypad_subtract):
+            self.theme_manager.zoom_out()
+        elif imgui.is_key_pressed(imgui.Key._0):
+            self.theme_manager.reset_zoom()
+
     def _render_startup_effect(self) -> None:
         if self.show_startup_effect and self.startup_effects:
             done = self.startup_effects.render()
             if done or imgui.is_key_pressed(imgui.Key.escape):
                 self.show_startup_effect = False
 
+    @traced("frame", "render")
     def _gui_function(self) -> None:
+        if self._init_stages:
+            self._poll_init_stages()
+        
         if self.show_startup_effect:
             self._render_startup_effect()
         else:
+            self._handle_shortcuts()
+            self.theme_manager.prewarm_font_sizes()
             self._render_chrome_background()
             
             center_rect = self._get_center_screen_rect()
@@ -318,26 +590,70 @@ class BrutalTermApp:
         
         for tab in self.terminal_tabs:
             tab.update()
+        
+        self._manage_hibernation()
+        self.memory_governor.update()
+        self._save_sessions()
 
     def _setup_docking_layout(self, runner_params) -> None:
         pass
 
     def _post_init(self) -> None:
-        self._init_components()
+        self._register_memory_subsystems()
+        self._start_init_stages()
+
+    def _after_swap(self) -> None:
+        if self.latency_probe:
+            self.latency_probe.on_frame_presented()
+
+    @traced("pre_new_frame", "render")
+    def _pre_new_frame(self) -> None:
+        if self._load_base_font:
+            self._load_base_font = False
+            self.theme_manager.load_random_font()
+        self.theme_manager.font_loader.glyph_manager.apply_pending()
 
     def _cleanup(self) -> None:
+        if self._init_executor:
+            # Results that arrive now would only start services during teardown.
+            self._init_executor.shutdown(wait=True, cancel_futures=True)
+            self._init_executor = None
+            self._init_stages = {}
+        
         if self.scheduler:
             self.scheduler.stop()
         
-        for tab in self.terminal_tabs:
-            tab.close()
+        if self.hf_service:
+            self.hf_service.shutdown()
+        
+        if self.session_store:
+            # Tabs are saved incrementally; this only writes what changed since the last pass.
+            if self._session_saver:
+                self._session_saver.shutdown(wait=True)
+            self._save_sessions(force=True)
+            self.session_store.close()
+        
+        if self.session_client:
+            # Leave the daemon's shells running so the next GUI can re-attach.
+            self.session_client.disconnect()
+        else:
+            for tab in self.terminal_tabs:
+                tab.close()
         
         self.pty_manager.cleanup()
+        self.memory_governor.shutdown()
+        if self.output_logger:
+            self.output_logger.shutdown()
+        if self.latency_probe:
+            print(self.latency_probe.report())
+        self.theme_manager.font_loader.glyph_manager.shutdown()
 
     def run(self) -> None:
         runner_params = immapp.RunnerParams()
         
         runner_params.callbacks.post_init = self._post_init
+        runner_params.callbacks.pre_new_frame = self._pre_new_frame
+        runner_params.callbacks.after_swap = self._after_swap
         runner_params.callbacks.show_gui = self._gui_function
         runner_params.callbacks.before_exit = self._cleanup
         
@@ -0,0 +1,223 @@
+"""Shared HuggingFace client service with pooling, retries and a circuit breaker."""
+
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, Callable, Dict, Any
+
+from huggingface_hub import InferenceClient
+
+try:
+    from huggingface_hub.utils import httpx
+    TRANSIENT_ERRORS = (TimeoutError, ConnectionError, httpx.TransportError)
+except ImportError:  # huggingface_hub < 1.0 is built on requests
+    import requests
+    TRANSIENT_ERRORS = (TimeoutError, ConnectionError, requests.exceptions.ConnectionError,
+                        requests.exceptions.Timeout)
+
+
+def is_transient(error: Exception) -> bool:
+    # Worth retrying and counting against the endpoint: timeouts, dropped connections,
+    # rate limiting and server errors. A bad request or missing model would fail again.
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 300.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state_locked()
+
+    def _state_locked(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            state = self._state_locked()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class HFClientService:
+    MAX_WORKERS = 2
+    ATTEMPT_TIMEOUT = 30.0
+    DEFAULT_DEADLINE = 90.0
+    MAX_ATTEMPTS = 4
+    BACKOFF_BASE = 1.0
+    BACKOFF_MAX = 20.0
+
+    def __init__(self, token: Optional[str] = None, base_url: Optional[str] = None,
+                 max_workers: Optional[int] = None,
+                 attempt_timeout: Optional[float] = None):
+        self.token = token or os.environ.get("HF_TOKEN")
+        # Lets the fetchers run against a local stub server instead of the hub.
+        self.base_url = base_url or os.environ.get("BRUTAL_HF_BASE_URL")
+        self.attempt_timeout = attempt_timeout or self.ATTEMPT_TIMEOUT
+
+        self._clients: Dict[Optional[str], InferenceClient] = {}
+        self._breakers: Dict[Optional[str], CircuitBreaker] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or self.MAX_WORKERS,
+            thread_name_prefix="brutal-hf"
+        )
+        self._shutdown = False
+
+    def get_client(self, model: Optional[str] = None) -> InferenceClient:
+        with self._lock:
+            client = self._clients.get(model)
+            if client is None:
+                if self.base_url:
+                    target = self.base_url.rstrip("/")
+                    if model:
+                        target = f"{target}/models/{model}"
+                else:
+                    target = model
+                client = InferenceClient(
+                    model=target,
+                    token=self.token,
+                    timeout=self.attempt_timeout
+                )
+                self._clients[model] = client
+            return client
+
+    def get_breaker(self, model: Optional[str] = None) -> CircuitBreaker:
+        with self._lock:
+            return self._breaker_locked(model)
+
+    def _breaker_locked(self, model: Optional[str]) -> CircuitBreaker:
+        breaker = self._breakers.get(model)
+        if breaker is None:
+            breaker = CircuitBreaker()
+            self._breakers[model] = breaker
+        return breaker
+
+    def is_healthy(self, model: Optional[str] = None) -> bool:
+        return self.get_breaker(model).state != CircuitBreaker.OPEN
+
+    def submit(self, key: str, fn: Callable[[InferenceClient], Any],
+               model: Optional[str] = None, deadline: Optional[float] = None,
+               fallback: Optional[Callable[[], None]] = None) -> Optional[Future]:
+        deadline_at = time.monotonic() + (deadline or self.DEFAULT_DEADLINE)
+
+        def task() -> Any:
+            try:
+                return self._call_with_retries(fn, model, deadline_at)
+            except Exception as e:
+                print(f"HF request '{key}' failed: {e}")
+                if fallback:
+                    fallback()
+                return None
+
+        # Check and insert under one lock, so two callers can't both start the same key.
+        with self._lock:
+            if self._shutdown:
+                return None
+            running = self._inflight.get(key)
+            if running is not None and not running.done():
+                return running
+            future = None
+            if self._breaker_locked(model).allow_request():
+                future = self._executor.submit(task)
+                self._inflight[key] = future
+
+        if future is None and fallback:
+            fallback()
+        return future
+
+    def call(self, fn: Callable[[InferenceClient], Any], model: Optional[str] = None,
+             deadline: Optional[float] = None) -> Any:
+        if not self.get_breaker(model).allow_request():
+            raise RuntimeError(f"HuggingFace endpoint unhealthy: {model or 'default'}")
+        deadline_at = time.monotonic() + (deadline or self.DEFAULT_DEADLINE)
+        return self._call_with_retries(fn, model, deadline_at)
+
+    def _call_with_retries(self, fn: Callable[[InferenceClient], Any],
+                           model: Optional[str], deadline_at: float) -> Any:
+        client = self.get_client(model)
+        breaker = self.get_breaker(model)
+
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                result = fn(client)
+                breaker.record_success()
+                return result
+            except Exception as e:
+                if not is_transient(e):
+                    # The endpoint answered; the request itself is at fault.
+                    breaker.record_success()
+                    raise
+                breaker.record_failure()
+                remaining = deadline_at - time.monotonic()
+                if attempt >= self.MAX_ATTEMPTS or remaining <= 0 \
+                        or not breaker.allow_request():
+                    raise
+
+            # Full jitter keeps concurrent retries from stampeding the endpoint.
+            backoff = min(self.BACKOFF_MAX, self.BACKOFF_BASE * (2 ** (attempt - 1)))
+            delay = random.uniform(0, backoff)
+            if delay >= remaining:
+                raise TimeoutError(f"Deadline exceeded after {attempt} attempts")
+            time.sleep(delay)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._shutdown = True
+            for future in self._inflight.values():
+                future.cancel()
+            self._inflight.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_shared_service: Optional[HFClientService] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_service() -> HFClientService:
+    global _shared_service
+    with _shared_lock:
+        if _shared_service is None:
+            _shared_service = HFClientService()
+        return _shared_service
@@ -1,7 +1,5 @@
 """Image fetcher for HuggingFace FLUX.1-dev absurd graphics."""
 
-import os
-import threading
 import time
 from typing import Optional
 from pathlib import Path
@@ -9,8 +7,12 @@ from pathlib import Path
 from huggingface_hub import InferenceClient
 from PIL import Image
 
+from src.huggingface.client import HFClientService, get_shared_service
+
 
 class ImageFetcher:
+    MODEL = "black-forest-labs/FLUX.1-dev"
+
     PROMPTS = [
         "brutalist architecture concrete geometric abstract art",
         "glitch art corrupted data visualization chaos",
@@ -24,58 +26,47 @@ class ImageFetcher:
         "brutalist monument concrete sky ominous clouds",
     ]
 
-    def __init__(self):
-        self.client = InferenceClient(
-            model="black-forest-labs/FLUX.1-dev",
-            token=os.environ.get("HF_TOKEN")
-        )
+    def __init__(self, service: Optional[HFClientService] = None):
+        self.service = service or get_shared_service()
         self.current_image: Optional[str] = None
         self._cache_dir = Path.home() / ".brutal" / "images"
         self._cache_dir.mkdir(parents=True, exist_ok=True)
-        self._fetch_lock = threading.Lock()
-        self._fetching = False
 
     def fetch_async(self) -> None:
-        if self._fetching:
-            return
-        
-        thread = threading.Thread(target=self._fetch_sync, daemon=True)
-        thread.start()
+        self.service.submit(
+            "image_fetch",
+            self._fetch_sync,
+            model=self.MODEL,
+            fallback=self._use_cached_image
+        )
 
-    def _fetch_sync(self) -> None:
-        with self._fetch_lock:
-            if self._fetching:
-                return
-            self._fetching = True
+    def _fetch_sync(self, client: InferenceClient) -> None:
+        import random
+        prompt = random.choice(self.PROMPTS)
+        prompt += ", absurd, chaotic, brutal, raw, unpolished"
         
-        try:
-            import random
-            prompt = random.choice(self.PROMPTS)
-            prompt += ", absurd, chaotic, brutal, raw, unpolished"
-            
-            print(f"Fetching image with prompt: {prompt[:50]}...")
-            
-            image = self.client.text_to_image(
-                prompt,
-                width=512,
-                height=512
-            )
-            
-            if isinstance(image, Image.Image):
-                timestamp = int(time.time())
-                filename = f"chrome_{timestamp}.png"
-                filepath = self._cache_dir / filename
-                image.save(filepath)
-                self.current_image = str(filepath)
-                print(f"Image saved: {filepath}")
-                
-                self._cleanup_old_images()
+        print(f"Fetching image with prompt: {prompt[:50]}...")
         
-        except Exception as e:
-            print(f"Image fetch failed: {e}")
+        image = client.text_to_image(
+            prompt,
+            width=512,
+            height=512
+        )
         
-        finally:
-            self._fetching = False
+        if isinstance(image, Image.Image):
+            timestamp = int(time.time())
+            filename = f"chrome_{timestamp}.png"
+            filepath = self._cache_dir / filename
+            image.save(filepath)
+            self.current_image = str(filepath)
+            print(f"Image saved: {filepath}")
+            
+            self._cleanup_old_images()
+
+    def _use_cached_image(self) -> None:
+        cached = self.get_random_cached_image()
+        if cached:
+            self.current_image = cached
 
     def _cleanup_old_images(self, keep: int = 10) -> None:
         try:
@@ -1,17 +1,19 @@
 """Message fetcher for absurd text content - hybrid local + HF API."""
 
-import os
-import json
+import queue
 import random
-import threading
-import time
-from pathlib import Path
-from typing import Optional, List
+import re
+from typing import Optional
 
 from huggingface_hub import InferenceClient
 
+from src.huggingface.client import HFClientService, get_shared_service
+from src.huggingface.message_store import MessageStore
+
 
 class MessageFetcher:
+    MODEL = "mistralai/Mistral-7B-Instruct-v0.3"
+
     LOCAL_MESSAGES = [
         "THE TERMINAL KNOWS ALL. THE TERMINAL SEES ALL.",
         "YOUR COMMANDS ARE MERELY SUGGESTIONS TO THE VOID.",
@@ -35,6 +37,8 @@ class MessageFetcher:
         "THE TERMINAL IS BRUTAL. THE TERMINAL IS HONEST.",
     ]
 
+    _LIST_MARKER = re.compile(r"^\s*(?:\d+[.):]|[-*\u2022])\s*")
+
     API_PROMPTS = [
         "Write a short absurd ominous message for a brutalist terminal app, max 10 words",
         "Generate a surreal existential one-liner about command line interfaces",
@@ -43,84 +47,69 @@ class MessageFetcher:
         "Generate a dark humor terminal command metaphor, max 10 words",
     ]
 
-    def __init__(self):
-        self.client = InferenceClient(
-            token=os.environ.get("HF_TOKEN")
-        )
-        self.current_message: Optional[str] = random.choice(self.LOCAL_MESSAGES)
-        self._messages: List[str] = self.LOCAL_MESSAGES.copy()
-        self._cache_file = Path.home() / ".brutal" / "messages.json"
-        self._fetch_lock = threading.Lock()
-        self._fetching = False
-        self._load_cached_messages()
+    BATCH_SIZE = 8
+    PREFETCH_SIZE = 24
+    LOW_WATER = 6
 
-    def _load_cached_messages(self) -> None:
-        try:
-            if self._cache_file.exists():
-                with open(self._cache_file, "r") as f:
-                    cached = json.load(f)
-                    if isinstance(cached, list):
-                        self._messages = list(set(self._messages + cached))
-        except Exception:
-            pass
+    def __init__(self, service: Optional[HFClientService] = None,
+                 store: Optional[MessageStore] = None):
+        self.service = service or get_shared_service()
+        self.store = store or MessageStore()
+        self.current_message: Optional[str] = random.choice(self.LOCAL_MESSAGES)
+        self._prefetch: "queue.Queue[str]" = queue.Queue(maxsize=self.PREFETCH_SIZE)
 
-    def _save_cached_messages(self) -> None:
-        try:
-            self._cache_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(self._cache_file, "w") as f:
-                json.dump(self._messages[-100:], f)
-        except Exception:
-            pass
+    def rotate(self) -> None:
+        if random.random() < 0.3:
+            self._use_local_message()
+        else:
+            try:
+                self.current_message = self._prefetch.get_nowait()
+            except queue.Empty:
+                self.current_message = self.get_random_message()
+        
+        if self._prefetch.qsize() < self.LOW_WATER:
+            self.fetch_async()
 
     def fetch_async(self) -> None:
-        if self._fetching:
-            return
-        
-        thread = threading.Thread(target=self._fetch_sync, daemon=True)
-        thread.start()
+        self.service.submit(
+            "message_fetch",
+            self._fetch_sync,
+            model=self.MODEL
+        )
 
-    def _fetch_sync(self) -> None:
-        with self._fetch_lock:
-            if self._fetching:
-                return
-            self._fetching = True
+    def _fetch_sync(self, client: InferenceClient) -> None:
+        prompt = (
+            f"{random.choice(self.API_PROMPTS)}. "
+            f"Write {self.BATCH_SIZE} different ones, one per line, no numbering."
+        )
         
-        try:
-            if random.random() < 0.3:
-                self.current_message = random.choice(self.LOCAL_MESSAGES)
-                self._fetching = False
-                return
-            
-            prompt = random.choice(self.API_PROMPTS)
-            
-            print(f"Fetching absurd message...")
-            
-            response = self.client.text_generation(
-                prompt,
-                model="mistralai/Mistral-7B-Instruct-v0.3",
-                max_new_tokens=50,
-                temperature=1.2,
-            )
-            
-            if response:
-                message = response.strip().strip('"\'').strip()
-                if 5 <= len(message) <= 100:
-                    self.current_message = message.upper()
-                    if message.upper() not in [m.upper() for m in self._messages]:
-                        self._messages.append(message.upper())
-                    self._save_cached_messages()
-                    print(f"New absurd message: {self.current_message}")
-                    return
+        print(f"Fetching {self.BATCH_SIZE} absurd messages...")
         
-        except Exception as e:
-            print(f"Message fetch failed: {e}")
+        response = client.text_generation(
+            prompt,
+            max_new_tokens=40 * self.BATCH_SIZE,
+            temperature=1.2,
+        )
         
-        finally:
-            self._fetching = False
+        if not response:
+            return
+        
+        candidates = []
+        for line in response.splitlines():
+            message = self._LIST_MARKER.sub("", line).strip().strip('"\'').strip()
+            if 5 <= len(message) <= 100:
+                candidates.append(message)
         
+        added = self.store.add_many(candidates)
+        for message in added:
+            try:
+                self._prefetch.put_nowait(message)
+            except queue.Full:
+                break
+        print(f"Prefetched {len(added)} new absurd messages")
+
+    def _use_local_message(self) -> None:
         self.current_message = random.choice(self.LOCAL_MESSAGES)
 
     def get_random_message(self) -> str:
-        if self._messages:
-            return random.choice(self._messages)
-        return random.choice(self.LOCAL_MESSAGES)
+        return self.store.random_message() or random.choice(self.LOCAL_MESSAGES)
@@ -0,0 +1,117 @@
+"""Append-only message log with an in-memory dedupe index."""
+
+import json
+import os
+import random
+import threading
+from pathlib import Path
+from typing import Optional, List, Iterable, Set
+
+
+class MessageStore:
+    MAX_MESSAGES = 500
+    COMPACT_RATIO = 2.0
+
+    def __init__(self, path: Optional[Path] = None, legacy_path: Optional[Path] = None):
+        self._path = path or Path.home() / ".brutal" / "messages.jsonl"
+        self._legacy_path = legacy_path or self._path.with_suffix(".json")
+        self._messages: List[str] = []
+        self._index: Set[str] = set()
+        self._log_lines = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            if self._path.exists():
+                with open(self._path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        self._log_lines += 1
+                        try:
+                            message = json.loads(line)
+                        except ValueError:
+                            continue
+                        if isinstance(message, str):
+                            self._insert(message)
+            elif self._legacy_path.exists():
+                with open(self._legacy_path, "r", encoding="utf-8") as f:
+                    cached = json.load(f)
+                if isinstance(cached, list):
+                    for message in cached:
+                        if isinstance(message, str):
+                            self._insert(message)
+                    self._compact_locked()
+        except Exception:
+            pass
+
+        self._trim_locked()
+
+    def _insert(self, message: str) -> bool:
+        key = message.upper()
+        if key in self._index:
+            return False
+        self._index.add(key)
+        self._messages.append(key)
+        return True
+
+    def _trim_locked(self) -> bool:
+        overflow = len(self._messages) - self.MAX_MESSAGES
+        if overflow <= 0:
+            return False
+        for message in self._messages[:overflow]:
+            self._index.discard(message)
+        del self._messages[:overflow]
+        return True
+
+    def add_many(self, messages: Iterable[str]) -> List[str]:
+        with self._lock:
+            added = [m.upper() for m in messages if self._insert(m)]
+            if not added:
+                return added
+
+            try:
+                self._path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self._path, "a", encoding="utf-8") as f:
+                    for message in added:
+                        f.write(json.dumps(message) + "\n")
+                self._log_lines += len(added)
+            except Exception:
+                pass
+
+            # Trimming only shrinks the index; the log catches up on the next compaction,
+            # and loading it replays the same trim.
+            self._trim_locked()
+            if self._log_lines > self.COMPACT_RATIO * max(len(self._messages), 1):
+                self._compact_locked()
+            return added
+
+    def add(self, message: str) -> bool:
+        return bool(self.add_many([message]))
+
+    def compact(self) -> None:
+        with self._lock:
+            self._compact_locked()
+
+    def _compact_locked(self) -> None:
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._path.with_suffix(".jsonl.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for message in self._messages:
+                    f.write(json.dumps(message) + "\n")
+            os.replace(tmp_path, self._path)
+            self._log_lines = len(self._messages)
+        except Exception:
+            pass
+
+    def random_message(self) -> Optional[str]:
+        with self._lock:
+            if self._messages:
+                return random.choice(self._messages)
+        return None
+
+    def __contains__(self, message: str) -> bool:
+        return message.upper() in self._index
+
+    def __len__(self) -> int:
+        return len(self._messages)
@@ -0,0 +1,146 @@
+"""Precomputed two-stage Unicode cell-width table, with an on-disk cache per wcwidth version."""
+
+import threading
+from array import array
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Tuple
+
+import wcwidth as _wcwidth
+
+
+BLOCK_SHIFT = 8
+BLOCK_SIZE = 1 << BLOCK_SHIFT
+MAX_CODEPOINT = 0x110000
+
+# Planes 4-13 are unassigned and 15-16 are private use: wcwidth reports 1 for all of them,
+# so only these planes need a per-codepoint scan.
+SCANNED_PLANES = (0, 1, 2, 3, 14)
+
+ZWJ = 0x200D
+REGIONAL_INDICATORS = (0x1F1E6, 0x1F1FF)
+
+_CACHE_MAGIC = b"BTWD"
+
+
+@lru_cache(maxsize=4096)
+def _slow_width(cp: int) -> int:
+    return _wcwidth.wcwidth(chr(cp))
+
+
+class WidthTable:
+    # stage1[cp >> 8] picks a 256-entry block in stage2; entries hold width + 1
+    # so unprintable (-1) fits in a byte.
+
+    def __init__(self, stage1: array, stage2: bytes):
+        self.stage1 = stage1
+        self.stage2 = stage2
+
+    def width(self, cp: int) -> int:
+        if cp >= MAX_CODEPOINT:
+            return 1
+        return self.stage2[(self.stage1[cp >> BLOCK_SHIFT] << BLOCK_SHIFT) | (cp & 0xFF)] - 1
+
+    @classmethod
+    def build(cls) -> "WidthTable":
+        blocks = {}
+        stage1 = array("H", bytes(2 * (MAX_CODEPOINT >> BLOCK_SHIFT)))
+        narrow = bytes([2]) * BLOCK_SIZE
+        chunks = []
+
+        def block_id(block: bytes) -> int:
+            bid = blocks.get(block)
+            if bid is None:
+                bid = len(chunks)
+                blocks[block] = bid
+                chunks.append(block)
+            return bid
+
+        narrow_id = block_id(narrow)
+        wcw = _wcwidth.wcwidth
+        for index in range(len(stage1)):
+            start = index << BLOCK_SHIFT
+            if (start >> 16) in SCANNED_PLANES:
+                block = bytes(wcw(chr(cp)) + 1 for cp in range(start, start + BLOCK_SIZE))
+                stage1[index] = block_id(block)
+            else:
+                stage1[index] = narrow_id
+        return cls(stage1, b"".join(chunks))
+
+    def to_bytes(self) -> bytes:
+        return _CACHE_MAGIC + len(self.stage1).to_bytes(4, "little") + self.stage1.tobytes() + self.stage2
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "WidthTable":
+        if data[:4] != _CACHE_MAGIC:
+            raise ValueError("not a width table")
+        count = int.from_bytes(data[4:8], "little")
+        stage1 = array("H")
+        stage1.frombytes(data[8:8 + 2 * count])
+        return cls(stage1, data[8 + 2 * count:])
+
+
+def _cache_path() -> Path:
+    version = getattr(_wcwidth, "__version__", "unknown")
+    return Path.home() / ".brutal" / "cache" / f"widths-{version}.bin"
+
+
+class _WidthProvider:
+    def __init__(self):
+        self.table: Optional[WidthTable] = None
+        self._lock = threading.Lock()
+        self._building = False
+
+    def load(self) -> None:
+        path = _cache_path()
+        try:
+            self.table = WidthTable.from_bytes(path.read_bytes())
+            return
+        except Exception:
+            pass
+        # Building takes most of a second, so it happens off the caller's thread;
+        # lookups use the cached wcwidth call until the table is ready.
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+        threading.Thread(target=self._build, args=(path,), name="brutal-width-table",
+                         daemon=True).start()
+
+    def _build(self, path: Path) -> None:
+        try:
+            table = WidthTable.build()
+            self.table = table
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(table.to_bytes())
+            tmp.replace(path)
+        except Exception as e:
+            print(f"Failed to build width table: {e}")
+
+
+_provider = _WidthProvider()
+
+
+def load_width_table() -> None:
+    # Called once at app and daemon startup; until then lookups go through wcwidth.
+    _provider.load()
+
+
+def char_width(cp: int) -> int:
+    table = _provider.table
+    if table is None:
+        return _slow_width(cp)
+    return table.width(cp)
+
+
+def get_table() -> Tuple[Optional[array], Optional[bytes]]:
+    # Raw stages for hot loops that inline the lookup.
+    table = _provider.table
+    if table is None:
+        return None, None
+    return table.stage1, table.stage2
+
+
+def is_regional_indicator(cp: int) -> bool:
+    return REGIONAL_INDICATORS[0] <= cp <= REGIONAL_INDICATORS[1]
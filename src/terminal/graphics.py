@@ -0,0 +1,471 @@
+"""Inline images: Sixel and kitty graphics protocol decoding off-thread, anchored to cell lines."""
+
+import base64
+import colorsys
+import io
+import itertools
+import math
+import os
+import re
+import stat
+import tempfile
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+
+# VT340 default palette for the first 16 color registers.
+_VT340 = [
+    (0, 0, 0), (20, 20, 80), (80, 13, 13), (20, 80, 20), (80, 20, 80), (20, 80, 80),
+    (80, 80, 20), (53, 53, 53), (26, 26, 26), (33, 33, 60), (60, 26, 26), (33, 60, 33),
+    (60, 33, 60), (33, 60, 60), (60, 60, 33), (80, 80, 80),
+]
+
+_SIXEL_TOKEN = re.compile(r"""
+      \#(\d*)(?:;(\d*);(\d*);(\d*);(\d*))?   # color select / define
+    | !(\d*)([?-~])                           # repeat
+    | "(\d*);?(\d*);?(\d*);?(\d*)             # raster attributes
+    | ([?-~$\-])                              # sixel data, CR, LF
+""", re.VERBOSE)
+_RASTER = re.compile(r'"\d*;\d*;(\d+);(\d+)')
+_SIXEL_PARAMS = re.compile(r"^([0-9;]*)q")
+
+# Checked against the size an image declares, before it is placed or decoded.
+MAX_IMAGE_SIDE = 10000
+MAX_IMAGE_PIXELS = 4096 * 4096
+MAX_IMAGE_BYTES = MAX_IMAGE_PIXELS * 4
+# The parser scrolls past an image line by line, so it may cover at most this many screens.
+MAX_SCREENS = 2
+# Kitty file transmission never reads from these (devices, FIFOs, kernel files).
+_SYSTEM_DIRS = ("/proc", "/sys", "/dev")
+
+_DECODER = ThreadPoolExecutor(max_workers=2, thread_name_prefix="brutal-graphics")
+_keys = itertools.count(1)
+
+
+def _percent(value: str) -> int:
+    return min(255, int(value or 0) * 255 // 100)
+
+
+def _check_size(width: int, height: int) -> None:
+    if width > MAX_IMAGE_SIDE or height > MAX_IMAGE_SIDE or width * height > MAX_IMAGE_PIXELS:
+        raise ValueError(f"image too large ({width}x{height})")
+
+
+def _register_color(space: str, a: str, b: str, c: str) -> Tuple[int, int, int]:
+    if space == "1":
+        # DEC HLS puts blue at 0 degrees; standard HLS has red there.
+        h = ((int(a or 0) + 240) % 360) / 360.0
+        r, g, bl = colorsys.hls_to_rgb(h, int(b or 0) / 100.0, int(c or 0) / 100.0)
+        return int(r * 255), int(g * 255), int(bl * 255)
+    return _percent(a), _percent(b), _percent(c)
+
+
+def decode_sixel(params: str, data: str) -> np.ndarray:
+    palette = np.zeros((256, 4), dtype=np.uint8)
+    palette[:, 3] = 255
+    palette[:16, :3] = [[_percent(str(v)) for v in rgb] for rgb in _VT340]
+
+    # Bands of six pixel rows, each collected as runs and painted with numpy at the end.
+    bands: List[tuple] = []
+    starts: List[int] = []
+    counts: List[int] = []
+    values: List[int] = []
+    colors: List[int] = []
+    x = width = 0
+    color = 0
+    raster_w = raster_h = 0
+
+    def end_band() -> None:
+        bands.append((starts[:], counts[:], values[:], colors[:], palette.copy()))
+        del starts[:], counts[:], values[:], colors[:]
+
+    for m in _SIXEL_TOKEN.finditer(data):
+        char = m.group(12)
+        if char is not None:
+            if char == "$":
+                x = 0
+            elif char == "-":
+                end_band()
+                x = 0
+                _check_size(width, 6 * len(bands))
+            else:
+                starts.append(x)
+                counts.append(1)
+                values.append(ord(char) - 63)
+                colors.append(color)
+                x += 1
+                width = max(width, x)
+        elif m.group(7) is not None:
+            n = max(1, int(m.group(6) or 1))
+            starts.append(x)
+            counts.append(n)
+            values.append(ord(m.group(7)) - 63)
+            colors.append(color)
+            x += n
+            width = max(width, x)
+            if width > MAX_IMAGE_SIDE:
+                raise ValueError(f"sixel row too wide ({width})")
+        elif m.group(1) is not None:
+            color = min(255, int(m.group(1) or 0))
+            if m.group(2) is not None:
+                palette[color, :3] = _register_color(m.group(2), m.group(3), m.group(4), m.group(5))
+        elif m.group(8) is not None:
+            raster_w, raster_h = int(m.group(10) or 0), int(m.group(11) or 0)
+    if starts:
+        end_band()
+
+    width = max(width, raster_w)
+    height = max(6 * len(bands), raster_h)
+    if not width or not height:
+        raise ValueError("empty sixel image")
+    _check_size(width, height)
+    # P2 == 1 leaves unset pixels transparent; otherwise they take color 0.
+    fields = params.split(";")
+    transparent = len(fields) > 1 and fields[1] == "1"
+    pixels = np.zeros((height, width, 4), dtype=np.uint8)
+    if not transparent:
+        pixels[:] = palette[0]
+
+    bits = np.arange(6)
+    for band, (b_starts, b_counts, b_values, b_colors, b_palette) in enumerate(bands):
+        if not b_starts:
+            continue
+        run_counts = np.asarray(b_counts)
+        total = int(run_counts.sum())
+        offsets = np.arange(total) - np.repeat(np.cumsum(run_counts) - run_counts, run_counts)
+        xs = np.repeat(np.asarray(b_starts), run_counts) + offsets
+        vs = np.repeat(np.asarray(b_values), run_counts)
+        rgba = b_palette[np.repeat(np.asarray(b_colors), run_counts)]
+        on = (vs[:, None] >> bits) & 1
+        for bit in range(6):
+            y = band * 6 + bit
+            if y >= height:
+                break
+            mask = on[:, bit].astype(bool)
+            pixels[y, xs[mask]] = rgba[mask]
+    if raster_h and raster_w:
+        pixels = pixels[:raster_h, :raster_w]
+    return np.ascontiguousarray(pixels)
+
+
+def split_sixel(body: str) -> Optional[Tuple[str, str]]:
+    # DCS body "P1;P2;P3q<data>" -> (params, data); None for other DCS strings.
+    m = _SIXEL_PARAMS.match(body)
+    if m is None:
+        return None
+    return m.group(1), body[m.end():]
+
+
+def sixel_size(data: str) -> Tuple[int, int]:
+    # Pixel size known before decoding: raster attributes, else the band count.
+    m = _RASTER.match(data)
+    if m:
+        return int(m.group(1)), int(m.group(2))
+    return 0, 6 * (data.count("-") + 1)
+
+
+def _inside(path: str, directory: str) -> bool:
+    try:
+        return os.path.commonpath([path, directory]) == directory
+    except ValueError:
+        return False
+
+
+def _temp_dirs() -> List[str]:
+    return [os.path.realpath(d) for d in (tempfile.gettempdir(), "/tmp", "/dev/shm")]
+
+
+def read_kitty_file(control: Dict[str, str], payload: bytes) -> bytes:
+    # t=f / t=t: the payload names a file. Like kitty, only regular files are read,
+    # never system paths, and a temporary file (t=t) must live in a temp dir and
+    # carry "tty-graphics-protocol" in its name; it is deleted once read.
+    path = os.path.realpath(payload.decode("utf-8"))
+    temporary = control.get("t") == "t"
+    in_temp = any(_inside(path, d) for d in _temp_dirs())
+    if temporary and not (in_temp and "tty-graphics-protocol" in os.path.basename(path)):
+        raise ValueError(f"refusing temporary file outside the temp dir: {path}")
+    if not in_temp and any(_inside(path, d) for d in _SYSTEM_DIRS):
+        raise ValueError(f"refusing to read {path}")
+
+    # O_NONBLOCK keeps a FIFO from blocking the open; it is rejected right after.
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_NONBLOCK", 0))
+    try:
+        info = os.fstat(fd)
+        if not stat.S_ISREG(info.st_mode):
+            raise ValueError(f"not a regular file: {path}")
+        offset = int(control.get("O", 0) or 0)
+        size = int(control.get("S", 0) or 0) or info.st_size - offset
+        if size > MAX_IMAGE_BYTES:
+            raise ValueError(f"image file too large ({size} bytes)")
+        with os.fdopen(fd, "rb") as f:
+            fd = -1
+            f.seek(offset)
+            data = f.read(size)
+    finally:
+        if fd >= 0:
+            os.close(fd)
+    if temporary:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+    return data
+
+
+def decode_kitty(control: Dict[str, str], payload: bytes) -> np.ndarray:
+    if control.get("t", "d") in ("f", "t"):
+        payload = read_kitty_file(control, payload)
+    if control.get("o") == "z":
+        inflater = zlib.decompressobj()
+        payload = inflater.decompress(payload, MAX_IMAGE_BYTES)
+        if inflater.unconsumed_tail:
+            raise ValueError("compressed image too large")
+    fmt = control.get("f", "32")
+    if fmt == "100":
+        image = Image.open(io.BytesIO(payload))
+        _check_size(*image.size)
+        return np.asarray(image.convert("RGBA")).copy()
+    width, height = int(control.get("s", 0)), int(control.get("v", 0))
+    _check_size(width, height)
+    channels = 3 if fmt == "24" else 4
+    if len(payload) < width * height * channels:
+        raise ValueError("truncated image data")
+    pixels = np.frombuffer(payload, dtype=np.uint8)[:width * height * channels]
+    pixels = pixels.reshape(height, width, channels)
+    if channels == 3:
+        pixels = np.dstack([pixels, np.full((height, width), 255, dtype=np.uint8)])
+    return np.ascontiguousarray(pixels)
+
+
+def _png_size(encoded: str) -> Tuple[int, int]:
+    # The IHDR chunk sits at a fixed offset, so the first 24 bytes give the size.
+    try:
+        head = base64.b64decode(encoded[:32])
+        if head[:8] == b"\x89PNG\r\n\x1a\n":
+            return int.from_bytes(head[16:20], "big"), int.from_bytes(head[20:24], "big")
+    except Exception:
+        pass
+    return 0, 0
+
+
+class GraphicImage:
+    __slots__ = ("key", "width", "height", "pixels", "failed", "nbytes")
+
+    def __init__(self, width: int, height: int):
+        # key is process-unique; the texture cache is shared by every tab.
+        self.key = next(_keys)
+        self.width = width
+        self.height = height
+        self.pixels: Optional[np.ndarray] = None
+        self.failed = False
+        self.nbytes = 0
+
+
+class Placement:
+    # line is absolute (Scrollback.total_appended + screen row), like prompt marks.
+    # cell_size is the cell the rows were computed against, so a later font zoom
+    # scales the image with the text; stretch fills an explicit cols x rows box instead.
+    __slots__ = ("image", "line", "col", "rows", "cols", "cell_size", "stretch")
+
+    def __init__(self, image: GraphicImage, line: int, col: int, rows: int, cols: int,
+                 cell_size: Tuple[float, float], stretch: bool = False):
+        self.image = image
+        self.line = line
+        self.col = col
+        self.rows = rows
+        self.cols = cols
+        self.cell_size = cell_size
+        self.stretch = stretch
+
+
+class GraphicsStore:
+    MAX_PLACEMENTS = 512
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        # Pixel size of a cell, kept current by the tab so image heights map to rows.
+        self.cell_size = (8.0, 16.0)
+        self.placements: List[Placement] = []
+        self._kitty_images: Dict[int, GraphicImage] = {}
+        self._kitty_chunks: Optional[Tuple[Dict[str, str], List[str]]] = None
+        self._lock = threading.Lock()
+        self.nbytes = 0
+
+    def _cells(self, width: int, height: int) -> Tuple[int, int]:
+        cell_w, cell_h = self.cell_size
+        return max(1, math.ceil(width / cell_w)), max(1, math.ceil(height / cell_h))
+
+    def _decode(self, image: GraphicImage, fn, *args) -> None:
+        def run() -> None:
+            try:
+                pixels = fn(*args)
+            except Exception as e:
+                print(f"Failed to decode inline image: {e}")
+                image.failed = True
+                return
+            with self._lock:
+                image.pixels = pixels
+                image.width, image.height = pixels.shape[1], pixels.shape[0]
+                image.nbytes = pixels.nbytes
+                self.nbytes += pixels.nbytes
+            self._enforce_budget()
+
+        _DECODER.submit(run)
+
+    def _place(self, image: GraphicImage, line: int, col: int, rows: int, cols: int,
+               stretch: bool = False) -> None:
+        with self._lock:
+            self.placements.append(Placement(image, line, col, rows, cols, self.cell_size, stretch))
+            if len(self.placements) > self.MAX_PLACEMENTS:
+                self._drop(self.placements[:len(self.placements) - self.MAX_PLACEMENTS])
+
+    def _acceptable(self, width: int, height: int, rows: int, screen_rows: int) -> bool:
+        try:
+            _check_size(width, height)
+        except ValueError as e:
+            print(f"Ignoring inline image: {e}")
+            return False
+        if rows > screen_rows * MAX_SCREENS:
+            print(f"Ignoring inline image: {rows} rows on a {screen_rows}-row screen")
+            return False
+        return True
+
+    def sixel(self, params: str, data: str, line: int, col: int,
+              screen_rows: int) -> Tuple[int, int]:
+        # Returns the (rows, cols) the image covers, for moving the cursor past it;
+        # (0, 0) when the declared size is refused.
+        width, height = sixel_size(data)
+        cols, rows = self._cells(width, height)
+        if not self._acceptable(width, height, rows, screen_rows):
+            return 0, 0
+        image = GraphicImage(width, height)
+        self._place(image, line, col, rows, cols)
+        self._decode(image, decode_sixel, params, data)
+        return rows, cols
+
+    def kitty(self, body: str, line: int, col: int,
+              screen_rows: int) -> Tuple[int, int, Optional[str]]:
+        # Returns (rows, cols) to move the cursor by and an optional reply for the client.
+        control_text, _, payload = body[1:].partition(";")
+        control = dict(kv.split("=", 1) for kv in control_text.split(",") if "=" in kv)
+
+        # Chunked transmissions (m=1) carry their real keys on the first chunk only.
+        if self._kitty_chunks is not None:
+            first, chunks = self._kitty_chunks
+            chunks.append(payload)
+            if control.get("m") == "1":
+                return 0, 0, None
+            self._kitty_chunks = None
+            control, payload = first, "".join(chunks)
+        elif control.get("m") == "1":
+            self._kitty_chunks = (control, [payload])
+            return 0, 0, None
+
+        action = control.get("a", "t")
+        image_id = int(control.get("i", 0) or 0)
+        quiet = control.get("q", "0")
+
+        def reply(message: str) -> Optional[str]:
+            if not image_id or quiet == "2" or (quiet == "1" and message == "OK"):
+                return None
+            return f"\x1b_Gi={image_id};{message}\x1b\\"
+
+        if action == "q":
+            return 0, 0, reply("OK")
+        if action == "d":
+            self._delete(control.get("d", "a"), image_id)
+            return 0, 0, None
+
+        box_cols, box_rows = int(control.get("c", 0) or 0), int(control.get("r", 0) or 0)
+        if action in ("t", "T"):
+            width, height = int(control.get("s", 0) or 0), int(control.get("v", 0) or 0)
+            if control.get("f") == "100" and control.get("t", "d") == "d":
+                width, height = _png_size(payload)
+            rows = box_rows or self._cells(width, height)[1]
+            if not self._acceptable(width, height, rows if action == "T" else 0, screen_rows):
+                return 0, 0, reply("EINVAL:image too large")
+            image = GraphicImage(width, height)
+            if image_id:
+                self._kitty_images[image_id] = image
+            try:
+                raw = base64.b64decode(payload)
+            except Exception:
+                return 0, 0, reply("EINVAL:bad base64 payload")
+            self._decode(image, decode_kitty, control, raw)
+            if action == "t":
+                return 0, 0, reply("OK")
+        else:
+            image = self._kitty_images.get(image_id)
+            if image is None:
+                return 0, 0, reply("ENOENT:no such image")
+
+        cols, rows = self._cells(image.width, image.height)
+        cols, rows = box_cols or cols, box_rows or rows
+        if not self._acceptable(0, 0, rows, screen_rows):
+            return 0, 0, reply("EINVAL:placement too large")
+        self._place(image, line, col, rows, cols, stretch=bool(box_cols or box_rows))
+        if control.get("C") == "1":
+            return 0, 0, reply("OK")
+        return rows, cols, reply("OK")
+
+    def _delete(self, what: str, image_id: int) -> None:
+        with self._lock:
+            if what in ("i", "I") and image_id:
+                self._drop([p for p in self.placements if p.image is self._kitty_images.get(image_id)])
+                if what == "I":
+                    self._kitty_images.pop(image_id, None)
+            else:
+                if what == "A":
+                    self._kitty_images.clear()
+                self._drop(list(self.placements))
+
+    def _drop(self, placements: List[Placement]) -> None:
+        # Caller holds the lock. Pixels are released once no placement or kitty id keeps them.
+        dropped = {id(p) for p in placements}
+        self.placements = [p for p in self.placements if id(p) not in dropped]
+        alive = {id(p.image) for p in self.placements}
+        alive.update(id(image) for image in self._kitty_images.values())
+        for p in placements:
+            image = p.image
+            if id(image) not in alive and image.pixels is not None:
+                self.nbytes -= image.nbytes
+                image.pixels = None
+                image.nbytes = 0
+
+    def _enforce_budget(self) -> None:
+        with self._lock:
+            if self.nbytes > self.max_bytes:
+                excess = []
+                size = self.nbytes
+                for p in self.placements:
+                    if size <= self.max_bytes:
+                        break
+                    excess.append(p)
+                    size -= p.image.nbytes
+                self._drop(excess)
+
+    def drop_before(self, line: int) -> None:
+        # Images anchored above retained history (or evicted history) go away with it.
+        with self._lock:
+            self._drop([p for p in self.placements if p.line + p.rows <= line])
+
+    def clear_from(self, line: int) -> None:
+        # Erasing the screen removes the images drawn on it.
+        with self._lock:
+            self._drop([p for p in self.placements if p.line + p.rows > line])
+
+    def visible(self, first: int, last: int) -> List[Placement]:
+        with self._lock:
+            return [p for p in self.placements
+                    if p.image.pixels is not None and p.line < last and p.line + p.rows > first]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._kitty_images.clear()
+            self._kitty_chunks = None
+            self._drop(list(self.placements))
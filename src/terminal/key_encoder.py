@@ -0,0 +1,140 @@
+"""xterm keyboard encoding: imgui key events and typed text to the bytes a shell expects."""
+
+from typing import Collection, List, Optional, Sequence
+
+from imgui_bundle import imgui
+
+from src.terminal.screen import (APPLICATION_CURSOR, APPLICATION_KEYPAD, BRACKETED_PASTE,
+                                 MODIFY_OTHER_KEYS)
+
+
+K = imgui.Key
+ESC = "\x1b"
+CSI = "\x1b["
+SS3 = "\x1bO"
+
+# Final byte of the cursor keys: SS3 in application cursor mode (DECCKM), else CSI.
+CURSOR_KEYS = {K.up_arrow: "A", K.down_arrow: "B", K.right_arrow: "C", K.left_arrow: "D",
+               K.home: "H", K.end: "F"}
+# CSI n ~ keys.
+TILDE_KEYS = {K.insert: 2, K.delete: 3, K.page_up: 5, K.page_down: 6,
+              K.f5: 15, K.f6: 17, K.f7: 18, K.f8: 19, K.f9: 20, K.f10: 21, K.f11: 23, K.f12: 24}
+# F1-F4 are SS3 P-S, or CSI 1 ; mod P-S with modifiers.
+FUNCTION_KEYS = {K.f1: "P", K.f2: "Q", K.f3: "R", K.f4: "S"}
+# Application keypad (DECKPAM) final byte and the character the key types otherwise.
+KEYPAD_KEYS = {getattr(K, f"keypad{d}"): ("pqrstuvwxy"[d], str(d)) for d in range(10)}
+KEYPAD_KEYS.update({K.keypad_decimal: ("n", "."), K.keypad_divide: ("o", "/"),
+                    K.keypad_multiply: ("j", "*"), K.keypad_subtract: ("m", "-"),
+                    K.keypad_add: ("k", "+"), K.keypad_equal: ("X", "=")})
+# Printable keys by unshifted character; they arrive as typed text unless Ctrl is held.
+CHAR_KEYS = {getattr(K, c): c for c in "abcdefghijklmnopqrstuvwxyz"}
+CHAR_KEYS.update({getattr(K, f"_{d}"): str(d) for d in range(10)})
+CHAR_KEYS.update({K.space: " ", K.minus: "-", K.equal: "=", K.left_bracket: "[",
+                  K.backslash: "\\", K.right_bracket: "]", K.semicolon: ";", K.apostrophe: "'",
+                  K.comma: ",", K.period: ".", K.slash: "/", K.grave_accent: "`"})
+# xterm's traditional Ctrl codes for non-letter keys.
+CTRL_CHARS = {" ": "\x00", "2": "\x00", "`": "\x00", "3": "\x1b", "[": "\x1b",
+              "4": "\x1c", "\\": "\x1c", "5": "\x1d", "]": "\x1d", "6": "\x1e",
+              "7": "\x1f", "/": "\x1f", "-": "\x1f", "8": "\x7f"}
+
+# Every key the terminal polls each frame.
+ENCODED_KEYS = (list(CURSOR_KEYS) + list(TILDE_KEYS) + list(FUNCTION_KEYS) + list(KEYPAD_KEYS)
+                + list(CHAR_KEYS) + [K.enter, K.keypad_enter, K.tab, K.backspace, K.escape])
+
+
+def modifier_param(shift: bool, alt: bool, ctrl: bool) -> int:
+    return 1 + shift + 2 * alt + 4 * ctrl
+
+
+def modify_other_keys(modes: Collection[int]) -> int:
+    for level in (2, 1):
+        if MODIFY_OTHER_KEYS + level in modes:
+            return level
+    return 0
+
+
+def encode_key(key: int, shift: bool, alt: bool, ctrl: bool, modes: Collection[int]) -> Optional[str]:
+    # None means the key has no sequence of its own (plain typing comes through text).
+    mod = modifier_param(shift, alt, ctrl)
+    other_keys = modify_other_keys(modes)
+    meta = ESC if alt else ""
+
+    if key in CURSOR_KEYS:
+        final = CURSOR_KEYS[key]
+        if mod > 1:
+            return f"{CSI}1;{mod}{final}"
+        return (SS3 if APPLICATION_CURSOR in modes else CSI) + final
+    if key in TILDE_KEYS:
+        code = TILDE_KEYS[key]
+        return f"{CSI}{code};{mod}~" if mod > 1 else f"{CSI}{code}~"
+    if key in FUNCTION_KEYS:
+        final = FUNCTION_KEYS[key]
+        return f"{CSI}1;{mod}{final}" if mod > 1 else SS3 + final
+    if key in KEYPAD_KEYS:
+        if APPLICATION_KEYPAD in modes and mod == 1:
+            return SS3 + KEYPAD_KEYS[key][0]
+        return None
+    if key in (K.enter, K.keypad_enter):
+        if key == K.keypad_enter and APPLICATION_KEYPAD in modes and mod == 1:
+            return SS3 + "M"
+        if other_keys and (shift or ctrl):
+            return f"{CSI}27;{mod};13~"
+        return meta + "\r"
+    if key == K.tab:
+        if other_keys and ctrl:
+            return f"{CSI}27;{mod};9~"
+        return CSI + "Z" if shift else meta + "\t"
+    if key == K.backspace:
+        if other_keys and (shift or ctrl):
+            return f"{CSI}27;{mod};127~"
+        return meta + ("\x08" if ctrl else "\x7f")
+    if key == K.escape:
+        return meta + ESC
+
+    char = CHAR_KEYS.get(key)
+    if char is None:
+        return None
+    # Level 2 reports every modified printable key; level 1 only the Ctrl combinations
+    # that have no traditional control code.
+    if (other_keys == 2 and (ctrl or alt)) or (other_keys == 1 and ctrl and not char.isalpha()
+                                               and char not in CTRL_CHARS):
+        code = ord(char.upper() if shift and char.isalpha() else char)
+        return f"{CSI}27;{mod};{code}~"
+    if not ctrl:
+        return None
+    if char.isalpha():
+        return meta + chr(ord(char) & 0x1f)
+    return meta + CTRL_CHARS.get(char, char)
+
+
+def encode_frame(keys: Sequence[int], chars: Sequence[str], shift: bool, alt: bool, ctrl: bool,
+                 modes: Collection[int]) -> str:
+    # One frame of input. Typed text goes first so "ls" + Enter within a frame stays in order.
+    # Ctrl+Alt with text is AltGr composing a character, not a control combination.
+    altgr = ctrl and alt and bool(chars)
+    sequences: List[str] = []
+    text = list(chars)
+    for key in keys:
+        if altgr and key in CHAR_KEYS:
+            continue
+        sequence = encode_key(key, shift, alt and not altgr, ctrl and not altgr, modes)
+        if sequence is None:
+            continue
+        sequences.append(sequence)
+        # An application keypad key replaces the digit or operator it also typed.
+        if key in KEYPAD_KEYS and KEYPAD_KEYS[key][1] in text:
+            text.remove(KEYPAD_KEYS[key][1])
+
+    if not altgr and (ctrl or (alt and modify_other_keys(modes) == 2)):
+        text = []  # already encoded from the key events
+    elif alt and not altgr:
+        text = [ESC + c for c in text]
+    return "".join(text) + "".join(sequences)
+
+
+def encode_paste(text: str, modes: Collection[int]) -> str:
+    text = text.replace("\r\n", "\r").replace("\n", "\r")
+    if BRACKETED_PASTE not in modes:
+        return text
+    # The pasted text must not be able to end the bracket early.
+    return f"{CSI}200~" + text.replace(f"{CSI}201~", "") + f"{CSI}201~"
@@ -0,0 +1,107 @@
+"""Per-tab index of shell commands built from OSC 133 (FinalTerm) semantic prompt marks."""
+
+from bisect import bisect_left, bisect_right
+from typing import List, Optional, Tuple
+
+
+PROMPT_START = "A"
+COMMAND_START = "B"
+OUTPUT_START = "C"
+COMMAND_END = "D"
+
+
+class Command:
+    # Lines are absolute (counted since the tab started), the same space as
+    # Scrollback.total_appended + screen row, so they survive scrollback trimming.
+    __slots__ = ("prompt_line", "command_line", "output_line", "end_line", "exit_code")
+
+    def __init__(self, prompt_line: int):
+        self.prompt_line = prompt_line
+        self.command_line: Optional[int] = None
+        self.output_line: Optional[int] = None
+        self.end_line: Optional[int] = None
+        self.exit_code: Optional[int] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.end_line is not None
+
+
+class PromptIndex:
+    MAX_COMMANDS = 10000
+
+    def __init__(self):
+        self.commands: List[Command] = []
+        # Prompt lines of self.commands, kept sorted for bisecting.
+        self._starts: List[int] = []
+        self.last_exit_code: Optional[int] = None
+
+    def mark(self, kind: str, line: int, col: int, params: List[str]) -> None:
+        if kind == PROMPT_START:
+            # A prompt above the last one means the screen was cleared and redrawn;
+            # the commands it covered are gone from view.
+            cut = bisect_left(self._starts, line)
+            if cut < len(self._starts):
+                del self.commands[cut:]
+                del self._starts[cut:]
+            current = self.current
+            if current is not None and current.output_line is not None and not current.finished:
+                current.end_line = line if col == 0 else line + 1
+            self.commands.append(Command(line))
+            self._starts.append(line)
+            if len(self.commands) > self.MAX_COMMANDS:
+                del self.commands[:len(self.commands) - self.MAX_COMMANDS]
+                del self._starts[:len(self._starts) - self.MAX_COMMANDS]
+            return
+
+        current = self.current
+        if current is None or current.finished:
+            return
+        if kind == COMMAND_START:
+            current.command_line = line
+        elif kind == OUTPUT_START:
+            current.output_line = line
+        elif kind == COMMAND_END:
+            # A bare D (no command was run, e.g. an empty Enter) carries no exit code.
+            if current.output_line is None:
+                current.output_line = line
+            current.end_line = line if col == 0 else line + 1
+            if params and params[0].lstrip("-").isdigit():
+                current.exit_code = int(params[0])
+                self.last_exit_code = current.exit_code
+
+    @property
+    def current(self) -> Optional[Command]:
+        return self.commands[-1] if self.commands else None
+
+    def prune(self, first_line: int) -> None:
+        # Drop commands whose prompt has scrolled out of retained history.
+        cut = bisect_left(self._starts, first_line)
+        if cut:
+            del self.commands[:cut]
+            del self._starts[:cut]
+
+    def previous(self, line: int) -> Optional[Command]:
+        i = bisect_left(self._starts, line)
+        return self.commands[i - 1] if i else None
+
+    def next(self, line: int) -> Optional[Command]:
+        i = bisect_right(self._starts, line)
+        return self.commands[i] if i < len(self.commands) else None
+
+    def at(self, line: int) -> Optional[Command]:
+        i = bisect_right(self._starts, line)
+        return self.commands[i - 1] if i else None
+
+    def output_range(self, command: Command, live_end: int) -> Optional[Tuple[int, int]]:
+        # Half-open absolute line range of the command's output; a running
+        # command's output extends to live_end.
+        if command.output_line is None:
+            return None
+        stop = command.end_line if command.end_line is not None else live_end
+        return command.output_line, max(command.output_line, stop)
+
+    def clear(self) -> None:
+        self.commands.clear()
+        self._starts.clear()
+        self.last_exit_code = None
@@ -6,7 +6,9 @@ import platform
 import subprocess
 import threading
 import select
-from typing import Optional, Callable
+from typing import Optional, Callable, List
+
+from src.utils.tracing import TRACER
 
 if platform.system() == "Windows":
     from winpty import PtyProcess
@@ -23,25 +25,33 @@ class PtyManager:
         self._lock = threading.Lock()
 
     def spawn(self, cols: int = 80, rows: int = 24, 
-              on_output: Optional[Callable[[bytes], None]] = None) -> int:
+              on_output: Optional[Callable[[bytes], None]] = None,
+              cwd: Optional[str] = None, argv: Optional[List[str]] = None) -> int:
         system = platform.system()
+        if cwd and not os.path.isdir(cwd):
+            cwd = None
         
         if system == "Windows":
-            return self._spawn_windows(cols, rows, on_output)
+            return self._spawn_windows(cols, rows, on_output, cwd, argv)
         else:
-            return self._spawn_unix(cols, rows, on_output)
+            return self._spawn_unix(cols, rows, on_output, cwd, argv)
 
     def _spawn_windows(self, cols: int, rows: int,
-                       on_output: Optional[Callable[[bytes], None]]) -> int:
-        shell = "pwsh"
-        try:
-            subprocess.run(["pwsh", "-Command", "exit"], capture_output=True)
-        except FileNotFoundError:
-            shell = "cmd"
+                       on_output: Optional[Callable[[bytes], None]],
+                       cwd: Optional[str] = None, argv: Optional[List[str]] = None) -> int:
+        if argv:
+            shell = argv
+        else:
+            shell = "pwsh"
+            try:
+                subprocess.run(["pwsh", "-Command", "exit"], capture_output=True)
+            except FileNotFoundError:
+                shell = "cmd"
         
         process = PtyProcess.spawn(
             shell,
             dimensions=(rows, cols),
+            cwd=cwd,
             env=os.environ.copy()
         )
         
@@ -49,6 +59,7 @@ class PtyManager:
         self.processes[pty_id] = {
             "process": process,
             "on_output": on_output,
+            "flowing": self._flow_event(),
             "alive": True
         }
         
@@ -62,10 +73,12 @@ class PtyManager:
         return pty_id
 
     def _spawn_unix(self, cols: int, rows: int,
-                    on_output: Optional[Callable[[bytes], None]]) -> int:
+                    on_output: Optional[Callable[[bytes], None]],
+                    cwd: Optional[str] = None, argv: Optional[List[str]] = None) -> int:
         shell = "/bin/bash"
         if not os.path.exists(shell):
             shell = "/bin/sh"
+        argv = argv or [shell]
         
         master_fd, slave_fd = pty.openpty()
         
@@ -81,8 +94,16 @@ class PtyManager:
             os.dup2(slave_fd, 1)
             os.dup2(slave_fd, 2)
             os.close(slave_fd)
+            if cwd:
+                try:
+                    os.chdir(cwd)
+                except OSError:
+                    pass
             
-            os.execpe(shell, [shell], os.environ.copy())
+            try:
+                os.execvpe(argv[0], argv, os.environ.copy())
+            finally:
+                os._exit(127)
         else:
             os.close(slave_fd)
             
@@ -91,6 +112,7 @@ class PtyManager:
                 "master_fd": master_fd,
                 "pid": pid,
                 "on_output": on_output,
+                "flowing": self._flow_event(),
                 "alive": True
             }
             
@@ -103,6 +125,23 @@ class PtyManager:
             
             return pty_id
 
+    @staticmethod
+    def _flow_event() -> threading.Event:
+        flowing = threading.Event()
+        flowing.set()
+        return flowing
+
+    def pause(self, pty_id: int) -> None:
+        # Flow control: stop reading this PTY until resume().
+        proc_info = self.processes.get(pty_id)
+        if proc_info:
+            proc_info["flowing"].clear()
+
+    def resume(self, pty_id: int) -> None:
+        proc_info = self.processes.get(pty_id)
+        if proc_info:
+            proc_info["flowing"].set()
+
     def _read_windows(self, pty_id: int) -> None:
         proc_info = self.processes.get(pty_id)
         if not proc_info:
@@ -110,12 +149,16 @@ class PtyManager:
         
         process = proc_info["process"]
         on_output = proc_info["on_output"]
+        flowing = proc_info["flowing"]
         
         while proc_info.get("alive", False) and process.isalive():
+            if not flowing.wait(0.1):
+                continue
             try:
                 data = process.read(4096)
                 if data and on_output:
-                    on_output(data.encode("utf-8"))
+                    with TRACER.span("pty.read", "reader"):
+                        on_output(data.encode("utf-8"))
             except Exception:
                 break
         
@@ -128,14 +171,20 @@ class PtyManager:
         
         master_fd = proc_info["master_fd"]
         on_output = proc_info["on_output"]
+        flowing = proc_info["flowing"]
         
         while proc_info.get("alive", False):
+            # While paused the master isn't drained, so the child blocks once the
+            # kernel's PTY buffer fills.
+            if not flowing.wait(0.1):
+                continue
             try:
                 r, _, _ = select.select([master_fd], [], [], 0.1)
                 if r:
-                    data = os.read(master_fd, 4096)
-                    if data and on_output:
-                        on_output(data)
+                    with TRACER.span("pty.read", "reader"):
+                        data = os.read(master_fd, 4096)
+                        if data and on_output:
+                            on_output(data)
             except Exception:
                 break
         
@@ -184,6 +233,16 @@ class PtyManager:
                 except Exception:
                     pass
 
+    def get_cwd(self, pty_id: int) -> Optional[str]:
+        proc_info = self.processes.get(pty_id)
+        if not proc_info or "pid" not in proc_info:
+            return None
+        # Only Linux exposes another process's cwd cheaply.
+        try:
+            return os.readlink(f"/proc/{proc_info['pid']}/cwd")
+        except OSError:
+            return None
+
     def close(self, pty_id: int) -> None:
         with self._lock:
             proc_info = self.processes.get(pty_id)
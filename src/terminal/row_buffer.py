@@ -0,0 +1,116 @@
+"""Circular screen-row storage: O(1) full-screen scrolls, slice rotation for scroll regions."""
+
+from typing import Any, Dict, Iterator, List, Optional
+
+from pyte.screens import StaticDefaultDict
+
+
+class RowBuffer:
+    # Drop-in for pyte's defaultdict of rows. Logical row y lives at
+    # _rows[(_head + y) % len(_rows)]; None is a row that was never written.
+
+    def __init__(self, lines: int, default_char: Any):
+        self.default_char = default_char
+        self._rows: List[Optional[StaticDefaultDict]] = [None] * lines
+        self._head = 0
+        # Rows outside the grid are rare (pyte never addresses them); keep them aside.
+        self._extra: Dict[int, StaticDefaultDict] = {}
+
+    def _slot(self, y: int) -> int:
+        return (self._head + y) % len(self._rows)
+
+    def _in_grid(self, y: int) -> bool:
+        return 0 <= y < len(self._rows)
+
+    def __getitem__(self, y: int) -> StaticDefaultDict:
+        if not self._in_grid(y):
+            row = self._extra.get(y)
+            if row is None:
+                row = self._extra[y] = StaticDefaultDict(self.default_char)
+            return row
+        slot = (self._head + y) % len(self._rows)
+        row = self._rows[slot]
+        if row is None:
+            row = self._rows[slot] = StaticDefaultDict(self.default_char)
+        return row
+
+    def __setitem__(self, y: int, row: StaticDefaultDict) -> None:
+        if not self._in_grid(y):
+            self._extra[y] = row
+            return
+        self._rows[self._slot(y)] = row
+
+    def __contains__(self, y: int) -> bool:
+        if not self._in_grid(y):
+            return y in self._extra
+        return self._rows[self._slot(y)] is not None
+
+    def __iter__(self) -> Iterator[int]:
+        for y in range(len(self._rows)):
+            if self._rows[self._slot(y)] is not None:
+                yield y
+        yield from list(self._extra)
+
+    def __len__(self) -> int:
+        return sum(1 for row in self._rows if row is not None) + len(self._extra)
+
+    def keys(self) -> Iterator[int]:
+        return iter(self)
+
+    def values(self) -> List[StaticDefaultDict]:
+        return [row for row in self._rows if row is not None] + list(self._extra.values())
+
+    def items(self) -> List[tuple]:
+        return [(y, self[y]) for y in self]
+
+    def pop(self, y: int, default: Any = None) -> Any:
+        if not self._in_grid(y):
+            return self._extra.pop(y, default)
+        slot = self._slot(y)
+        row = self._rows[slot]
+        self._rows[slot] = None
+        return default if row is None else row
+
+    def clear(self) -> None:
+        self._rows = [None] * len(self._rows)
+        self._head = 0
+        self._extra.clear()
+
+    def _normalize(self) -> None:
+        if self._head:
+            self._rows = self._rows[self._head:] + self._rows[:self._head]
+            self._head = 0
+
+    def scroll_up(self, top: int, bottom: int) -> Optional[StaticDefaultDict]:
+        # Row `top` leaves the region (returned by reference); a blank row enters at `bottom`.
+        if top == 0 and bottom == len(self._rows) - 1:
+            removed = self._rows[self._head]
+            self._rows[self._head] = None
+            self._head = (self._head + 1) % len(self._rows)
+            return removed
+        self._normalize()
+        rows = self._rows
+        removed = rows[top]
+        rows[top:bottom + 1] = rows[top + 1:bottom + 1] + [None]
+        return removed
+
+    def scroll_down(self, top: int, bottom: int) -> Optional[StaticDefaultDict]:
+        if top == 0 and bottom == len(self._rows) - 1:
+            self._head = (self._head - 1) % len(self._rows)
+            removed = self._rows[self._head]
+            self._rows[self._head] = None
+            return removed
+        self._normalize()
+        rows = self._rows
+        removed = rows[bottom]
+        rows[top:bottom + 1] = [None] + rows[top:bottom]
+        return removed
+
+    def resize(self, lines: int) -> None:
+        self._normalize()
+        if lines < len(self._rows):
+            del self._rows[lines:]
+        else:
+            self._rows.extend([None] * (lines - len(self._rows)))
+        # Stray rows outside the grid are dropped rather than resurfacing on a later grow.
+        self._extra.clear()
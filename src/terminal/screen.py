@@ -0,0 +1,261 @@
+"""pyte screen subclass: scrollback capture, alternate screen and table-driven drawing."""
+
+import unicodedata
+from typing import Any, Callable, Optional, Tuple
+
+import pyte
+from pyte import modes as mo
+from pyte.screens import Char, Margins, Savepoint, StaticDefaultDict
+
+from src.terminal.char_width import ZWJ, char_width, get_table, is_regional_indicator
+from src.terminal.row_buffer import RowBuffer
+from src.terminal.scrollback import Scrollback
+
+
+# DECSET codes for the alternate screen: 1049 also saves/restores the cursor and
+# clears on entry, 1047 clears on exit, 47 does neither.
+ALTERNATE_SCREEN_MODES = (1049, 1047, 47)
+
+# Keyboard modes live in screen.mode (pyte stores private DECSET n as n << 5) so they
+# travel with snapshots and session diffs like any other mode.
+APPLICATION_CURSOR = 1 << 5  # DECCKM
+APPLICATION_KEYPAD = 66 << 5  # DECNKM; DECKPAM (ESC =) sets the same state
+BRACKETED_PASTE = 2004 << 5
+# xterm modifyOtherKeys (CSI > 4 ; n m) has no DECSET number; its levels sit above them.
+MODIFY_OTHER_KEYS = 1 << 24
+
+
+class BrutalScreen(pyte.Screen):
+    def __init__(self, columns: int, lines: int, scrollback: Optional[Scrollback] = None):
+        self.scrollback = scrollback
+        # Called when the primary screen is erased (ED 2/3), e.g. to drop images drawn on it.
+        self.on_erase: Optional[Callable[[], None]] = None
+        super().__init__(columns, lines)
+
+    def reset(self) -> None:
+        if getattr(self, "in_alternate", False):
+            self.buffer = self._primary_buffer
+        self.in_alternate = False
+        self._primary_buffer = None
+        self._alt_savepoint = None
+        self._resized_in_alternate = False
+        super().reset()
+        if not isinstance(self.buffer, RowBuffer):
+            self.buffer = RowBuffer(self.lines, self.default_char)
+        self._alt_buffer = RowBuffer(self.lines, self.default_char)
+
+    def set_mode(self, *modes: int, **kwargs: Any) -> None:
+        super().set_mode(*modes, **kwargs)
+        if kwargs.get("private"):
+            for mode in modes:
+                if mode in ALTERNATE_SCREEN_MODES:
+                    self._enter_alternate(mode)
+
+    def reset_mode(self, *modes: int, **kwargs: Any) -> None:
+        super().reset_mode(*modes, **kwargs)
+        if kwargs.get("private"):
+            for mode in modes:
+                if mode in ALTERNATE_SCREEN_MODES:
+                    self._leave_alternate(mode)
+
+    def _enter_alternate(self, mode: int) -> None:
+        if self.in_alternate:
+            return
+        if mode == 1049:
+            self.save_cursor()
+            self._alt_savepoint = self.savepoints.pop()
+            self._alt_buffer.clear()
+        # Swapping references keeps the primary rows (and their scrollback links) untouched.
+        self._primary_buffer, self.buffer = self.buffer, self._alt_buffer
+        self.in_alternate = True
+        self.dirty.update(range(self.lines))
+
+    def _leave_alternate(self, mode: int) -> None:
+        if not self.in_alternate:
+            return
+        alternate = self.buffer
+        self.buffer, self._primary_buffer = self._primary_buffer, None
+        self.in_alternate = False
+        if mode in (1049, 1047):
+            alternate.clear()
+
+        if self._resized_in_alternate:
+            # pyte only trimmed the grid that was live during the resize.
+            self._resized_in_alternate = False
+            for line in self.buffer.values():
+                for x in [x for x in line if x >= self.columns]:
+                    del line[x]
+
+        if mode == 1049 and self._alt_savepoint is not None:
+            self.savepoints.append(self._alt_savepoint)
+            self._alt_savepoint = None
+            self.restore_cursor()
+        self.dirty.update(range(self.lines))
+
+    def alternate_state(self) -> Optional[Tuple[RowBuffer, Optional[Savepoint]]]:
+        # What a snapshot needs beyond the live grid: the hidden primary rows and the
+        # cursor 1049 saved on entry. None on the primary screen.
+        if not self.in_alternate:
+            return None
+        return self._primary_buffer, self._alt_savepoint
+
+    def restore_alternate(self, savepoint: Optional[Savepoint]) -> RowBuffer:
+        # Snapshot decode: the grid filled so far is the alternate screen. Returns the
+        # primary grid for the caller to fill.
+        self._alt_buffer, self._primary_buffer = self.buffer, self._alt_buffer
+        self._alt_savepoint = savepoint
+        self.in_alternate = True
+        return self._primary_buffer
+
+    def resize(self, lines: Optional[int] = None, columns: Optional[int] = None) -> None:
+        if self.in_alternate:
+            self._resized_in_alternate = True
+        super().resize(lines, columns)
+        self.buffer.resize(self.lines)
+        (self._primary_buffer if self.in_alternate else self._alt_buffer).resize(self.lines)
+
+    def set_keypad_application(self, enabled: bool) -> None:
+        if enabled:
+            self.mode.add(APPLICATION_KEYPAD)
+        else:
+            self.mode.discard(APPLICATION_KEYPAD)
+
+    def set_modify_other_keys(self, level: int) -> None:
+        self.mode.difference_update((MODIFY_OTHER_KEYS + 1, MODIFY_OTHER_KEYS + 2))
+        if level in (1, 2):
+            self.mode.add(MODIFY_OTHER_KEYS + level)
+
+    def erase_in_display(self, how: int = 0, *args: Any, **kwargs: Any) -> None:
+        super().erase_in_display(how, *args, **kwargs)
+        if how in (2, 3) and not self.in_alternate and self.on_erase is not None:
+            self.on_erase()
+
+    def index(self) -> None:
+        top, bottom = self.margins or Margins(0, self.lines - 1)
+        if self.cursor.y != bottom:
+            self.cursor_down()
+            return
+        self.dirty.update(range(self.lines))
+        removed = self.buffer.scroll_up(top, bottom)
+        # Full-screen apps scrolling the alternate screen never feed the shell's history.
+        if self.scrollback is not None and not self.in_alternate and top == 0:
+            # The row object itself moves to scrollback; nothing is copied.
+            if removed is None:
+                removed = StaticDefaultDict(self.default_char)
+            self.scrollback.append(removed)
+
+    def reverse_index(self) -> None:
+        top, bottom = self.margins or Margins(0, self.lines - 1)
+        if self.cursor.y != top:
+            self.cursor_up()
+            return
+        self.dirty.update(range(self.lines))
+        self.buffer.scroll_down(top, bottom)
+
+    @property
+    def display(self) -> list:
+        # pyte asserts every cell is one base char plus zero-width marks, which ZWJ
+        # clusters are not; the first codepoint decides the cell width instead.
+        def render(line):
+            skip_stub = False
+            for x in range(self.columns):
+                if skip_stub:
+                    skip_stub = False
+                    continue
+                data = line[x].data
+                skip_stub = bool(data) and char_width(ord(data[0])) == 2
+                yield data
+
+        return ["".join(render(self.buffer[y])) for y in range(self.lines)]
+
+    def draw(self, data: str) -> None:
+        # Same cursor/wrap/insert semantics as pyte.Screen.draw, but widths come from the
+        # precomputed table, printable ASCII skips the lookup entirely, and zero-width
+        # characters extend the previous cell instead of aborting the rest of the string.
+        data = data.translate(self.g1_charset if self.charset else self.g0_charset)
+        stage1, stage2 = get_table()
+
+        cursor = self.cursor
+        columns = self.columns
+        autowrap = mo.DECAWM in self.mode
+        insert = mo.IRM in self.mode
+        make = Char._make
+        style = tuple(cursor.attrs)[1:]
+        line = self.buffer[cursor.y]
+        # A read can end right after a ZWJ; the next read still joins that cluster.
+        joining = self._ends_with_zwj()
+
+        for char in data:
+            cp = ord(char)
+            if 0x20 <= cp < 0x7F:
+                width = 1
+            elif stage1 is not None and cp < 0x110000:
+                width = stage2[(stage1[cp >> 8] << 8) | (cp & 0xFF)] - 1
+            else:
+                width = char_width(cp)
+
+            # Grapheme clusters: anything after a ZWJ, zero-width marks (combining,
+            # variation selectors, skin-tone modifiers) and the second regional
+            # indicator of a flag all stay in the previous cell.
+            if joining or width == 0 or (is_regional_indicator(cp) and self._pending_flag()):
+                self._extend_previous(char)
+                joining = cp == ZWJ
+                continue
+            if width < 0:
+                continue
+
+            if cursor.x == columns:
+                if autowrap:
+                    self.dirty.add(cursor.y)
+                    self.carriage_return()
+                    self.linefeed()
+                    line = self.buffer[cursor.y]
+                else:
+                    cursor.x -= width
+
+            if insert:
+                self.insert_characters(width)
+
+            line[cursor.x] = make((char,) + style)
+            if width == 2 and cursor.x + 1 < columns:
+                line[cursor.x + 1] = make(("",) + style)
+            cursor.x = min(cursor.x + width, columns)
+
+        self.dirty.add(cursor.y)
+
+    def _previous_cell(self) -> Optional[tuple]:
+        x, y = self.cursor.x, self.cursor.y
+        if x == 0:
+            if y == 0:
+                return None
+            x, y = self.columns, y - 1
+        line = self.buffer[y]
+        x -= 1
+        # Step back over the stub half of a wide character.
+        if x > 0 and line[x].data == "":
+            x -= 1
+        return y, x
+
+    def _ends_with_zwj(self) -> bool:
+        cell = self._previous_cell()
+        return cell is not None and self.buffer[cell[0]][cell[1]].data.endswith(chr(ZWJ))
+
+    def _pending_flag(self) -> bool:
+        cell = self._previous_cell()
+        if cell is None:
+            return False
+        data = self.buffer[cell[0]][cell[1]].data
+        return len(data) == 1 and is_regional_indicator(ord(data))
+
+    def _extend_previous(self, char: str) -> None:
+        cell = self._previous_cell()
+        if cell is None:
+            return
+        y, x = cell
+        line = self.buffer[y]
+        last = line[x]
+        data = last.data + char
+        if unicodedata.combining(char):
+            data = unicodedata.normalize("NFC", data)
+        line[x] = last._replace(data=data)
+        self.dirty.add(y)
@@ -0,0 +1,140 @@
+"""Chunked scrollback storage with O(1) random access by line index and compressible old chunks."""
+
+import threading
+from typing import Any, List, Optional, Tuple, Union
+
+from src.terminal.snapshot import LineBlock, encode_lines
+
+
+# Rough CPython cost of a stored row: the dict itself plus one Char per written cell.
+ROW_BYTES = 300
+CELL_BYTES = 160
+
+
+def estimate_line_bytes(line: Any) -> int:
+    return ROW_BYTES + CELL_BYTES * len(line)
+
+
+class Scrollback:
+    CHUNK_LINES = 4096
+
+    def __init__(self, max_lines: int = 100_000):
+        self.max_lines = max_lines
+        # A full chunk may be swapped for its compressed encoding (bytes).
+        self._chunks: List[Union[List[Any], bytes]] = []
+        self._chunk_bytes: List[int] = []
+        self._head = 0
+        self._count = 0
+        self.total_appended = 0
+        self.nbytes = 0
+        self.default_char: Any = None
+        self._decoded: Optional[Tuple[bytes, LineBlock]] = None
+        self._lock = threading.Lock()
+
+    def append(self, line: Any) -> None:
+        size = estimate_line_bytes(line)
+        with self._lock:
+            if not self._chunks or len(self._chunks[-1]) >= self.CHUNK_LINES:
+                self._chunks.append([])
+                self._chunk_bytes.append(0)
+            self._chunks[-1].append(line)
+            self._chunk_bytes[-1] += size
+            self.nbytes += size
+            self._count += 1
+            self.total_appended += 1
+
+            # Old lines are hidden one at a time and freed a whole chunk at a time,
+            # so every chunk but the last stays full and indexing stays O(1).
+            if self._count - self._head > self.max_lines:
+                self._head += 1
+                if self._head >= self.CHUNK_LINES:
+                    self._chunks.pop(0)
+                    self.nbytes -= self._chunk_bytes.pop(0)
+                    self._count -= self.CHUNK_LINES
+                    self._head -= self.CHUNK_LINES
+
+    @property
+    def first_index(self) -> int:
+        # Absolute line number (since the tab started) of the oldest retained line.
+        return self.total_appended - len(self)
+
+    def __len__(self) -> int:
+        return self._count - self._head
+
+    def __getitem__(self, index: int) -> Any:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("scrollback index out of range")
+        index += self._head
+        chunk = self._chunks[index // self.CHUNK_LINES]
+        if isinstance(chunk, bytes):
+            chunk = self._decode(chunk)
+        return chunk[index % self.CHUNK_LINES]
+
+    def _decode(self, blob: bytes) -> LineBlock:
+        # Scrolling through old history touches one chunk at a time; keep the last one open.
+        decoded = self._decoded
+        if decoded is None or decoded[0] is not blob:
+            decoded = self._decoded = (blob, LineBlock(blob, self.default_char))
+        return decoded[1]
+
+    def lines(self, start: int, stop: int) -> List[Any]:
+        with self._lock:
+            stop = min(stop, len(self))
+            return [self[i] for i in range(max(start, 0), stop)]
+
+    def compressible_bytes(self, keep_lines: int) -> int:
+        # Estimated size of the full, uncompressed chunks older than the newest keep_lines.
+        with self._lock:
+            cut = self._compress_limit(keep_lines)
+            return sum(size for chunk, size in zip(self._chunks[:cut], self._chunk_bytes)
+                       if not isinstance(chunk, bytes))
+
+    def _compress_limit(self, keep_lines: int) -> int:
+        return max(0, min(len(self._chunks) - 1,
+                          (self._count - keep_lines) // self.CHUNK_LINES))
+
+    def compress(self, default_char: Any, keep_lines: int) -> int:
+        # Encodes old chunks outside the lock (full chunks never change), then swaps them in
+        # if they are still retained. Returns the estimated number of bytes released.
+        with self._lock:
+            self.default_char = default_char
+            cut = self._compress_limit(keep_lines)
+            pending = [chunk for chunk in self._chunks[:cut] if not isinstance(chunk, bytes)]
+
+        freed = 0
+        for chunk in pending:
+            blob = encode_lines(chunk, default_char)
+            with self._lock:
+                for i, current in enumerate(self._chunks):
+                    if current is chunk:
+                        self._chunks[i] = blob
+                        freed += self._chunk_bytes[i] - len(blob)
+                        self.nbytes -= self._chunk_bytes[i] - len(blob)
+                        self._chunk_bytes[i] = len(blob)
+                        break
+        return freed
+
+    def prepend(self, history: "Scrollback") -> None:
+        # Puts restored history in front of the lines appended since. total_appended is
+        # left alone, so absolute line numbers handed out meanwhile stay valid.
+        with self._lock:
+            for i in range(len(self)):
+                history.append(self[i])
+            self._chunks = history._chunks
+            self._chunk_bytes = history._chunk_bytes
+            self._head = history._head
+            self._count = history._count
+            self.nbytes = history.nbytes
+            self._decoded = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._chunks = []
+            self._chunk_bytes = []
+            self._head = 0
+            self._count = 0
+            self.total_appended = 0
+            self.nbytes = 0
+            self._decoded = None
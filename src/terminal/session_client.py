@@ -0,0 +1,186 @@
+"""GUI-side connection to the session daemon; stands in for PtyManager on attached tabs."""
+
+import json
+import queue
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from src.terminal import session_protocol as proto
+
+
+FrameHandler = Callable[[int, bytes], None]
+
+
+class SessionClient:
+    CONNECT_TIMEOUT = 5.0
+    REPLY_TIMEOUT = 5.0
+
+    def __init__(self, sock: socket.socket):
+        self._sock = sock
+        self._send_lock = threading.Lock()
+        self._request_lock = threading.Lock()
+        self._handlers: Dict[int, FrameHandler] = {}
+        self._replies: "queue.Queue" = queue.Queue()
+        self.connected = True
+
+        self._reader = threading.Thread(target=self._read_loop, name="brutal-session-client",
+                                        daemon=True)
+        self._reader.start()
+
+    @classmethod
+    def connect(cls, socket_path: Optional[str] = None,
+                spawn: bool = False) -> Optional["SessionClient"]:
+        if not hasattr(socket, "AF_UNIX"):
+            print("Session daemon needs Unix sockets; running shells in-process.")
+            return None
+
+        path = Path(socket_path) if socket_path else proto.default_socket_path()
+        sock = cls._try_connect(path)
+        if sock is None and spawn:
+            cls._spawn_daemon(path)
+            deadline = time.monotonic() + cls.CONNECT_TIMEOUT
+            while sock is None and time.monotonic() < deadline:
+                time.sleep(0.1)
+                sock = cls._try_connect(path)
+
+        if sock is None:
+            print(f"Session daemon unavailable at {path}; running shells in-process.")
+            return None
+        return cls(sock)
+
+    @staticmethod
+    def _try_connect(path: Path) -> Optional[socket.socket]:
+        if not path.exists():
+            return None
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(str(path))
+            return sock
+        except OSError:
+            sock.close()
+            return None
+
+    @staticmethod
+    def _spawn_daemon(path: Path) -> None:
+        main_py = Path(__file__).resolve().parents[2] / "main.py"
+        try:
+            subprocess.Popen(
+                [sys.executable, str(main_py), "--daemon", str(path)],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True,
+            )
+        except Exception as e:
+            print(f"Failed to start session daemon: {e}")
+
+    def _read_loop(self) -> None:
+        try:
+            while True:
+                frame = proto.recv_frame(self._sock)
+                if frame is None:
+                    break
+                kind, session_id, payload = frame
+                if kind in (proto.SESSIONS, proto.CREATED):
+                    self._replies.put(frame)
+                    continue
+                handler = self._handlers.get(session_id)
+                if kind == proto.EXITED:
+                    self._handlers.pop(session_id, None)
+                if handler:
+                    try:
+                        handler(kind, payload)
+                    except Exception as e:
+                        print(f"Session {session_id} update error: {e}")
+        except OSError:
+            pass
+        self.connected = False
+        self._replies.put(None)
+
+    def _send(self, kind: int, session_id: int = 0, payload: bytes = b"") -> bool:
+        if not self.connected:
+            return False
+        try:
+            proto.send_frame(self._sock, self._send_lock, kind, session_id, payload)
+            return True
+        except OSError as e:
+            print(f"Session daemon connection lost: {e}")
+            self.connected = False
+            return False
+
+    def _request(self, kind: int, reply_kind: int, payload: bytes = b"") -> Optional[tuple]:
+        with self._request_lock:
+            # A reply that arrived after an earlier request timed out must not answer this one.
+            while True:
+                try:
+                    self._replies.get_nowait()
+                except queue.Empty:
+                    break
+            if not self._send(kind, 0, payload):
+                return None
+            deadline = time.monotonic() + self.REPLY_TIMEOUT
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                try:
+                    reply = self._replies.get(timeout=remaining)
+                except queue.Empty:
+                    return None
+                if reply is None or reply[0] == reply_kind:
+                    return reply
+
+    def list_sessions(self) -> List[dict]:
+        reply = self._request(proto.LIST, proto.SESSIONS)
+        if not reply:
+            return []
+        return json.loads(reply[2].decode("utf-8"))
+
+    def spawn(self, cols: int = 80, rows: int = 24,
+              on_output: Optional[FrameHandler] = None,
+              cwd: Optional[str] = None) -> Optional[int]:
+        payload = struct.pack("<HH", cols, rows) + (cwd or "").encode("utf-8")
+        reply = self._request(proto.CREATE, proto.CREATED, payload)
+        if not reply:
+            return None
+        session_id = reply[1]
+        if on_output:
+            self.attach(session_id, on_output)
+        return session_id
+
+    def attach(self, session_id: int, on_frame: FrameHandler, history_mark: int = 0) -> None:
+        self._handlers[session_id] = on_frame
+        self._send(proto.ATTACH, session_id, struct.pack("<Q", history_mark))
+
+    def detach(self, session_id: int) -> None:
+        self._handlers.pop(session_id, None)
+        self._send(proto.DETACH, session_id)
+
+    def write(self, session_id: int, data: bytes) -> None:
+        self._send(proto.INPUT, session_id, data)
+
+    def resize(self, session_id: int, cols: int, rows: int) -> None:
+        self._send(proto.RESIZE, session_id, struct.pack("<HH", cols, rows))
+
+    def close(self, session_id: int) -> None:
+        self._handlers.pop(session_id, None)
+        self._send(proto.CLOSE, session_id)
+
+    def disconnect(self) -> None:
+        # Sessions keep running in the daemon; only this connection goes away.
+        self.connected = False
+        self._handlers.clear()
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+
+    def cleanup(self) -> None:
+        self.disconnect()
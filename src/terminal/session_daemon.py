@@ -0,0 +1,274 @@
+"""Headless session daemon: owns the shells and parsers, serves screen diffs over a Unix socket."""
+
+import json
+import os
+import signal
+import socket
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.terminal import session_protocol as proto
+from src.terminal.char_width import load_width_table
+from src.terminal.pty_manager import PtyManager
+from src.terminal.scrollback import Scrollback
+from src.terminal.snapshot import encode_diff
+from src.terminal.vt100_parser import VT100Parser
+from src.utils.config import Config
+from src.utils.output_logger import OutputLog, OutputLogger
+
+
+class _Connection:
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.send_lock = threading.Lock()
+        self.alive = True
+
+    def send(self, kind: int, session_id: int = 0, payload: bytes = b"") -> bool:
+        if not self.alive:
+            return False
+        try:
+            proto.send_frame(self.sock, self.send_lock, kind, session_id, payload)
+            return True
+        except OSError:
+            self.alive = False
+            return False
+
+
+class _Session:
+    def __init__(self, session_id: int, cols: int, rows: int, scrollback_lines: int):
+        self.id = session_id
+        self.parser = VT100Parser(cols, rows, scrollback=Scrollback(scrollback_lines))
+        self.pty_id: Optional[int] = None
+        self.created = time.time()
+        self.lock = threading.Lock()
+        self.log: Optional[OutputLog] = None
+        # Attached connection -> absolute scrollback line count it has already received.
+        self.clients: Dict[_Connection, int] = {}
+
+    def feed(self, data: bytes) -> None:
+        if self.log:
+            self.log.write(data)
+        with self.lock:
+            self.parser.feed(data)
+
+    def history_since(self, mark: int) -> List:
+        scrollback = self.parser.scrollback
+        start = max(mark, scrollback.first_index) - scrollback.first_index
+        return scrollback.lines(start, len(scrollback))
+
+    def info(self) -> dict:
+        screen = self.parser.screen
+        return {
+            "id": self.id,
+            "cols": screen.columns,
+            "rows": screen.lines,
+            "title": screen.title,
+            "created": self.created,
+        }
+
+
+class SessionDaemon:
+    FLUSH_INTERVAL = 1 / 60
+    ACCEPT_TIMEOUT = 0.5
+
+    def __init__(self, socket_path: Optional[str] = None, config: Optional[Config] = None):
+        self.socket_path = Path(socket_path) if socket_path else proto.default_socket_path()
+        self.config = config or Config()
+        self.pty_manager = PtyManager()
+        self.output_logger: Optional[OutputLogger] = None
+        if self.config["log_output"]:
+            self.output_logger = OutputLogger.from_config(self.config)
+        self.sessions: Dict[int, _Session] = {}
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._running = False
+
+    def serve_forever(self) -> None:
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.socket_path.exists():
+            if self._socket_in_use():
+                raise RuntimeError(f"Session daemon already running at {self.socket_path}")
+            self.socket_path.unlink()
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(self.socket_path))
+        os.chmod(self.socket_path, 0o600)
+        server.listen(8)
+        server.settimeout(self.ACCEPT_TIMEOUT)
+
+        self._running = True
+        threading.Thread(target=self._flush_loop, name="brutal-sessiond-flush", daemon=True).start()
+        print(f"Session daemon listening on {self.socket_path}")
+
+        try:
+            while self._running:
+                try:
+                    sock, _ = server.accept()
+                except socket.timeout:
+                    continue
+                sock.settimeout(None)
+                threading.Thread(target=self._serve_client, args=(sock,), daemon=True).start()
+        finally:
+            self._running = False
+            server.close()
+            try:
+                self.socket_path.unlink()
+            except OSError:
+                pass
+            self.pty_manager.cleanup()
+            if self.output_logger:
+                self.output_logger.shutdown()
+
+    def stop(self) -> None:
+        self._running = False
+
+    def _socket_in_use(self) -> bool:
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(str(self.socket_path))
+            return True
+        except OSError:
+            return False
+        finally:
+            probe.close()
+
+    def _create_session(self, cols: int, rows: int, cwd: Optional[str] = None) -> _Session:
+        with self._lock:
+            session = _Session(self._next_id, cols, rows, self.config["scrollback_lines"])
+            self._next_id += 1
+        if self.output_logger:
+            session.log = self.output_logger.open(f"session{session.id}")
+        # Registered only once the shell exists, so the flush loop never sees a pty-less session.
+        session.pty_id = self.pty_manager.spawn(cols=cols, rows=rows, on_output=session.feed,
+                                               cwd=cwd)
+        with self._lock:
+            self.sessions[session.id] = session
+        return session
+
+    def _end_session(self, session: _Session) -> None:
+        with self._lock:
+            if self.sessions.pop(session.id, None) is None:
+                return
+        if session.pty_id is not None:
+            self.pty_manager.close(session.pty_id)
+        if session.log:
+            session.log.close()
+        with session.lock:
+            clients = list(session.clients)
+            session.clients.clear()
+        for client in clients:
+            client.send(proto.EXITED, session.id)
+
+    def _serve_client(self, sock: socket.socket) -> None:
+        client = _Connection(sock)
+        try:
+            while client.alive:
+                frame = proto.recv_frame(sock)
+                if frame is None:
+                    break
+                self._dispatch(client, *frame)
+        except Exception as e:
+            print(f"Session client error: {e}")
+        finally:
+            client.alive = False
+            for session in list(self.sessions.values()):
+                with session.lock:
+                    session.clients.pop(client, None)
+            sock.close()
+
+    def _dispatch(self, client: _Connection, kind: int, session_id: int, payload: bytes) -> None:
+        if kind == proto.LIST:
+            infos = [s.info() for s in list(self.sessions.values())]
+            client.send(proto.SESSIONS, 0, json.dumps(infos).encode("utf-8"))
+            return
+        if kind == proto.CREATE:
+            cols, rows = struct.unpack_from("<HH", payload)
+            cwd = payload[4:].decode("utf-8") or None
+            session = self._create_session(cols, rows, cwd)
+            client.send(proto.CREATED, session.id)
+            return
+
+        session = self.sessions.get(session_id)
+        if session is None:
+            client.send(proto.EXITED, session_id)
+            return
+
+        if kind == proto.ATTACH:
+            (mark,) = struct.unpack("<Q", payload)
+            with session.lock:
+                screen = session.parser.screen
+                total = session.parser.scrollback.total_appended
+                history = encode_diff(screen, (), session.history_since(mark), total)
+                snapshot = proto.pack_snapshot(session.parser.snapshot(), history)
+                session.clients[client] = total
+            client.send(proto.SNAPSHOT, session.id, snapshot)
+        elif kind == proto.DETACH:
+            with session.lock:
+                session.clients.pop(client, None)
+        elif kind == proto.INPUT:
+            self.pty_manager.write(session.pty_id, payload)
+        elif kind == proto.RESIZE:
+            cols, rows = struct.unpack("<HH", payload)
+            with session.lock:
+                session.parser.resize(cols, rows)
+            self.pty_manager.resize(session.pty_id, cols, rows)
+        elif kind == proto.CLOSE:
+            self._end_session(session)
+
+    def _flush_loop(self) -> None:
+        while self._running:
+            time.sleep(self.FLUSH_INTERVAL)
+            for session in list(self.sessions.values()):
+                try:
+                    self._flush(session)
+                except Exception as e:
+                    print(f"Session {session.id} flush error: {e}")
+
+    def _flush(self, session: _Session) -> None:
+        proc_info = self.pty_manager.processes.get(session.pty_id)
+        if not proc_info or not proc_info.get("alive"):
+            self._end_session(session)
+            return
+
+        sends = []
+        with session.lock:
+            screen = session.parser.screen
+            total = session.parser.scrollback.total_appended
+            if not screen.dirty and all(mark == total for mark in session.clients.values()):
+                return
+            rows = sorted(screen.dirty)
+            screen.dirty.clear()
+
+            # Clients are almost always at the same history mark, so one encode usually serves all.
+            payloads: Dict[int, bytes] = {}
+            for client, mark in session.clients.items():
+                payload = payloads.get(mark)
+                if payload is None:
+                    payload = encode_diff(screen, rows, session.history_since(mark), total)
+                    payloads[mark] = payload
+                session.clients[client] = total
+                sends.append((client, payload))
+
+        for client, payload in sends:
+            if not client.send(proto.DIFF, session.id, payload):
+                with session.lock:
+                    session.clients.pop(client, None)
+
+
+def run_daemon(socket_path: Optional[str] = None) -> None:
+    config = Config()
+    load_width_table()
+    daemon = SessionDaemon(socket_path or config.get("session_socket"), config)
+
+    # Reap exited shells automatically; PtyManager only kills them.
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop())
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
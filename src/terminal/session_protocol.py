@@ -0,0 +1,71 @@
+"""Wire format shared by the session daemon and its GUI clients."""
+
+import socket
+import struct
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+
+
+# type, session id, payload length
+FRAME = struct.Struct("<BII")
+
+# Client -> daemon
+LIST = 1
+CREATE = 2
+ATTACH = 3
+DETACH = 4
+INPUT = 5
+RESIZE = 6
+CLOSE = 7
+
+# Daemon -> client
+SESSIONS = 16
+CREATED = 17
+SNAPSHOT = 18
+DIFF = 19
+EXITED = 20
+
+_SNAPSHOT_PREFIX = struct.Struct("<I")
+
+
+def default_socket_path() -> Path:
+    return Path.home() / ".brutal" / "sessiond.sock"
+
+
+def send_frame(sock: socket.socket, lock: threading.Lock, kind: int,
+               session_id: int = 0, payload: bytes = b"") -> None:
+    with lock:
+        sock.sendall(FRAME.pack(kind, session_id, len(payload)) + payload)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_frame(sock: socket.socket) -> Optional[Tuple[int, int, bytes]]:
+    header = _recv_exact(sock, FRAME.size)
+    if header is None:
+        return None
+    kind, session_id, length = FRAME.unpack(header)
+    payload = _recv_exact(sock, length) if length else b""
+    if payload is None:
+        return None
+    return kind, session_id, payload
+
+
+def pack_snapshot(screen_blob: bytes, history_diff: bytes) -> bytes:
+    return _SNAPSHOT_PREFIX.pack(len(screen_blob)) + screen_blob + history_diff
+
+
+def split_snapshot(payload: bytes) -> Tuple[bytes, bytes]:
+    (length,) = _SNAPSHOT_PREFIX.unpack_from(payload, 0)
+    start = _SNAPSHOT_PREFIX.size
+    return payload[start:start + length], payload[start + length:]
@@ -0,0 +1,221 @@
+"""Append-only, memory-mapped record of tab state (screen, scrollback, cwd, title) for restore."""
+
+import json
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+MAGIC = b"BTSS"
+VERSION = 1
+
+# magic, version, end of the last complete record
+_HEADER = struct.Struct("<4sBQ")
+# tab key, record kind, payload length
+_RECORD = struct.Struct("<IBI")
+
+META = 1
+SCREEN = 2
+HISTORY = 3
+CLOSED = 4
+
+
+class SessionStore:
+    INITIAL_SIZE = 1 << 20
+    COMPACT_RATIO = 2.0
+    COMPACT_MIN_BYTES = 8 << 20
+
+    def __init__(self, path: Optional[Path] = None, max_history_lines: int = 100_000):
+        self.path = path or Path.home() / ".brutal" / "sessions.snap"
+        self.max_history_lines = max_history_lines
+        self._lock = threading.Lock()
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._end = _HEADER.size
+        # key -> {"meta": (offset, length), "screen": (offset, length),
+        #         "history": [(offset, length, lines)], "history_lines": int}
+        self._index: Dict[int, dict] = {}
+
+    def open(self) -> None:
+        with self._lock:
+            self._open_file()
+            self._scan()
+            if self._should_compact():
+                self._compact()
+
+    def _open_file(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if not self.path.exists():
+            with open(self.path, "wb") as f:
+                f.truncate(self.INITIAL_SIZE)
+        self._file = open(self.path, "r+b")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < self.INITIAL_SIZE:
+            self._file.truncate(self.INITIAL_SIZE)
+            size = self.INITIAL_SIZE
+        self._map = mmap.mmap(self._file.fileno(), size)
+
+    def _scan(self) -> None:
+        self._index = {}
+        magic, version, end = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION or end > len(self._map):
+            # Unknown or damaged file: start over rather than guess.
+            self._end = _HEADER.size
+            self._write_header()
+            return
+
+        offset = _HEADER.size
+        while offset + _RECORD.size <= end:
+            key, kind, length = _RECORD.unpack_from(self._map, offset)
+            payload_at = offset + _RECORD.size
+            if payload_at + length > end:
+                break
+            self._index_record(key, kind, payload_at, length)
+            offset = payload_at + length
+        self._end = offset
+
+    def _index_record(self, key: int, kind: int, offset: int, length: int) -> None:
+        if kind == CLOSED:
+            self._index.pop(key, None)
+            return
+        entry = self._index.setdefault(key, {"history": [], "history_lines": 0})
+        if kind == META:
+            entry["meta"] = (offset, length)
+        elif kind == SCREEN:
+            entry["screen"] = (offset, length)
+        elif kind == HISTORY:
+            (lines,) = struct.unpack_from("<I", self._map, offset)
+            entry["history"].append((offset, length, lines))
+            entry["history_lines"] += lines
+            # Drop whole records once the newer ones alone cover the scrollback limit.
+            history = entry["history"]
+            while len(history) > 1 and entry["history_lines"] - history[0][2] >= self.max_history_lines:
+                entry["history_lines"] -= history.pop(0)[2]
+
+    def _write_header(self) -> None:
+        _HEADER.pack_into(self._map, 0, MAGIC, VERSION, self._end)
+
+    def _live_bytes(self) -> int:
+        total = _HEADER.size
+        for entry in self._index.values():
+            spans = [entry.get("meta"), entry.get("screen")] + [h[:2] for h in entry["history"]]
+            total += sum(_RECORD.size + span[1] for span in spans if span)
+        return total
+
+    def _should_compact(self) -> bool:
+        return (self._end > self.COMPACT_MIN_BYTES
+                and self._end > self.COMPACT_RATIO * self._live_bytes())
+
+    def _compact(self) -> None:
+        tmp_path = self.path.with_suffix(".tmp")
+        records = []
+        for key, entry in self._index.items():
+            if "meta" in entry:
+                records.append((key, META, entry["meta"]))
+            for offset, length, _ in entry["history"]:
+                records.append((key, HISTORY, (offset, length)))
+            if "screen" in entry:
+                records.append((key, SCREEN, entry["screen"]))
+
+        with open(tmp_path, "wb") as out:
+            end = _HEADER.size + sum(_RECORD.size + span[1] for _, _, span in records)
+            out.write(_HEADER.pack(MAGIC, VERSION, end))
+            for key, kind, (offset, length) in records:
+                out.write(_RECORD.pack(key, kind, length))
+                out.write(self._map[offset:offset + length])
+            out.truncate(max(self.INITIAL_SIZE, end))
+            out.flush()
+            os.fsync(out.fileno())
+
+        self._map.close()
+        self._file.close()
+        os.replace(tmp_path, self.path)
+        self._open_file()
+        self._scan()
+
+    def _ensure_capacity(self, needed: int) -> None:
+        size = len(self._map)
+        if self._end + needed <= size:
+            return
+        while self._end + needed > size:
+            size *= 2
+        self._map.flush()
+        self._map.close()
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+
+    def _append(self, key: int, kind: int, payload: bytes) -> None:
+        with self._lock:
+            if self._map is None:
+                return
+            self._ensure_capacity(_RECORD.size + len(payload))
+            offset = self._end
+            _RECORD.pack_into(self._map, offset, key, kind, len(payload))
+            payload_at = offset + _RECORD.size
+            self._map[payload_at:payload_at + len(payload)] = payload
+            self._index_record(key, kind, payload_at, len(payload))
+            # Publishing the new end last means a torn write is simply never read back.
+            self._end = payload_at + len(payload)
+            self._write_header()
+
+    def write_meta(self, key: int, meta: dict) -> None:
+        self._append(key, META, json.dumps(meta).encode("utf-8"))
+
+    def write_screen(self, key: int, blob: bytes) -> None:
+        self._append(key, SCREEN, blob)
+
+    def write_history(self, key: int, blob: bytes, lines: int) -> None:
+        self._append(key, HISTORY, struct.pack("<I", lines) + blob)
+
+    def forget(self, key: int) -> None:
+        self._append(key, CLOSED, b"")
+
+    def load(self) -> List[dict]:
+        with self._lock:
+            if self._map is None:
+                return []
+            states = []
+            for key, entry in self._index.items():
+                if "meta" not in entry or "screen" not in entry:
+                    continue
+                offset, length = entry["meta"]
+                state = json.loads(bytes(self._map[offset:offset + length]).decode("utf-8"))
+                offset, length = entry["screen"]
+                state["key"] = key
+                state["screen"] = bytes(self._map[offset:offset + length])
+                state["history"] = [bytes(self._map[offset + 4:offset + length])
+                                    for offset, length, _ in entry["history"]]
+                state["history_lines"] = entry["history_lines"]
+                states.append(state)
+        states.sort(key=lambda state: state.get("order", 0))
+        return states
+
+    @property
+    def keys(self) -> List[int]:
+        return list(self._index)
+
+    def compact_if_needed(self) -> None:
+        # Called after each periodic save, so a long session doesn't wait for a restart.
+        with self._lock:
+            if self._map is not None and self._should_compact():
+                self._compact()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._map is not None:
+                self._map.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._map is None:
+                return
+            if self._should_compact():
+                self._compact()
+            self._map.flush()
+            self._map.close()
+            self._file.close()
+            self._map = None
+            self._file = None
@@ -0,0 +1,380 @@
+"""Compact binary snapshots and dirty-row diffs of a pyte screen (cells, cursor, modes)."""
+
+import struct
+import zlib
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+import pyte
+from pyte.screens import Char, Cursor, Margins, Savepoint, StaticDefaultDict
+
+
+MAGIC = b"BTSN"
+DIFF_MAGIC = b"BTDF"
+LINES_MAGIC = b"BTLN"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sBHHHHB")
+_DIFF_HEADER = struct.Struct("<4sBHHHHBQ")
+_LINES_HEADER = struct.Struct("<4sBI")
+_STYLE_FLAGS = ("bold", "italics", "underscore", "strikethrough", "reverse", "blink")
+
+
+def _pack_str(out: List[bytes], value: str) -> None:
+    raw = value.encode("utf-8")
+    out.append(struct.pack("<I", len(raw)))
+    out.append(raw)
+
+
+def _unpack_str(data: bytes, offset: int) -> Tuple[str, int]:
+    (length,) = struct.unpack_from("<I", data, offset)
+    offset += 4
+    return data[offset:offset + length].decode("utf-8"), offset + length
+
+
+def _style_key(char: Char) -> tuple:
+    return (char.fg, char.bg) + tuple(getattr(char, f) for f in _STYLE_FLAGS)
+
+
+def _style_registry() -> Tuple[Dict[tuple, int], Callable[[Char], int]]:
+    styles: Dict[tuple, int] = {}
+
+    def style_id(char: Char) -> int:
+        key = _style_key(char)
+        sid = styles.get(key)
+        if sid is None:
+            sid = len(styles)
+            styles[key] = sid
+        return sid
+
+    return styles, style_id
+
+
+def _encode_line(line: Any, columns: int, default_key: tuple,
+                 style_id: Callable[[Char], int]) -> List[tuple]:
+    runs = []
+    run_start = -1
+    run_style = -1
+    run_cells: List[str] = []
+    for x in range(columns + 1):
+        char = line[x] if x < columns else None
+        # Default blank cells are dropped; they come back from the StaticDefaultDict.
+        blank = char is None or (char.data == " " and _style_key(char) == default_key)
+        sid = -1 if blank else style_id(char)
+        if sid != run_style or blank:
+            if run_cells:
+                runs.append((run_style, run_start, run_cells))
+            run_cells = []
+            run_style = sid
+            run_start = x
+        if not blank:
+            run_cells.append(char.data)
+    return runs
+
+
+def _pack_runs(out: List[bytes], runs: List[tuple]) -> None:
+    out.append(struct.pack("<H", len(runs)))
+    for sid, start, cells in runs:
+        out.append(struct.pack("<HH", sid, start))
+        _pack_str(out, "\x00".join(cells))
+
+
+def _unpack_runs(data: bytes, offset: int, styles: List[Char], line: Any,
+                 text: List[str]) -> int:
+    (n_runs,) = struct.unpack_from("<H", data, offset)
+    offset += 2
+    make = Char._make
+    for _ in range(n_runs):
+        sid, start = struct.unpack_from("<HH", data, offset)
+        offset += 4
+        cells, offset = _unpack_str(data, offset)
+        text.append(cells)
+        tail = tuple(styles[sid])[1:]
+        for i, cell in enumerate(cells.split("\x00"), start):
+            line[i] = make((cell,) + tail)
+    return offset
+
+
+def _skip_runs(data: bytes, offset: int) -> int:
+    (n_runs,) = struct.unpack_from("<H", data, offset)
+    offset += 2
+    for _ in range(n_runs):
+        (length,) = struct.unpack_from("<I", data, offset + 4)
+        offset += 8 + length
+    return offset
+
+
+def _pack_state(out: List[bytes], screen: pyte.Screen, styles: Dict[tuple, int],
+                cursor_style: int) -> None:
+    _pack_str(out, screen.title)
+    _pack_str(out, screen.icon_name)
+
+    modes = sorted(screen.mode)
+    out.append(struct.pack(f"<H{len(modes)}I", len(modes), *modes))
+    tabstops = sorted(screen.tabstops)
+    out.append(struct.pack(f"<H{len(tabstops)}H", len(tabstops), *tabstops))
+    top, bottom = screen.margins or (-1, -1)
+    out.append(struct.pack("<hh", top, bottom))
+
+    _pack_styles(out, styles)
+    out.append(struct.pack("<H", cursor_style))
+
+
+def _pack_styles(out: List[bytes], styles: Dict[tuple, int]) -> None:
+    out.append(struct.pack("<H", len(styles)))
+    for key in styles:
+        _pack_str(out, key[0])
+        _pack_str(out, key[1])
+        flags = sum(1 << i for i, on in enumerate(key[2:]) if on)
+        out.append(struct.pack("<B", flags))
+
+
+def _unpack_styles(data: bytes, offset: int) -> Tuple[List[Char], int]:
+    (n_styles,) = struct.unpack_from("<H", data, offset)
+    offset += 2
+    styles = []
+    for _ in range(n_styles):
+        fg, offset = _unpack_str(data, offset)
+        bg, offset = _unpack_str(data, offset)
+        (flags,) = struct.unpack_from("<B", data, offset)
+        offset += 1
+        attrs = {name: bool(flags & (1 << i)) for i, name in enumerate(_STYLE_FLAGS)}
+        styles.append(Char(" ", fg, bg, **attrs))
+    return styles, offset
+
+
+def _unpack_state(data: bytes, offset: int, screen: pyte.Screen) -> Tuple[List[Char], int, int]:
+    screen.title, offset = _unpack_str(data, offset)
+    screen.icon_name, offset = _unpack_str(data, offset)
+
+    (n_modes,) = struct.unpack_from("<H", data, offset)
+    offset += 2
+    screen.mode = set(struct.unpack_from(f"<{n_modes}I", data, offset))
+    offset += 4 * n_modes
+    (n_tabs,) = struct.unpack_from("<H", data, offset)
+    offset += 2
+    screen.tabstops = set(struct.unpack_from(f"<{n_tabs}H", data, offset))
+    offset += 2 * n_tabs
+    top, bottom = struct.unpack_from("<hh", data, offset)
+    offset += 4
+    screen.margins = Margins(top, bottom) if top >= 0 else None
+
+    styles, offset = _unpack_styles(data, offset)
+    (cursor_style,) = struct.unpack_from("<H", data, offset)
+    offset += 2
+    return styles, cursor_style, offset
+
+
+def _encode_grid(screen: pyte.Screen, buffer: Any, default_key: tuple,
+                 style_id: Callable[[Char], int]) -> List[tuple]:
+    rows = []
+    for y in sorted(buffer):
+        if y >= screen.lines:
+            continue
+        runs = _encode_line(buffer[y], screen.columns, default_key, style_id)
+        if runs:
+            rows.append((y, runs))
+    return rows
+
+
+def _pack_grid(out: List[bytes], rows: List[tuple]) -> None:
+    out.append(struct.pack("<H", len(rows)))
+    for y, runs in rows:
+        out.append(struct.pack("<H", y))
+        _pack_runs(out, runs)
+
+
+def _unpack_grid(data: bytes, offset: int, styles: List[Char], buffer: Any,
+                 text: List[str]) -> int:
+    (n_rows,) = struct.unpack_from("<H", data, offset)
+    offset += 2
+    for _ in range(n_rows):
+        (y,) = struct.unpack_from("<H", data, offset)
+        offset = _unpack_runs(data, offset + 2, styles, buffer[y], text)
+    return offset
+
+
+def _pack_savepoint(out: List[bytes], savepoint: Savepoint, cursor_style: int) -> None:
+    cursor = savepoint.cursor
+    out.append(struct.pack("<HHBHBBB", cursor.x, cursor.y, int(cursor.hidden), cursor_style,
+                           savepoint.charset, int(savepoint.origin), int(savepoint.wrap)))
+    _pack_str(out, savepoint.g0_charset)
+    _pack_str(out, savepoint.g1_charset)
+
+
+def _unpack_savepoint(data: bytes, offset: int, styles: List[Char]) -> Tuple[Savepoint, int]:
+    x, y, hidden, cursor_style, charset, origin, wrap = struct.unpack_from("<HHBHBBB", data, offset)
+    offset += 10
+    g0_charset, offset = _unpack_str(data, offset)
+    g1_charset, offset = _unpack_str(data, offset)
+    cursor = Cursor(x, y, styles[cursor_style])
+    cursor.hidden = bool(hidden)
+    return Savepoint(cursor, g0_charset, g1_charset, charset, bool(origin), bool(wrap)), offset
+
+
+def encode_screen(screen: pyte.Screen) -> bytes:
+    styles, style_id = _style_registry()
+    default_key = _style_key(screen.default_char)
+    cursor_style = style_id(screen.cursor.attrs)
+    rows = _encode_grid(screen, screen.buffer, default_key, style_id)
+
+    # On the alternate screen the hidden shell grid and the 1049 savepoint go along,
+    # so leaving the full-screen app after a restore brings the shell back.
+    alternate = screen.alternate_state() if hasattr(screen, "alternate_state") else None
+    if alternate is not None:
+        primary, savepoint = alternate
+        primary_rows = _encode_grid(screen, primary, default_key, style_id)
+        savepoint_style = style_id(savepoint.cursor.attrs) if savepoint else 0
+
+    out: List[bytes] = [_HEADER.pack(
+        MAGIC, VERSION, screen.columns, screen.lines,
+        screen.cursor.x, screen.cursor.y, int(screen.cursor.hidden)
+    )]
+    _pack_state(out, screen, styles, cursor_style)
+    _pack_grid(out, rows)
+
+    # Trailing section; snapshots written before it existed simply end after the rows.
+    out.append(struct.pack("<B", alternate is not None))
+    if alternate is not None:
+        out.append(struct.pack("<B", savepoint is not None))
+        if savepoint is not None:
+            _pack_savepoint(out, savepoint, savepoint_style)
+        _pack_grid(out, primary_rows)
+
+    return zlib.compress(b"".join(out), 6)
+
+
+def decode_screen(blob: bytes,
+                  screen_factory: Callable[[int, int], pyte.Screen] = pyte.Screen) -> pyte.Screen:
+    data = zlib.decompress(blob)
+    magic, version, cols, rows, cx, cy, hidden = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a BrutalTerm screen snapshot")
+
+    screen = screen_factory(cols, rows)
+    styles, cursor_style, offset = _unpack_state(data, _HEADER.size, screen)
+    text: List[str] = []
+    offset = _unpack_grid(data, offset, styles, screen.buffer, text)
+
+    # A plain pyte.Screen (history-only decodes) has no second grid and keeps the live one.
+    in_alternate = offset < len(data) and data[offset]
+    if in_alternate and hasattr(screen, "restore_alternate"):
+        savepoint = None
+        if data[offset + 1]:
+            savepoint, offset = _unpack_savepoint(data, offset + 2, styles)
+        else:
+            offset += 2
+        _unpack_grid(data, offset, styles, screen.restore_alternate(savepoint), [])
+
+    screen.cursor.x = cx
+    screen.cursor.y = cy
+    screen.cursor.hidden = bool(hidden)
+    screen.cursor.attrs = styles[cursor_style]
+    screen.dirty.update(range(rows))
+    return screen
+
+
+def encode_diff(screen: pyte.Screen, rows: Iterable[int], history: Sequence[Any],
+                history_total: int) -> bytes:
+    # Unlike snapshots, every listed row is sent even when blank so the receiver clears it.
+    styles, style_id = _style_registry()
+    default_key = _style_key(screen.default_char)
+    cursor_style = style_id(screen.cursor.attrs)
+
+    history_runs = [_encode_line(line, screen.columns, default_key, style_id) for line in history]
+    row_runs = [(y, _encode_line(screen.buffer[y], screen.columns, default_key, style_id))
+                for y in rows if y < screen.lines]
+
+    out: List[bytes] = [_DIFF_HEADER.pack(
+        DIFF_MAGIC, VERSION, screen.columns, screen.lines,
+        screen.cursor.x, screen.cursor.y, int(screen.cursor.hidden), history_total
+    )]
+    _pack_state(out, screen, styles, cursor_style)
+
+    out.append(struct.pack("<I", len(history_runs)))
+    for runs in history_runs:
+        _pack_runs(out, runs)
+    out.append(struct.pack("<H", len(row_runs)))
+    for y, runs in row_runs:
+        out.append(struct.pack("<H", y))
+        _pack_runs(out, runs)
+
+    return zlib.compress(b"".join(out), 1)
+
+
+def apply_diff(screen: pyte.Screen, blob: bytes) -> Tuple[List[Any], int, str]:
+    # Returns (history lines, the sender's history total, decoded text for glyph lookup).
+    data = zlib.decompress(blob)
+    magic, version, cols, rows, cx, cy, hidden, history_total = _DIFF_HEADER.unpack_from(data, 0)
+    if magic != DIFF_MAGIC or version != VERSION:
+        raise ValueError("not a BrutalTerm screen diff")
+
+    screen.resize(rows, cols)
+    styles, cursor_style, offset = _unpack_state(data, _DIFF_HEADER.size, screen)
+    text: List[str] = []
+
+    (n_history,) = struct.unpack_from("<I", data, offset)
+    offset += 4
+    history = []
+    for _ in range(n_history):
+        line = StaticDefaultDict(screen.default_char)
+        offset = _unpack_runs(data, offset, styles, line, text)
+        history.append(line)
+
+    (n_rows,) = struct.unpack_from("<H", data, offset)
+    offset += 2
+    for _ in range(n_rows):
+        (y,) = struct.unpack_from("<H", data, offset)
+        line = StaticDefaultDict(screen.default_char)
+        offset = _unpack_runs(data, offset + 2, styles, line, text)
+        screen.buffer[y] = line
+        screen.dirty.add(y)
+
+    screen.cursor.x = cx
+    screen.cursor.y = cy
+    screen.cursor.hidden = bool(hidden)
+    screen.cursor.attrs = styles[cursor_style]
+    return history, history_total, "".join(text)
+
+
+def encode_lines(lines: Sequence[Any], default_char: Char) -> bytes:
+    # Standalone rows (e.g. a scrollback chunk), each as wide as its rightmost written cell.
+    styles, style_id = _style_registry()
+    default_key = _style_key(default_char)
+    line_runs = [_encode_line(line, max(line) + 1 if line else 0, default_key, style_id)
+                 for line in lines]
+
+    out: List[bytes] = [_LINES_HEADER.pack(LINES_MAGIC, VERSION, len(line_runs))]
+    _pack_styles(out, styles)
+    for runs in line_runs:
+        _pack_runs(out, runs)
+    return zlib.compress(b"".join(out), 6)
+
+
+class LineBlock:
+    # Rows from encode_lines. The blob is inflated once, but each row is only decoded
+    # the first time it is read, so touching old history costs per row rather than per block.
+
+    def __init__(self, blob: bytes, default_char: Char):
+        data = zlib.decompress(blob)
+        magic, version, count = _LINES_HEADER.unpack_from(data, 0)
+        if magic != LINES_MAGIC or version != VERSION:
+            raise ValueError("not a BrutalTerm line block")
+        self._data = data
+        self._default_char = default_char
+        self._styles, offset = _unpack_styles(data, _LINES_HEADER.size)
+        self._offsets: List[int] = []
+        for _ in range(count):
+            self._offsets.append(offset)
+            offset = _skip_runs(data, offset)
+        self._lines: List[Any] = [None] * count
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def __getitem__(self, index: int) -> Any:
+        line = self._lines[index]
+        if line is None:
+            line = StaticDefaultDict(self._default_char)
+            _unpack_runs(self._data, self._offsets[index], self._styles, line, [])
+            self._lines[index] = line
+        return line
@@ -1,31 +1,129 @@
 """Terminal tab widget for rendering a single terminal instance."""
 
 import platform
-from typing import Optional
+import threading
+import time
+import webbrowser
+from collections import deque
+from typing import Deque, List, Optional, Tuple
 
 from imgui_bundle import imgui
+from pyte.screens import Char
 
+from src.terminal import session_protocol as proto
+from src.terminal.graphics import GraphicsStore
+from src.terminal.key_encoder import ENCODED_KEYS, encode_frame, encode_paste
+from src.terminal.prompt_index import Command, PromptIndex
 from src.terminal.pty_manager import PtyManager
+from src.terminal.scrollback import CELL_BYTES, ROW_BYTES, Scrollback
+from src.terminal.session_client import SessionClient
+from src.terminal.session_store import SessionStore
+from src.terminal.snapshot import decode_screen, encode_diff
+from src.terminal.triggers import TriggerEngine
 from src.terminal.vt100_parser import VT100Parser
+from src.ui.texture_cache import TextureCache
 from src.ui.theme import ThemeManager
+from src.utils.config import Config
+from src.utils.latency_probe import LatencyProbe
+from src.utils.memory_governor import MemoryGovernor
+from src.utils.output_logger import OutputLog
+from src.utils.tracing import TRACER, traced
 
 
 class TerminalTab:
-    def __init__(self, pty_manager: PtyManager, theme_manager: ThemeManager):
+    WHEEL_LINES = 3
+    SCROLL_SMOOTHING = 0.35
+    # Recent history stays uncompressed so ordinary scrolling never decodes.
+    HOT_SCROLLBACK_LINES = 8192
+    # Parsing runs at frame time in slices so a flooding child can't stall the UI;
+    # the tab on screen gets the larger share.
+    PARSE_SLICE = 0.008
+    BACKGROUND_PARSE_SLICE = 0.002
+    PARSE_CHUNK = 4096
+    VISIBLE_SECONDS = 0.5
+    # Ctrl+Shift shortcuts handled by the app and the tab; every other Ctrl+Shift key goes
+    # to the child.
+    CTRL_SHIFT_SHORTCUTS = (imgui.Key.t, imgui.Key.l, imgui.Key.m, imgui.Key.p, imgui.Key.o,
+                            imgui.Key.v, imgui.Key.up_arrow, imgui.Key.down_arrow)
+
+    # pty_manager is either a local PtyManager or a SessionClient attached to the daemon.
+    def __init__(self, pty_manager: PtyManager, theme_manager: ThemeManager,
+                 spawn: bool = True, config: Optional[Config] = None):
         self.pty_manager = pty_manager
         self.theme_manager = theme_manager
+        self.config = config or Config()
         self.title = "Terminal"
         
         self.cols = 80
         self.rows = 24
         
-        self.parser = VT100Parser(self.cols, self.rows)
+        self.scrollback = Scrollback(self.config["scrollback_lines"])
+        self.prompts = PromptIndex()
+        self.graphics: Optional[GraphicsStore] = None
+        if self.config["inline_images"]:
+            self.graphics = GraphicsStore(self.config["inline_image_max_bytes"])
+        self.texture_cache: Optional[TextureCache] = None
+        self.triggers: Optional[TriggerEngine] = None
+        # scrollback.total_appended as of the last trigger scan.
+        self._trigger_mark = 0
+        self.parser: Optional[VT100Parser] = self._create_parser()
         self.pty_id: Optional[int] = None
         
-        self._input_buffer = ""
-        self._scroll_to_bottom = True
+        self._pending_input: List[str] = []
+        self._follow_output = True
+        self._scroll_target = 0.0
+        self._last_scroll_y = 0.0
+        
+        self.hibernated = False
+        # Set by notify triggers, cleared once the tab is looked at.
+        self.alert = False
+        self.last_viewed = time.monotonic()
+        self.last_output = self.last_viewed
+        self._parsed_at = self.last_viewed
+        self._snapshot: Optional[bytes] = None
+        # Output read but not parsed yet; bounded by pausing the reader (flow control).
+        self._pending_output = bytearray()
+        self._output_lock = threading.Lock()
+        self._output_budget = self.config["output_buffer_bytes"]
+        self._reader_paused = False
+        # Daemon frames for remote tabs, applied on the UI thread like _pending_output.
+        self._pending_frames: Deque[Tuple[int, bytes]] = deque()
+        self._history_mark = 0
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
         
-        self._spawn_terminal()
+        self.session_key: Optional[int] = None
+        self.cwd: Optional[str] = None
+        self.restored = False
+        self.output_log: Optional[OutputLog] = None
+        self.latency_probe: Optional[LatencyProbe] = None
+        self.memory_governor: Optional[MemoryGovernor] = None
+        self._compressing = False
+        self._saved_meta: Optional[dict] = None
+        self._saved_screen: Optional[tuple] = None
+        self._saved_history = 0
+        self._restored_history: List[bytes] = []
+        
+        if spawn:
+            self.start()
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self.pty_id is None:
+                cols, rows = self.cols, self.rows
+                self._spawn_terminal()
+                # The UI thread may have fitted the grid while this ran on a worker;
+                # resize() leaves the pty to us while the spawn holds the lock.
+                if (self.cols, self.rows) != (cols, rows):
+                    self.pty_manager.resize(self.pty_id, self.cols, self.rows)
+
+    @property
+    def is_ready(self) -> bool:
+        return self.pty_id is not None
+
+    @property
+    def remote(self) -> bool:
+        return isinstance(self.pty_manager, SessionClient)
 
     def _spawn_terminal(self) -> None:
         system = platform.system()
@@ -34,61 +132,607 @@ class TerminalTab:
         self.pty_id = self.pty_manager.spawn(
             cols=self.cols,
             rows=self.rows,
-            on_output=self._on_output
+            on_output=self._on_session_frame if self.remote else self._on_output,
+            cwd=self.cwd
         )
 
+    def attach(self, session_id: int) -> None:
+        self.title = "Bash"
+        self.pty_id = session_id
+        self.pty_manager.attach(session_id, self._on_session_frame, self._history_mark)
+
+    def _create_parser(self, snapshot: Optional[bytes] = None) -> VT100Parser:
+        on_text = self.theme_manager.font_loader.glyph_manager.observe
+        if snapshot is not None:
+            return VT100Parser.from_snapshot(snapshot, on_text=on_text, scrollback=self.scrollback,
+                                             prompts=self.prompts, graphics=self.graphics,
+                                             on_reply=self._send_reply)
+        return VT100Parser(self.cols, self.rows, on_text=on_text, scrollback=self.scrollback,
+                           prompts=self.prompts, graphics=self.graphics, on_reply=self._send_reply)
+
+    def _send_reply(self, data: bytes) -> None:
+        # Protocol answers (kitty graphics status) go straight back to the child.
+        if self.pty_id is not None and not self.remote:
+            self.pty_manager.write(self.pty_id, data)
+
+    @property
+    def last_exit_code(self) -> Optional[int]:
+        return self.prompts.last_exit_code
+
+    def command_at(self, line: int) -> Optional[Command]:
+        # line is a view index (scrollback followed by screen rows).
+        return self.prompts.at(line + self.scrollback.first_index)
+
+    def command_output(self, command: Command) -> str:
+        with self._lock:
+            first = self.scrollback.first_index
+            live_end = self.scrollback.total_appended + self.rows
+            span = self.prompts.output_range(command, live_end)
+            if span is None or self.parser is None:
+                return ""
+            start = max(span[0], first) - first
+            stop = min(span[1], live_end) - first
+            rows = [self.parser.get_line(i) for i in range(start, stop)]
+        text = []
+        for row in rows:
+            width = max(row) + 1 if row else 0
+            text.append("".join(row[x].data for x in range(width)).rstrip())
+        return "\n".join(text)
+
     def _on_output(self, data: bytes) -> None:
-        self.parser.feed(data)
-        self._scroll_to_bottom = True
+        # Reader thread: only buffers. Once the backlog passes the budget the reader is
+        # paused, so the kernel buffer fills and the child blocks on write.
+        if self.output_log:
+            self.output_log.write(data)
+        with self._output_lock:
+            self.last_output = time.monotonic()
+            self._pending_output += data
+            if not self._reader_paused and len(self._pending_output) >= self._output_budget:
+                self._reader_paused = True
+                self.pty_manager.pause(self.pty_id)
+
+    def _on_session_frame(self, kind: int, payload: bytes) -> None:
+        # Runs on the session client thread: only queue, the screen belongs to the UI thread.
+        if kind == proto.EXITED:
+            self.title = f"{self.title} [EXITED]"
+            return
+        if self.hibernated:
+            return
+        with self._output_lock:
+            self.last_output = time.monotonic()
+            self._pending_frames.append((kind, payload))
+
+    def _apply_frame(self, kind: int, payload: bytes) -> None:
+        if kind == proto.SNAPSHOT:
+            screen_blob, history = proto.split_snapshot(payload)
+            self.parser.load_snapshot(screen_blob)
+            self._history_mark = self.parser.apply_diff(history)
+            # Scrollback replayed on attach is old output, not new trigger hits.
+            self._trigger_mark = self.scrollback.total_appended
+        elif kind == proto.DIFF:
+            self._history_mark = self.parser.apply_diff(payload)
+
+    def should_hibernate(self, now: float) -> bool:
+        idle = now - max(self.last_viewed, self.last_output)
+        return (not self.hibernated and self.is_ready
+                and idle >= self.config["hibernate_after_seconds"])
+
+    def hibernate(self) -> None:
+        with self._lock:
+            if self.hibernated:
+                return
+            if self.remote:
+                # The daemon keeps the live screen; re-attaching costs one snapshot.
+                self.pty_manager.detach(self.pty_id)
+                with self._output_lock:
+                    self._pending_frames.clear()
+            else:
+                self._snapshot = self.parser.snapshot()
+            self.parser = None
+            self.hibernated = True
+
+    def wake(self) -> None:
+        with self._lock:
+            if not self.hibernated:
+                return
+            if self.remote:
+                self.parser = self._create_parser()
+                self.hibernated = False
+                self.pty_manager.attach(self.pty_id, self._on_session_frame, self._history_mark)
+                return
+            self.parser = self._create_parser(self._snapshot)
+            self.parser.resize(self.cols, self.rows)
+            self._snapshot = None
+            self.hibernated = False
+            # Output buffered while asleep is parsed by the following frames' slices.
+
+    def restore_state(self, state: dict) -> None:
+        # Shows the saved screen right away; the shell is spawned on first focus and the
+        # history is decoded off the UI thread (decode_history, then install_history).
+        self.title = state.get("title", self.title)
+        self.cwd = state.get("cwd")
+        parser = self._create_parser()
+        parser.load_snapshot(state["screen"])
+        # Absolute line numbers already count the history that is still to come.
+        self.scrollback.total_appended = state["history_lines"]
+        self._restored_history = state["history"]
+        self._trigger_mark = self.scrollback.total_appended
+        self.parser = parser
+        self.cols, self.rows = parser.cols, parser.rows
+        self.restored = True
+        self.session_key = state["key"]
+        self._saved_meta = {k: state.get(k) for k in ("title", "cwd", "order", "active")}
+        self._saved_screen = (self._parsed_at, self.cols, self.rows)
+        self._saved_history = self.scrollback.total_appended
+
+    def decode_history(self) -> Optional[Scrollback]:
+        blobs, self._restored_history = self._restored_history, []
+        if not blobs:
+            return None
+        history = Scrollback(self.scrollback.max_lines)
+        parser = VT100Parser(self.cols, self.rows, scrollback=history,
+                             on_text=self.theme_manager.font_loader.glyph_manager.observe)
+        for blob in blobs:
+            parser.apply_diff(blob)
+        return history
+
+    def install_history(self, history: Scrollback) -> None:
+        with self._lock:
+            self.scrollback.prepend(history)
+
+    @traced("tab.save_state", "session")
+    def save_state(self, store: SessionStore, order: int, active: bool) -> None:
+        if self.pty_id is not None and not self.remote:
+            self.cwd = self.pty_manager.get_cwd(self.pty_id) or self.cwd
+        meta = {"title": self.title, "cwd": self.cwd, "order": order, "active": active}
+        if meta != self._saved_meta:
+            store.write_meta(self.session_key, meta)
+            self._saved_meta = meta
+        
+        with self._lock:
+            # Output buffered during hibernation isn't parsed yet, so it doesn't count as a change.
+            screen_state = (self._parsed_at, self.cols, self.rows)
+            total = self.scrollback.total_appended
+            if screen_state == self._saved_screen and total == self._saved_history:
+                return
+            if self.hibernated:
+                screen_blob = self._snapshot
+                screen = decode_screen(screen_blob) if total > self._saved_history else None
+            else:
+                screen_blob = self.parser.snapshot()
+                screen = self.parser.screen
+            
+            if total > self._saved_history:
+                first = self.scrollback.first_index
+                lines = self.scrollback.lines(max(self._saved_history, first) - first, len(self.scrollback))
+                store.write_history(self.session_key, encode_diff(screen, (), lines, total),
+                                    len(lines))
+                self._saved_history = total
+        
+        if screen_state != self._saved_screen:
+            store.write_screen(self.session_key, screen_blob)
+            self._saved_screen = screen_state
+
+    def resize(self, cols: int, rows: int) -> None:
+        if cols == self.cols and rows == self.rows:
+            return
+        with self._lock:
+            self.cols = cols
+            self.rows = rows
+            if self.parser:
+                self.parser.resize(cols, rows)
+        if not self._start_lock.acquire(blocking=False):
+            return  # start() applies the new size once its spawn is done
+        try:
+            if self.pty_id is not None:
+                self.pty_manager.resize(self.pty_id, cols, rows)
+        finally:
+            self._start_lock.release()
+
+    def _fit_grid(self) -> None:
+        available = imgui.get_content_region_avail()
+        cell_width = imgui.calc_text_size("M").x
+        line_height = imgui.get_text_line_height()
+        if cell_width <= 0 or line_height <= 0:
+            return
+        cols = max(20, int(available.x // cell_width))
+        rows = max(5, int(available.y // line_height))
+        if self.graphics is not None:
+            self.graphics.cell_size = (cell_width, line_height)
+        self.resize(cols, rows)
 
     def _send_input(self, text: str) -> None:
         if self.pty_id is not None:
-            self.pty_manager.write(self.pty_id, text.encode("utf-8"))
+            data = text.encode("utf-8")
+            if self.latency_probe:
+                self.latency_probe.on_key(self, data)
+            self.pty_manager.write(self.pty_id, data)
+
+    def memory_usage(self) -> int:
+        usage = self.scrollback.nbytes + len(self._pending_output) + len(self._snapshot or b"")
+        if self.graphics is not None:
+            usage += self.graphics.nbytes
+        if self.parser is not None:
+            usage += self.rows * (ROW_BYTES + CELL_BYTES * self.cols)
+        return usage
+
+    def release_memory(self, wanted: int) -> int:
+        freed = 0
+        if self.graphics is not None:
+            # Images scrolled well out of view are the cheapest thing to lose.
+            before = self.graphics.nbytes
+            self.graphics.drop_before(self.scrollback.total_appended - self.HOT_SCROLLBACK_LINES)
+            freed = before - self.graphics.nbytes
+        if self._compressing or self.memory_governor is None:
+            return freed
+        candidate = self.scrollback.compressible_bytes(self.HOT_SCROLLBACK_LINES)
+        if not candidate:
+            return freed
+        self._compressing = True
+        self.memory_governor.run_async(self._compress_scrollback)
+        # Compressed text rows typically shrink by well over an order of magnitude.
+        return freed + candidate * 9 // 10
+
+    def _compress_scrollback(self) -> None:
+        try:
+            with TRACER.span("tab.compress_scrollback", "memory"):
+                self.scrollback.compress(Char(" "), self.HOT_SCROLLBACK_LINES)
+        except Exception as e:
+            print(f"Failed to compress scrollback of '{self.title}': {e}")
+        self._compressing = False
+
+    @property
+    def visible(self) -> bool:
+        return time.monotonic() - self.last_viewed < self.VISIBLE_SECONDS
+
+    def _drain_output(self, time_slice: float) -> None:
+        # Parses buffered output for up to time_slice seconds; the rest waits for the next frame.
+        if not self._pending_output and not self._pending_frames:
+            return
+        deadline = time.perf_counter() + time_slice
+        with self._lock, TRACER.span("tab.drain_output", "parser"):
+            while self.parser is not None and not self.hibernated:
+                with self._output_lock:
+                    frame = self._pending_frames.popleft() if self._pending_frames else None
+                    if frame is None:
+                        chunk = bytes(self._pending_output[:self.PARSE_CHUNK])
+                        del self._pending_output[:self.PARSE_CHUNK]
+                if frame is not None:
+                    self._apply_frame(*frame)
+                elif not chunk:
+                    break
+                else:
+                    self.parser.feed(chunk)
+                    # The echo counts once it is parsed, not when the reader buffered it.
+                    if self.latency_probe:
+                        self.latency_probe.on_output(self, chunk)
+                self._parsed_at = time.monotonic()
+                if time.perf_counter() >= deadline:
+                    break
+
+    def _update_flow(self) -> None:
+        # Resume reading once the backlog is down to half the budget; a tab moving to the
+        # background gets the smaller budget and may pause right away.
+        if self.remote or self.pty_id is None:
+            return
+        key = "output_buffer_bytes" if self.visible else "background_output_buffer_bytes"
+        with self._output_lock:
+            self._output_budget = budget = self.config[key]
+            pending = len(self._pending_output)
+            if self._reader_paused and pending < budget // 2:
+                self._reader_paused = False
+                self.pty_manager.resume(self.pty_id)
+            elif not self._reader_paused and pending >= budget:
+                self._reader_paused = True
+                self.pty_manager.pause(self.pty_id)
 
     def update(self) -> None:
-        pass
+        if self.hibernated and len(self._pending_output) >= self.config["hibernate_wake_bytes"]:
+            self.wake()
+        if not self.hibernated and not self.visible:
+            self._drain_output(self.BACKGROUND_PARSE_SLICE)
+        self._update_flow()
+        if self.triggers is not None and not self.hibernated:
+            self._scan_triggers()
+
+    def _scan_triggers(self) -> None:
+        # Rows that scrolled into history since the last frame (a burst can push a row
+        # through the whole screen within one frame) plus the rows the parser touched.
+        # The regex work runs unlocked.
+        with self._lock:
+            parser = self.parser
+            if parser is None:
+                return
+            rows = []
+            total = self.scrollback.total_appended
+            if total != self._trigger_mark:
+                first = self.scrollback.first_index
+                rows = self.scrollback.lines(max(self._trigger_mark, first) - first,
+                                             len(self.scrollback))
+                self._trigger_mark = total
+            screen = parser.screen
+            if not rows and not screen.dirty:
+                return
+            rows += [screen.buffer[y] for y in sorted(screen.dirty) if y < screen.lines]
+            screen.dirty.clear()
+            cols = screen.columns
+        with TRACER.span("tab.triggers", "triggers"):
+            self.triggers.scan_rows(rows, cols)
 
+    @traced("tab.render", "render")
     def render(self) -> None:
+        self.last_viewed = time.monotonic()
+        self.alert = False
+        if self.hibernated:
+            self.wake()
+        if self.restored and not self.is_ready:
+            self.start()
+        self._drain_output(self.PARSE_SLICE)
+        
+        self.theme_manager.push_terminal_font()
         imgui.push_style_color(imgui.Col_.text, self.theme_manager.text_color)
         imgui.push_style_color(imgui.Col_.frame_bg, self.theme_manager.bg_color)
         
-        available = imgui.get_content_region_avail()
-        input_height = imgui.get_frame_height_with_spacing() + 5
-        
-        terminal_height = available.y - input_height
-        if terminal_height < 50:
-            terminal_height = 50
-        
-        imgui.begin_child("##terminal_content", (0, terminal_height), True,
+        imgui.begin_child("##terminal_content", (0, 0), True,
                           imgui.WindowFlags_.no_scroll_with_mouse)
         
-        display = self.parser.get_display()
-        for line in display:
-            imgui.text_unformatted(line)
+        self._fit_grid()
         
-        if self._scroll_to_bottom:
-            imgui.set_scroll_here_y(1.0)
-            self._scroll_to_bottom = False
+        if self.is_ready or self.restored:
+            self._render_lines()
+        else:
+            imgui.text_disabled("[ STARTING SHELL ]")
         
         imgui.end_child()
         
         imgui.pop_style_color()
         imgui.pop_style_color()
+        self.theme_manager.pop_terminal_font()
+        
+        self._handle_keyboard()
+        self._flush_input()
+
+    def _handle_keyboard(self) -> None:
+        # Raw mode: key events go straight to the child, encoded as xterm would.
+        io = imgui.get_io()
+        if io.want_text_input or self.parser is None:
+            return
+        modes = self.parser.screen.mode
+        if (io.key_ctrl and io.key_shift and imgui.is_key_pressed(imgui.Key.v)) \
+                or (io.key_shift and imgui.is_key_pressed(imgui.Key.insert)):
+            self._pending_input.append(encode_paste(imgui.get_clipboard_text() or "", modes))
+            return
+        
+        keys = [key for key in ENCODED_KEYS
+                if imgui.is_key_pressed(key) and not self._reserved_key(key, io)]
+        chars = [chr(c) for c in io.input_queue_characters]
+        if keys or chars:
+            data = encode_frame(keys, chars, io.key_shift, io.key_alt, io.key_ctrl, modes)
+            if data:
+                self._pending_input.append(data)
+
+    @staticmethod
+    def _reserved_key(key, io) -> bool:
+        # Shift+paging scrolls history, Ctrl +/-/0 zooms and CTRL_SHIFT_SHORTCUTS belong to
+        # the app; none of them reach the child.
+        if io.key_shift and key in (imgui.Key.page_up, imgui.Key.page_down,
+                                    imgui.Key.home, imgui.Key.end):
+            return True
+        if io.key_shift and io.key_ctrl:
+            return key in TerminalTab.CTRL_SHIFT_SHORTCUTS
+        if io.key_ctrl:
+            return key in (imgui.Key.equal, imgui.Key.minus, imgui.Key._0,
+                           imgui.Key.keypad_add, imgui.Key.keypad_subtract)
+        return False
+
+    def _flush_input(self) -> None:
+        # Everything typed this frame goes out in a single write.
+        if not self._pending_input:
+            return
+        data = "".join(self._pending_input)
+        self._pending_input.clear()
+        self._follow_output = True
+        self._send_input(data)
+
+    def _render_lines(self) -> None:
+        palette = self.theme_manager.palette
+        cell_width = imgui.calc_text_size("M").x
+        line_height = imgui.get_text_line_height()
+        draw_list = imgui.get_window_draw_list()
+        row_width = self.cols * cell_width
+        parser = self.parser
+        
+        imgui.push_style_var(imgui.StyleVar_.item_spacing, (0, 0))
         
-        imgui.push_item_width(-1)
-        if imgui.input_text("##input", self._input_buffer, 
-                           imgui.InputTextFlags_.enter_returns_true):
-            if self._input_buffer:
-                self._send_input(self._input_buffer + "\n")
-                self._input_buffer = ""
-        imgui.pop_item_width()
+        # Fixed-height rows let the clipper skip straight to the visible window,
+        # so only on-screen lines are ever pulled out of scrollback.
+        origin = imgui.get_cursor_screen_pos()
+        visible_start = visible_end = None
+        clipper = imgui.ListClipper()
+        clipper.begin(parser.total_lines(), line_height)
+        while clipper.step():
+            if visible_start is None:
+                visible_start = clipper.display_start
+            visible_end = clipper.display_end
+            for i in range(clipper.display_start, clipper.display_end):
+                pos = imgui.get_cursor_screen_pos()
+                line = parser.get_line(i)
+                matches = self.triggers.matches(line, self.cols) if self.triggers else None
+                if matches:
+                    self._render_matches(draw_list, pos.x, pos.y, cell_width, line_height, matches, False)
+                self._render_row(draw_list, palette, pos.x, pos.y,
+                                 cell_width, line_height, line)
+                if matches:
+                    self._render_matches(draw_list, pos.x, pos.y, cell_width, line_height, matches, True)
+                imgui.dummy((row_width, line_height))
+        clipper.end()
+        
+        if self.triggers is not None and imgui.is_window_hovered() and imgui.get_io().key_ctrl:
+            self._handle_link_click(origin.x, origin.y, cell_width, line_height)
+        if self.graphics is not None and self.texture_cache is not None and visible_start is not None:
+            self._render_images(draw_list, origin.x, origin.y, visible_start, visible_end,
+                                cell_width, line_height)
+        
+        imgui.pop_style_var()
+        self._update_scroll(line_height)
+
+    def _render_images(self, draw_list, x0: float, y0: float, start: int, stop: int,
+                       cell_width: float, line_height: float) -> None:
+        first = self.scrollback.first_index
+        for placement in self.graphics.visible(start + first, stop + first):
+            image = placement.image
+            texture = self.texture_cache.get(image.key, image.pixels)
+            if texture is None:
+                continue
+            if placement.stretch:
+                width, height = placement.cols * cell_width, placement.rows * line_height
+            else:
+                cell_w, cell_h = placement.cell_size
+                width = image.width * cell_width / cell_w
+                height = image.height * line_height / cell_h
+            x = x0 + placement.col * cell_width
+            y = y0 + (placement.line - first) * line_height
+            draw_list.add_image(texture, (x, y), (x + width, y + height))
+
+    def _render_matches(self, draw_list, x: float, y: float, cell_width: float,
+                        line_height: float, matches, links: bool) -> None:
+        # Highlights go under the text, link underlines over it.
+        for start, end, index, _ in matches:
+            trigger = self.triggers.triggers[index]
+            if (trigger.action == "link") != links:
+                continue
+            color = imgui.color_convert_float4_to_u32(trigger.color)
+            x0, x1 = x + start * cell_width, x + end * cell_width
+            if links:
+                draw_list.add_line((x0, y + line_height - 1), (x1, y + line_height - 1), color)
+            else:
+                draw_list.add_rect_filled((x0, y), (x1, y + line_height), color)
+
+    def _handle_link_click(self, x0: float, y0: float, cell_width: float, line_height: float) -> None:
+        # Ctrl+click opens URLs and copies other links (file:line) to the clipboard.
+        mouse = imgui.get_mouse_pos()
+        line = int((mouse.y - y0) // line_height)
+        col = int((mouse.x - x0) // cell_width)
+        if not (0 <= line < self.parser.total_lines() and 0 <= col < self.cols):
+            return
+        hit = self.triggers.match_at(self.parser.get_line(line), self.cols, col)
+        if hit is None or hit[0].action != "link":
+            return
+        imgui.set_mouse_cursor(imgui.MouseCursor_.hand)
+        if not imgui.is_mouse_clicked(imgui.MouseButton_.left):
+            return
+        text = hit[1]
+        if "://" in text:
+            try:
+                webbrowser.open_new_tab(text)
+            except Exception as e:
+                print(f"Failed to open {text}: {e}")
+        else:
+            imgui.set_clipboard_text(text)
+
+    def _update_scroll(self, line_height: float) -> None:
+        io = imgui.get_io()
+        scroll_y = imgui.get_scroll_y()
+        scroll_max = imgui.get_scroll_max_y()
+        
+        # Anything that moved the view without us (e.g. scrollbar drag) becomes the new target.
+        if abs(scroll_y - self._last_scroll_y) > 0.5:
+            self._scroll_target = scroll_y
+        
+        target = self._scroll_target
+        if imgui.is_window_hovered() and io.mouse_wheel:
+            target -= io.mouse_wheel * self.WHEEL_LINES * line_height
+        
+        if io.key_shift:
+            page = max(1, self.rows - 1) * line_height
+            if imgui.is_key_pressed(imgui.Key.page_up):
+                target -= page
+            elif imgui.is_key_pressed(imgui.Key.page_down):
+                target += page
+            elif imgui.is_key_pressed(imgui.Key.home):
+                target = 0.0
+            elif imgui.is_key_pressed(imgui.Key.end):
+                target = scroll_max
+        if io.key_ctrl and io.key_shift:
+            target = self._handle_prompt_keys(scroll_y, scroll_max, target, line_height)
+        
+        if target != self._scroll_target:
+            self._follow_output = target >= scroll_max - 0.5
+        if self._follow_output:
+            target = scroll_max
+        target = max(0.0, min(target, scroll_max))
+        
+        if self._follow_output or abs(target - scroll_y) <= 0.5:
+            new_scroll = target
+        else:
+            new_scroll = scroll_y + (target - scroll_y) * self.SCROLL_SMOOTHING
+        
+        if new_scroll != scroll_y:
+            imgui.set_scroll_y(new_scroll)
+        self._scroll_target = target
+        self._last_scroll_y = new_scroll
+
+    def _handle_prompt_keys(self, scroll_y: float, scroll_max: float, target: float,
+                            line_height: float) -> float:
+        # Ctrl+Shift+Up/Down jump between prompts, Ctrl+Shift+O copies a command's output.
+        first = self.scrollback.first_index
+        top = int(scroll_y / line_height + 0.5) + first
+        if imgui.is_key_pressed(imgui.Key.up_arrow):
+            command = self.prompts.previous(top)
+            if command is not None:
+                target = (max(command.prompt_line, first) - first) * line_height
+        elif imgui.is_key_pressed(imgui.Key.down_arrow):
+            command = self.prompts.next(top)
+            target = (command.prompt_line - first) * line_height if command else scroll_max
+        elif imgui.is_key_pressed(imgui.Key.o):
+            # Following output means "the command that just ran"; otherwise the one in view.
+            if self._follow_output:
+                commands = [c for c in self.prompts.commands[-2:] if c.output_line is not None]
+                command = commands[-1] if commands else None
+            else:
+                command = self.prompts.at(top)
+            if command is not None:
+                imgui.set_clipboard_text(self.command_output(command))
+        return target
+
+    def _render_row(self, draw_list, palette, x: float, y: float,
+                    cell_width: float, line_height: float, line) -> None:
+        run_start = 0
+        run_text = []
+        run_key = None
         
-        if imgui.is_item_focused():
-            io = imgui.get_io()
-            for c in io.input_queue_characters:
-                self._send_input(chr(c))
+        for col in range(self.cols + 1):
+            if col < self.cols:
+                char = line[col]
+                fg, bg = char.fg, char.bg
+                if char.reverse:
+                    key = (palette.bg(bg), palette.fg(fg))
+                else:
+                    key = (palette.fg(fg), palette.bg(bg))
+                if key == run_key:
+                    run_text.append(char.data)
+                    continue
+            
+            if run_key is not None:
+                fg_col, bg_col = run_key
+                x0 = x + run_start * cell_width
+                if bg_col != palette.default_bg:
+                    draw_list.add_rect_filled((x0, y), (x + col * cell_width, y + line_height), bg_col)
+                text = "".join(run_text)
+                if text.strip():
+                    draw_list.add_text((x0, y), fg_col, text)
+            
+            if col < self.cols:
+                run_start = col
+                run_text = [char.data]
+                run_key = key
 
     def close(self) -> None:
         if self.pty_id is not None:
             self.pty_manager.close(self.pty_id)
             self.pty_id = None
+        if self.output_log:
+            self.output_log.close()
+            self.output_log = None
+        if self.graphics is not None:
+            self.graphics.clear()
@@ -0,0 +1,258 @@
+"""Output triggers: highlights, links and notifications from one multi-pattern pass per changed row."""
+
+import re
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+try:
+    from re import _parser as _sre_parse
+    from re._constants import BRANCH as _BRANCH, LITERAL as _LITERAL, SUBPATTERN as _SUBPATTERN
+except ImportError:  # Python < 3.11
+    import sre_parse as _sre_parse
+    from sre_constants import BRANCH as _BRANCH, LITERAL as _LITERAL, SUBPATTERN as _SUBPATTERN
+
+
+ACTIONS = ("highlight", "link", "notify")
+
+BUILTIN_TRIGGERS = [
+    {"name": "error", "pattern": r"\b(?:ERROR|FAILED|FAIL|FATAL)\b", "action": "highlight",
+     "color": [0.9, 0.2, 0.2, 0.35]},
+    {"name": "url", "pattern": r"\b(?:https?|ftp|file)://[^\s<>\"'`]+[^\s<>\"'`.,;:!?)\]]",
+     "action": "link", "color": [0.3, 0.6, 1.0, 0.9]},
+    {"name": "file_line", "pattern": r"(?:[\w.~-]*/)*[\w.-]+\.\w+:\d+(?::\d+)?",
+     "action": "link", "color": [0.6, 0.8, 0.4, 0.9], "literals": [":"]},
+]
+
+# (start column, end column, trigger index, matched text)
+Match = Tuple[int, int, int, str]
+
+
+def _score(literals: List[str]) -> int:
+    return min(map(len, literals)) if literals else 0
+
+
+def _best_literals(items: list) -> List[str]:
+    # Picks the most selective required piece of a parsed pattern: a run of plain
+    # characters, or a group whose alternatives are all literal (any one must appear).
+    best: List[str] = []
+    run: List[str] = []
+    for op, av in items + [(None, None)]:
+        if op is _LITERAL:
+            run.append(chr(av))
+            continue
+        if len(run) > _score(best):
+            best = ["".join(run)]
+        run = []
+        if op is _SUBPATTERN:
+            inner = _best_literals(list(av[-1]))
+            if _score(inner) > _score(best):
+                best = inner
+        elif op is _BRANCH:
+            alternatives: List[str] = []
+            for branch in av[1]:
+                literals = _best_literals(list(branch))
+                if not literals:
+                    alternatives = []
+                    break
+                alternatives.extend(literals)
+            if _score(alternatives) > _score(best):
+                best = alternatives
+    return best
+
+
+def required_literals(pattern: str, flags: int = 0) -> List[str]:
+    # Strings of which every match contains at least one; [] means none could be
+    # proven and the trigger skips the prefilter.
+    try:
+        return _best_literals(list(_sre_parse.parse(pattern, flags)))
+    except Exception:
+        return []
+
+
+class AhoCorasick:
+    # Literal automaton: one left-to-right pass reports every literal present in the text.
+
+    def __init__(self, literals: Sequence[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._out: List[FrozenSet[int]] = [frozenset()]
+        fail = [0]
+        for index, literal in enumerate(literals):
+            state = 0
+            for char in literal:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][char] = nxt
+                    self._goto.append({})
+                    self._out.append(frozenset())
+                    fail.append(0)
+                state = nxt
+            self._out[state] = self._out[state] | {index}
+
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and char not in self._goto[f]:
+                    f = fail[f]
+                fail[nxt] = self._goto[f].get(char, 0)
+                self._out[nxt] = self._out[nxt] | self._out[fail[nxt]]
+        self._fail = fail
+
+    def search(self, text: str) -> FrozenSet[int]:
+        goto, fail, out = self._goto, self._fail, self._out
+        found: FrozenSet[int] = frozenset()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                found = found | out[state]
+        return found
+
+
+class Trigger:
+    def __init__(self, name: str, pattern: str, action: str = "highlight",
+                 color: Optional[Sequence[float]] = None, literals: Optional[Sequence[str]] = None,
+                 ignore_case: bool = False):
+        self.name = name
+        self.pattern = pattern
+        self.action = action if action in ACTIONS else "highlight"
+        self.color = tuple(color) if color else (1.0, 0.8, 0.2, 0.35)
+        self.flags = re.IGNORECASE if ignore_case else 0
+        re.compile(pattern, self.flags)  # fail early on a bad user pattern
+        if literals is None:
+            literals = required_literals(pattern, self.flags)
+        # The automaton runs over lowercased text, so literals are lowercased too.
+        self.literals = [literal.lower() for literal in literals if literal]
+
+    @classmethod
+    def from_dict(cls, spec: Dict[str, Any]) -> "Trigger":
+        return cls(spec.get("name", spec["pattern"]), spec["pattern"], spec.get("action", "highlight"),
+                   spec.get("color"), spec.get("literals"), spec.get("ignore_case", False))
+
+
+class TriggerEngine:
+    MAX_REGEX_CACHE = 64
+
+    def __init__(self, triggers: Sequence[Trigger],
+                 on_notify: Optional[Callable[[Trigger, str], None]] = None):
+        self.triggers = list(triggers)
+        self.on_notify = on_notify
+        # Every literal of every trigger goes into one automaton; _owner maps back.
+        self._owner = [i for i, t in enumerate(self.triggers) for _ in t.literals]
+        self._always = frozenset(i for i, t in enumerate(self.triggers) if not t.literals)
+        self._automaton = AhoCorasick([literal for t in self.triggers for literal in t.literals])
+        # One alternation per candidate set; named groups say which trigger matched.
+        self._regexes: "OrderedDict[FrozenSet[int], re.Pattern]" = OrderedDict()
+        # id(row) -> (weakref to row, matches); rows are dicts and can't key a WeakKeyDictionary.
+        self._cache: Dict[int, Tuple[Any, List[Match]]] = {}
+        self._stats = {"rows": 0, "prefiltered": 0, "regex": 0}
+
+    @classmethod
+    def from_config(cls, config: Any,
+                    on_notify: Optional[Callable[[Trigger, str], None]] = None) -> Optional["TriggerEngine"]:
+        specs = (list(BUILTIN_TRIGGERS) if config["trigger_builtins"] else []) + list(config["triggers"])
+        triggers = []
+        for spec in specs:
+            try:
+                triggers.append(Trigger.from_dict(spec))
+            except Exception as e:
+                print(f"Ignoring trigger {spec!r}: {e}")
+        return cls(triggers, on_notify) if triggers else None
+
+    def _regex(self, candidates: FrozenSet[int]) -> "re.Pattern":
+        regex = self._regexes.get(candidates)
+        if regex is not None:
+            self._regexes.move_to_end(candidates)
+            return regex
+        parts = []
+        for i in sorted(candidates):
+            trigger = self.triggers[i]
+            body = f"(?i:{trigger.pattern})" if trigger.flags & re.IGNORECASE else f"(?:{trigger.pattern})"
+            parts.append(f"(?P<t{i}>{body})")
+        regex = re.compile("|".join(parts))
+        self._regexes[candidates] = regex
+        if len(self._regexes) > self.MAX_REGEX_CACHE:
+            self._regexes.popitem(last=False)
+        return regex
+
+    def _scan(self, row: Any, columns: int) -> List[Match]:
+        self._stats["rows"] += 1
+        cells = [row[x].data for x in range(columns)]
+        text = "".join(cells)
+        if not text.strip():
+            return []
+        found = self._automaton.search(text.lower())
+        candidates = frozenset(self._owner[i] for i in found) | self._always
+        if not candidates:
+            self._stats["prefiltered"] += 1
+            return []
+
+        self._stats["regex"] += 1
+        # Wide characters leave "" stubs and clusters span several codepoints, so map
+        # text offsets back to columns unless the row is one codepoint per cell.
+        column_of = None
+        if len(text) != columns:
+            column_of = []
+            for x, data in enumerate(cells):
+                column_of.extend([x] * len(data))
+            column_of.append(columns)
+
+        matches = []
+        for m in self._regex(candidates).finditer(text):
+            if m.end() == m.start():
+                continue
+            index = int(m.lastgroup[1:])
+            start, end = m.start(), m.end()
+            if column_of is not None:
+                start, end = column_of[start], column_of[end - 1] + 1
+            matches.append((start, end, index, m.group()))
+        return matches
+
+    def _store(self, row: Any, matches: List[Match]) -> Optional[List[Match]]:
+        key = id(row)
+        previous = self._cache.get(key)
+        if previous is not None and previous[0]() is row:
+            old = previous[1]
+        else:
+            old = None
+        cache = self._cache
+        self._cache[key] = (weakref.ref(row, lambda _, key=key: cache.pop(key, None)), matches)
+        return old
+
+    def scan_rows(self, rows: Sequence[Any], columns: int) -> None:
+        # Rows that changed since the last frame. Notifications fire only for matches the
+        # row didn't already have, so redraws and scrolling don't repeat them.
+        for row in rows:
+            matches = self._scan(row, columns)
+            old = self._store(row, matches)
+            if self.on_notify is None:
+                continue
+            for start, end, index, text in matches:
+                trigger = self.triggers[index]
+                if trigger.action == "notify" and (old is None or (start, end, index, text) not in old):
+                    self.on_notify(trigger, text)
+
+    def matches(self, row: Any, columns: int) -> List[Match]:
+        # Render-time lookup; rows never scanned (e.g. restored history) are scanned once here.
+        entry = self._cache.get(id(row))
+        if entry is not None and entry[0]() is row:
+            return entry[1]
+        matches = self._scan(row, columns)
+        self._store(row, matches)
+        return matches
+
+    def match_at(self, row: Any, columns: int, col: int) -> Optional[Tuple[Trigger, str]]:
+        for start, end, index, text in self.matches(row, columns):
+            if start <= col < end:
+                return self.triggers[index], text
+        return None
+
+    def get_stats(self) -> dict:
+        stats = dict(self._stats)
+        stats["cached_rows"] = len(self._cache)
+        return stats
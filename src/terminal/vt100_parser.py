@@ -1,23 +1,237 @@
 """VT100/ANSI escape sequence parser using pyte."""
 
+import codecs
+import re
 import pyte
-from typing import Optional
+from typing import List, Optional, Callable
+
+from src.terminal.graphics import GraphicsStore, split_sixel
+from src.terminal.prompt_index import PromptIndex
+from src.terminal.screen import BrutalScreen
+from src.terminal.scrollback import Scrollback
+from src.terminal.snapshot import encode_screen, decode_screen, apply_diff
+from src.utils.tracing import traced
+
+
+# Sequences cut out of the text before it reaches pyte: it reads a single-character
+# OSC code, so "133;A" would arrive as an icon name, and it has no DCS/APC support,
+# so Sixel and kitty image data would be drawn as text. It also drops the ">" of
+# xterm's CSI > 4 ; n m (modifyOtherKeys), turning it into an SGR, and ignores the
+# keypad modes ESC = / ESC >; those short ones are handled here in full.
+_INTRODUCER = re.compile(r"\x1b(?:\]133;|P|_|\[>[\d;]*[mn]|[=>])")
+# A trailing piece of an introducer held back until the next read completes it.
+_PARTIAL = re.compile(r"\x1b(?:\](?:1(?:33?)?)?|\[(?:>[\d;]*)?)?\Z")
+ST = "\x1b\\"
+MAX_MARK_LENGTH = 256
 
 
 class VT100Parser:
-    def __init__(self, cols: int = 80, rows: int = 24):
+    MAX_SEQUENCE_BYTES = 32 * 1024 * 1024
+
+    def __init__(self, cols: int = 80, rows: int = 24,
+                 on_text: Optional[Callable[[str], None]] = None,
+                 scrollback: Optional[Scrollback] = None,
+                 prompts: Optional[PromptIndex] = None,
+                 graphics: Optional[GraphicsStore] = None,
+                 on_reply: Optional[Callable[[bytes], None]] = None):
         self.cols = cols
         self.rows = rows
-        self.screen = pyte.Screen(cols, rows)
-        self.stream = pyte.Stream(self.screen)
+        self.scrollback = scrollback if scrollback is not None else Scrollback()
+        self.prompts = prompts
+        self.graphics = graphics
+        self.on_reply = on_reply
+        self._set_screen(BrutalScreen(cols, rows, self.scrollback))
+        self.on_text = on_text
+        # Reads and parse chunks can split a UTF-8 sequence; the decoder holds the partial bytes.
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._carry = ""
+        # An unterminated OSC 133 / DCS / APC string: its kind and the pieces read so far.
+        self._seq: Optional[List[str]] = None
+        self._seq_kind = ""
+        self._seq_size = 0
+        self._seq_dropped = False
+
+    def _set_screen(self, screen: BrutalScreen) -> None:
+        self.screen = screen
+        self.stream = pyte.Stream(screen)
+        if self.graphics is not None:
+            screen.on_erase = self._erase_graphics
 
+    @traced("parser.feed", "parser")
     def feed(self, data: bytes) -> None:
         try:
-            text = data.decode("utf-8", errors="replace")
-            self.stream.feed(text)
+            text = self._decoder.decode(data)
+            if not text:
+                return
+            if self.on_text:
+                self.on_text(text)
+            self._scan(text)
         except Exception:
             pass
 
+    def _scan(self, text: str) -> None:
+        if self._carry:
+            text = self._carry + text
+            self._carry = ""
+        pos = 0
+        while pos < len(text):
+            if self._seq is not None:
+                pos = self._continue_sequence(text, pos)
+                continue
+            m = _INTRODUCER.search(text, pos)
+            if m is None:
+                break
+            if m.start() > pos:
+                self.stream.feed(text[pos:m.start()])
+            if m.group()[1] in "[=>":
+                self._key_mode(m.group())
+                pos = m.end()
+                continue
+            self._seq = []
+            self._seq_kind = m.group()[1]
+            self._seq_size = 0
+            self._seq_dropped = False
+            pos = m.end()
+        else:
+            return
+
+        tail = text[pos:]
+        m = _PARTIAL.search(tail)
+        if m is not None:
+            self._carry = m.group()
+            tail = tail[:m.start()]
+        if tail:
+            self.stream.feed(tail)
+
+    def _continue_sequence(self, text: str, pos: int) -> int:
+        pieces = self._seq
+        # ST split across reads: the previous piece ended in ESC.
+        if pieces and pieces[-1].endswith("\x1b") and text.startswith("\\", pos):
+            pieces[-1] = pieces[-1][:-1]
+            self._finish_sequence()
+            return pos + 1
+
+        end, term = text.find(ST, pos), 2
+        if self._seq_kind == "]":
+            bel = text.find("\x07", pos)
+            if bel >= 0 and (end < 0 or bel < end):
+                end, term = bel, 1
+        if end >= 0:
+            pieces.append(text[pos:end])
+            self._finish_sequence()
+            return end + term
+
+        piece = text[pos:]
+        self._seq_size += len(piece)
+        if self._seq_kind == "]" and self._seq_size > MAX_MARK_LENGTH:
+            # Not a real mark; let pyte consume it as the OSC string it is.
+            self.stream.feed("\x1b]133;" + "".join(pieces) + piece)
+            self._seq = None
+            return len(text)
+        if self._seq_size > self.MAX_SEQUENCE_BYTES:
+            # Oversized: keep consuming up to the terminator but stop storing it.
+            self._seq_dropped = True
+            piece = piece[-1:]
+            pieces.clear()
+        pieces.append(piece)
+        return len(text)
+
+    def _finish_sequence(self) -> None:
+        body = "".join(self._seq)
+        kind, dropped = self._seq_kind, self._seq_dropped
+        self._seq = None
+        if dropped or self.screen.in_alternate:
+            return
+        if kind == "]":
+            if self.prompts is not None:
+                self._mark(body)
+        elif self.graphics is None:
+            return
+        elif kind == "P":
+            sixel = split_sixel(body)
+            if sixel is not None:
+                self._place_sixel(*sixel)
+        elif body.startswith("G"):
+            self._place_kitty(body)
+
+    def _key_mode(self, sequence: str) -> None:
+        if sequence == "\x1b=":
+            self.screen.set_keypad_application(True)
+        elif sequence == "\x1b>":
+            self.screen.set_keypad_application(False)
+        else:
+            # CSI > 4 ; n m sets modifyOtherKeys, CSI > 4 n resets it; other resources are ignored.
+            params = sequence[3:-1].split(";")
+            if params[0] == "4":
+                level = int(params[1] or 0) if len(params) > 1 and sequence[-1] == "m" else 0
+                self.screen.set_modify_other_keys(level)
+
+    def _mark(self, body: str) -> None:
+        screen = self.screen
+        if not body:
+            return
+        kind, _, rest = body.partition(";")
+        params = rest.split(";") if rest else []
+        line = self.scrollback.total_appended + screen.cursor.y
+        self.prompts.mark(kind, line, screen.cursor.x, params)
+        if kind == "A":
+            self.prompts.prune(self.scrollback.first_index)
+
+    def _place_sixel(self, params: str, data: str) -> None:
+        # The image takes its rows now (decoding happens elsewhere) and text continues below it.
+        screen = self.screen
+        line = self.scrollback.total_appended + screen.cursor.y
+        rows, _ = self.graphics.sixel(params, data, line, screen.cursor.x, screen.lines)
+        for _ in range(rows):
+            screen.index()
+        screen.carriage_return()
+
+    def _place_kitty(self, body: str) -> None:
+        screen = self.screen
+        line = self.scrollback.total_appended + screen.cursor.y
+        rows, cols, reply = self.graphics.kitty(body, line, screen.cursor.x, screen.lines)
+        if rows:
+            for _ in range(rows - 1):
+                screen.index()
+            screen.cursor_forward(cols)
+        if reply and self.on_reply:
+            self.on_reply(reply.encode("utf-8"))
+
+    def _erase_graphics(self) -> None:
+        self.graphics.clear_from(self.scrollback.total_appended)
+
+    @classmethod
+    def from_snapshot(cls, blob: bytes,
+                      on_text: Optional[Callable[[str], None]] = None,
+                      scrollback: Optional[Scrollback] = None,
+                      prompts: Optional[PromptIndex] = None,
+                      graphics: Optional[GraphicsStore] = None,
+                      on_reply: Optional[Callable[[bytes], None]] = None) -> "VT100Parser":
+        parser = cls(on_text=on_text, scrollback=scrollback, prompts=prompts,
+                     graphics=graphics, on_reply=on_reply)
+        screen = decode_screen(blob, lambda c, r: BrutalScreen(c, r, parser.scrollback))
+        parser.cols, parser.rows = screen.columns, screen.lines
+        parser._set_screen(screen)
+        return parser
+
+    def snapshot(self) -> bytes:
+        return encode_screen(self.screen)
+
+    def load_snapshot(self, blob: bytes) -> None:
+        self._set_screen(decode_screen(blob, lambda c, r: BrutalScreen(c, r, self.scrollback)))
+        self.cols, self.rows = self.screen.columns, self.screen.lines
+
+    @traced("parser.apply_diff", "parser")
+    def apply_diff(self, blob: bytes) -> int:
+        # Screen updates computed elsewhere (the session daemon); returns its history total.
+        history, history_total, text = apply_diff(self.screen, blob)
+        for line in history:
+            self.scrollback.append(line)
+        self.cols, self.rows = self.screen.columns, self.screen.lines
+        if self.on_text and text:
+            self.on_text(text)
+        return history_total
+
     def resize(self, cols: int, rows: int) -> None:
         self.cols = cols
         self.rows = rows
@@ -29,6 +243,16 @@ class VT100Parser:
     def get_buffer(self) -> list:
         return self.screen.buffer
 
+    def get_line(self, index: int):
+        # Index space is scrollback followed by the live screen rows.
+        history = len(self.scrollback)
+        if index < history:
+            return self.scrollback[index]
+        return self.screen.buffer[index - history]
+
+    def total_lines(self) -> int:
+        return len(self.scrollback) + self.rows
+
     def get_cursor_position(self) -> tuple:
         return self.screen.cursor.x, self.screen.cursor.y
 
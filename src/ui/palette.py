@@ -0,0 +1,96 @@
+"""Packed ImU32 color palettes for pyte cell colors, precomputed per theme."""
+
+from functools import lru_cache
+from typing import Dict, Tuple
+
+from pyte.graphics import FG_BG_256
+
+
+Color = Tuple[float, float, float, float]
+
+ANSI_NAMES = [
+    "black", "red", "green", "brown", "blue", "magenta", "cyan", "white",
+]
+
+
+def pack_rgba(r: int, g: int, b: int, a: int = 255) -> int:
+    return (a << 24) | (b << 16) | (g << 8) | r
+
+
+def pack_color(color: Color) -> int:
+    return pack_rgba(
+        int(color[0] * 255 + 0.5),
+        int(color[1] * 255 + 0.5),
+        int(color[2] * 255 + 0.5),
+        int(color[3] * 255 + 0.5),
+    )
+
+
+def _parse_hex(value: str) -> int:
+    try:
+        return pack_rgba(int(value[0:2], 16), int(value[2:4], 16), int(value[4:6], 16))
+    except ValueError:
+        return 0
+
+
+# Truecolor values are theme independent, so one bounded cache serves every palette.
+pack_hex = lru_cache(maxsize=4096)(_parse_hex)
+
+
+class Palette:
+    def __init__(self, theme: dict):
+        self.default_fg = pack_color(theme["fg"])
+        self.default_bg = pack_color(theme["bg"])
+
+        table = [_parse_hex(h) for h in FG_BG_256]
+        # Theme the ends of the ANSI range so black/white follow the theme background/foreground.
+        table[0] = self.default_bg
+        table[7] = self.default_fg
+        table[8] = pack_color(theme["border"])
+        table[15] = self.default_fg
+
+        self.table_256 = table
+        self._named: Dict[str, int] = {"default": self.default_fg}
+        for i, name in enumerate(ANSI_NAMES):
+            self._named[name] = table[i]
+            self._named["bright" + name] = table[i + 8]
+        # pyte misspells one aixterm background name.
+        self._named["bfightmagenta"] = table[13]
+
+        self._by_hex: Dict[str, int] = {}
+        for i, value in enumerate(FG_BG_256):
+            self._by_hex.setdefault(value, table[i])
+
+        self._bg_named = dict(self._named)
+        self._bg_named["default"] = self.default_bg
+
+    def fg(self, color: str) -> int:
+        packed = self._named.get(color)
+        if packed is not None:
+            return packed
+        packed = self._by_hex.get(color)
+        if packed is not None:
+            return packed
+        return pack_hex(color)
+
+    def bg(self, color: str) -> int:
+        packed = self._bg_named.get(color)
+        if packed is not None:
+            return packed
+        packed = self._by_hex.get(color)
+        if packed is not None:
+            return packed
+        return pack_hex(color)
+
+
+class PaletteCache:
+    def __init__(self):
+        self._palettes: Dict[Tuple, Palette] = {}
+
+    def get(self, theme: dict) -> Palette:
+        key = (theme["name"], theme["fg"], theme["bg"], theme["border"])
+        palette = self._palettes.get(key)
+        if palette is None:
+            palette = Palette(theme)
+            self._palettes[key] = palette
+        return palette
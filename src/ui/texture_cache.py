@@ -0,0 +1,60 @@
+"""Bounded LRU of GPU textures shared by inline terminal images and the chrome background."""
+
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+import numpy as np
+from imgui_bundle import hello_imgui, imgui
+
+
+class TextureCache:
+    # UI thread only: textures are created and freed on the thread that owns the GL context.
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._textures: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes = {}
+        self.nbytes = 0
+        self._stats = {"uploads": 0, "evictions": 0}
+
+    def get(self, key: Hashable, pixels: Optional[np.ndarray] = None) -> Optional[imgui.ImTextureRef]:
+        # Returns a texture for key, uploading pixels (HxWx4 uint8 RGBA) on a miss.
+        texture = self._textures.get(key)
+        if texture is not None:
+            self._textures.move_to_end(key)
+            return imgui.ImTextureRef(texture.texture_id)
+        if pixels is None:
+            return None
+        texture = hello_imgui.create_texture_gpu_from_rgba_data(pixels)
+        self._textures[key] = texture
+        self._sizes[key] = pixels.nbytes
+        self.nbytes += pixels.nbytes
+        self._stats["uploads"] += 1
+        self.evict(self.nbytes - self.max_bytes, keep=key)
+        return imgui.ImTextureRef(texture.texture_id)
+
+    def evict(self, wanted: int, keep: Optional[Hashable] = None) -> int:
+        # Frees least recently drawn textures until `wanted` bytes are released.
+        freed = 0
+        for key in list(self._textures):
+            if freed >= wanted:
+                break
+            if key == keep:
+                continue
+            freed += self.discard(key)
+            self._stats["evictions"] += 1
+        return freed
+
+    def discard(self, key: Hashable) -> int:
+        # Dropping the last reference to a TextureGpu deletes the GL texture.
+        if self._textures.pop(key, None) is None:
+            return 0
+        size = self._sizes.pop(key)
+        self.nbytes -= size
+        return size
+
+    def get_stats(self) -> dict:
+        stats = dict(self._stats)
+        stats["textures"] = len(self._textures)
+        stats["bytes"] = self.nbytes
+        return stats
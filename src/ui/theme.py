@@ -5,6 +5,7 @@ from typing import Optional
 
 from imgui_bundle import imgui
 
+from src.ui.palette import Palette, PaletteCache
 from src.utils.font_loader import FontLoader
 
 
@@ -55,10 +56,13 @@ class ThemeManager:
     ]
 
     FONT_SIZES = [12, 14, 16, 18, 20]
+    ZOOM_SIZES = [10, 11, 12, 13, 14, 16, 18, 20, 22, 24, 28, 32]
+    DEFAULT_FONT_SIZE = 14
 
     def __init__(self):
         self.current_theme_idx = 0
-        self.font_size = 14
+        self.font_size = self.DEFAULT_FONT_SIZE
+        self._warm_sizes = list(self.ZOOM_SIZES)
         self._theme_data = self.BRUTALIST_THEMES[0]
         
         self.bg_color = self._theme_data["bg"]
@@ -66,7 +70,11 @@ class ThemeManager:
         self.accent_color = self._theme_data["accent"]
         self.border_color = self._theme_data["border"]
         
-        self.font_loader = FontLoader()
+        self._palettes = PaletteCache()
+        self.palette: Palette = self._palettes.get(self._theme_data)
+        
+        # Font scanning happens in a startup stage so the splash isn't held up.
+        self.font_loader = FontLoader(scan=False)
         self.current_font: Optional[imgui.ImFont] = None
 
     def apply_random_theme(self) -> None:
@@ -75,8 +83,12 @@ class ThemeManager:
         self.randomize_font_size()
 
     def load_random_font(self) -> None:
-        if self.font_loader.has_fonts():
-            self.current_font = self.font_loader.load_random_font(self.font_size)
+        # The terminal font is also the base that fallback fonts get merged into.
+        font_paths = self.font_loader.get_available_font_paths()
+        if font_paths:
+            font_path = random.choice(font_paths)
+            self.current_font = self.font_loader.use_as_base_font(font_path, self.font_size)
+            self.reset_prewarm()
 
     def _apply_theme(self) -> None:
         self._theme_data = self.BRUTALIST_THEMES[self.current_theme_idx]
@@ -84,6 +96,7 @@ class ThemeManager:
         self.text_color = self._theme_data["fg"]
         self.accent_color = self._theme_data["accent"]
         self.border_color = self._theme_data["border"]
+        self.palette = self._palettes.get(self._theme_data)
         
         style = imgui.get_style()
         style.window_rounding = 0.0
@@ -138,6 +151,47 @@ class ThemeManager:
     def randomize_font_size(self) -> None:
         self.font_size = random.choice(self.FONT_SIZES)
 
+    def zoom_in(self) -> bool:
+        return self._step_font_size(1)
+
+    def zoom_out(self) -> bool:
+        return self._step_font_size(-1)
+
+    def reset_zoom(self) -> bool:
+        changed = self.font_size != self.DEFAULT_FONT_SIZE
+        self.font_size = self.DEFAULT_FONT_SIZE
+        return changed
+
+    def _step_font_size(self, step: int) -> bool:
+        sizes = self.ZOOM_SIZES
+        nearest = min(range(len(sizes)), key=lambda i: abs(sizes[i] - self.font_size))
+        idx = max(0, min(len(sizes) - 1, nearest + step))
+        if sizes[idx] == self.font_size:
+            return False
+        self.font_size = sizes[idx]
+        return True
+
+    def push_terminal_font(self) -> None:
+        # ImGui 1.92 bakes per-size glyph data on demand, so switching size costs nothing here.
+        imgui.push_font(self.current_font, float(self.font_size))
+
+    def pop_terminal_font(self) -> None:
+        imgui.pop_font()
+
+    def prewarm_font_sizes(self) -> None:
+        if not self._warm_sizes:
+            return
+        
+        # The atlas is owned by the UI thread; warm one size per frame so no frame stalls.
+        size = self._warm_sizes.pop(0)
+        font = self.current_font or imgui.get_font()
+        baked = font.get_font_baked(float(size))
+        for c in range(0x20, 0x7F):
+            baked.find_glyph(c)
+
+    def reset_prewarm(self) -> None:
+        self._warm_sizes = list(self.ZOOM_SIZES)
+
     def cycle_theme(self) -> None:
         self.current_theme_idx = (self.current_theme_idx + 1) % len(self.BRUTALIST_THEMES)
         self._apply_theme()
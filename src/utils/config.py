@@ -0,0 +1,61 @@
+"""User configuration loaded from ~/.brutal/config.json."""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+DEFAULTS: Dict[str, Any] = {
+    "hibernate_after_seconds": 1800.0,
+    "hibernate_wake_bytes": 256 * 1024,
+    "output_buffer_bytes": 4 * 1024 * 1024,
+    "background_output_buffer_bytes": 1024 * 1024,
+    "scrollback_lines": 100_000,
+    "session_daemon": False,
+    "session_socket": None,
+    "restore_sessions": False,
+    "session_save_interval": 5.0,
+    "log_output": False,
+    "log_dir": None,
+    "log_format": "text",
+    "log_max_bytes": 10 * 1024 * 1024,
+    "log_max_age_seconds": 86400.0,
+    "log_compress": True,
+    "log_queue_bytes": 8 * 1024 * 1024,
+    "log_drop_policy": "drop_oldest",
+    "log_fsync_interval": 2.0,
+    "trace_enabled": False,
+    "trace_buffer_events": 65536,
+    "latency_probe": False,
+    "memory_budget_mb": 1024,
+    "memory_check_interval": 2.0,
+    "inline_images": True,
+    "inline_image_max_bytes": 64 * 1024 * 1024,
+    "texture_cache_mb": 256,
+    "trigger_builtins": True,
+    "triggers": [],
+    "trigger_desktop_notify": True,
+}
+
+
+class Config:
+    def __init__(self, path: Optional[Path] = None):
+        self._path = path or Path.home() / ".brutal" / "config.json"
+        self._values: Dict[str, Any] = dict(DEFAULTS)
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            if self._path.exists():
+                with open(self._path, "r") as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    self._values.update(data)
+        except Exception as e:
+            print(f"Failed to read config {self._path}: {e}")
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._values.get(key, default)
+
+    def __getitem__(self, key: str) -> Any:
+        return self._values[key]
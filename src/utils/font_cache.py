@@ -0,0 +1,152 @@
+"""Persisted glyph coverage for the fallback glyph index.
+
+ImGui 1.92 bakes glyphs lazily per size on first use, so there is no prebuilt atlas
+worth caching; the coverage here only feeds GlyphManager, off the UI thread.
+"""
+
+import json
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Optional, List, Dict, Tuple, Sequence
+
+
+Range = Tuple[int, int]
+
+
+def _table_directory(data: bytes) -> Dict[bytes, Tuple[int, int]]:
+    base = 0
+    if data[:4] == b"ttcf":
+        base = struct.unpack_from(">I", data, 12)[0]
+    num_tables = struct.unpack_from(">H", data, base + 4)[0]
+    tables = {}
+    for i in range(num_tables):
+        tag, _, offset, length = struct.unpack_from(">4sIII", data, base + 12 + 16 * i)
+        tables[tag] = (offset, length)
+    return tables
+
+
+def _best_cmap_subtable(data: bytes, cmap_offset: int) -> Optional[int]:
+    num = struct.unpack_from(">H", data, cmap_offset + 2)[0]
+    candidates = {}
+    for i in range(num):
+        platform, encoding, offset = struct.unpack_from(">HHI", data, cmap_offset + 4 + 8 * i)
+        candidates[(platform, encoding)] = cmap_offset + offset
+    for key in ((3, 10), (0, 6), (0, 4), (0, 3), (3, 1), (0, 1), (0, 0)):
+        if key in candidates:
+            return candidates[key]
+    return None
+
+
+def _cmap_ranges(data: bytes, offset: int) -> List[Range]:
+    fmt = struct.unpack_from(">H", data, offset)[0]
+    ranges = []
+    if fmt == 12:
+        n_groups = struct.unpack_from(">I", data, offset + 12)[0]
+        for i in range(n_groups):
+            start, end = struct.unpack_from(">II", data, offset + 16 + 12 * i)
+            ranges.append((start, end))
+    elif fmt == 4:
+        seg_count = struct.unpack_from(">H", data, offset + 6)[0] // 2
+        ends = offset + 14
+        starts = ends + 2 * seg_count + 2
+        for i in range(seg_count):
+            end = struct.unpack_from(">H", data, ends + 2 * i)[0]
+            start = struct.unpack_from(">H", data, starts + 2 * i)[0]
+            if start == 0xFFFF:
+                continue
+            ranges.append((start, end))
+    return ranges
+
+
+def _merge_ranges(ranges: Sequence[Range]) -> List[Range]:
+    merged: List[List[int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(s, e) for s, e in merged]
+
+
+def read_coverage(font_path: Path) -> List[Range]:
+    with open(font_path, "rb") as f:
+        data = f.read()
+
+    tables = _table_directory(data)
+    subtable = _best_cmap_subtable(data, tables[b"cmap"][0]) if b"cmap" in tables else None
+    if subtable is None:
+        return []
+    return _merge_ranges(_cmap_ranges(data, subtable))
+
+
+class FontCache:
+    # Entries are keyed by path and reused while the file's size and mtime are unchanged.
+    CACHE_VERSION = 2
+
+    def __init__(self, cache_dir: Path):
+        self._cache_dir = cache_dir
+        self._cache_file = cache_dir / "atlas.json"
+        self._lock = threading.Lock()
+        self._dirty = False
+
+        self._entries: Dict[str, dict] = {}
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            if self._cache_file.exists():
+                with open(self._cache_file, "r") as f:
+                    data = json.load(f)
+                if data.get("version") == self.CACHE_VERSION:
+                    self._entries = data.get("entries", {})
+        except Exception:
+            pass
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {
+                "version": self.CACHE_VERSION,
+                "entries": self._entries,
+            }
+            self._dirty = False
+        try:
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._cache_file.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self._cache_file)
+        except Exception as e:
+            print(f"Failed to write font cache: {e}")
+
+    def get(self, font_path: Path) -> List[Range]:
+        stat = font_path.stat()
+        with self._lock:
+            entry = self._entries.get(str(font_path))
+        if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime_ns:
+            return [tuple(r) for r in entry["coverage"]]
+
+        coverage = read_coverage(font_path)
+        with self._lock:
+            self._entries[str(font_path)] = {
+                "size": stat.st_size,
+                "mtime": stat.st_mtime_ns,
+                "coverage": [list(r) for r in coverage],
+            }
+            self._dirty = True
+        return coverage
+
+    def prune(self, font_paths: Sequence[Path]) -> None:
+        alive = {str(p) for p in font_paths}
+        with self._lock:
+            for path in [p for p in self._entries if p not in alive]:
+                del self._entries[path]
+                self._dirty = True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._dirty = True
@@ -1,15 +1,21 @@
 """Font loader for Nerd Fonts with extended glyph support."""
 
 import random
+import shutil
+import sys
+import urllib.error
 import urllib.request
 import zipfile
-import io
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, List
+from typing import Optional, List, Dict, Iterable
 
 from imgui_bundle import imgui
 
+from src.utils.font_cache import FontCache
+from src.utils.glyph_manager import GlyphManager
+
 
 class FontLoader:
     POPULAR_NERD_FONTS = {
@@ -20,16 +26,22 @@ class FontLoader:
         "CascadiaCode": "https://github.com/ryanoasis/nerd-fonts/releases/download/v3.3.0/CascadiaCode.zip",
     }
 
-    def __init__(self):
+    DOWNLOAD_CHUNK = 256 * 1024
+    DOWNLOAD_WORKERS = 3
+
+    def __init__(self, scan: bool = True):
         self._fonts_dir = Path.home() / ".brutal" / "fonts"
         self._fonts_dir.mkdir(parents=True, exist_ok=True)
         
         self._loaded_fonts: dict = {}
+        self._font_cache = FontCache(self._fonts_dir / "cache")
+        self.glyph_manager = GlyphManager(self)
         self._available_fonts: List[Path] = []
         self._current_font: Optional[imgui.ImFont] = None
         self._font_size = 16.0
         
-        self._scan_fonts()
+        if scan:
+            self._scan_fonts()
 
     def _scan_fonts(self) -> None:
         self._available_fonts = []
@@ -42,6 +54,9 @@ class FontLoader:
         except Exception:
             pass
         
+        self._font_cache.prune(self._available_fonts)
+        self.glyph_manager.invalidate_index()
+        
         if self._available_fonts:
             print(f"Found {len(self._available_fonts)} fonts in {self._fonts_dir}")
             for f in self._available_fonts[:5]:
@@ -50,34 +65,115 @@ class FontLoader:
                 print(f"  ... and {len(self._available_fonts) - 5} more")
 
     def download_nerd_font(self, font_name: str = "JetBrainsMono") -> bool:
+        ok = self._download_family(font_name)
+        if ok:
+            self._scan_fonts()
+        return ok
+
+    def download_nerd_fonts(self, font_names: Iterable[str],
+                            max_workers: Optional[int] = None) -> Dict[str, bool]:
+        names = list(dict.fromkeys(font_names))
+        with ThreadPoolExecutor(max_workers=max_workers or self.DOWNLOAD_WORKERS) as pool:
+            results = dict(zip(names, pool.map(self._download_family, names)))
+        if any(results.values()):
+            self._scan_fonts()
+        return results
+
+    def _font_url(self, font_name: str) -> str:
+        # Lets provisioning and tests point at a mirror or a local stand-in server.
+        mirror = os.environ.get("BRUTAL_NERD_FONTS_URL")
+        if mirror:
+            return f"{mirror.rstrip('/')}/{font_name}.zip"
+        return self.POPULAR_NERD_FONTS[font_name]
+
+    def _download_family(self, font_name: str) -> bool:
         if font_name not in self.POPULAR_NERD_FONTS:
             print(f"Unknown font: {font_name}. Available: {list(self.POPULAR_NERD_FONTS.keys())}")
             return False
         
-        url = self.POPULAR_NERD_FONTS[font_name]
+        url = self._font_url(font_name)
+        downloads_dir = self._fonts_dir / ".downloads"
+        downloads_dir.mkdir(parents=True, exist_ok=True)
+        part_path = downloads_dir / f"{font_name}.zip.part"
+        
         print(f"Downloading {font_name} Nerd Font...")
         
         try:
-            req = urllib.request.Request(url, headers={'User-Agent': 'BrutalTerm/1.0'})
-            with urllib.request.urlopen(req, timeout=60) as response:
-                zip_data = response.read()
-            
-            with zipfile.ZipFile(io.BytesIO(zip_data)) as zf:
-                for name in zf.namelist():
-                    if name.endswith('.ttf') and 'NerdFont' in name:
-                        if 'Mono' in name or 'Regular' in name:
-                            target_path = self._fonts_dir / os.path.basename(name)
-                            if not target_path.exists():
-                                with zf.open(name) as src, open(target_path, 'wb') as dst:
-                                    dst.write(src.read())
-                                print(f"  Extracted: {target_path.name}")
-            
-            self._scan_fonts()
+            self._fetch_to_file(url, part_path)
+            extracted = self._extract_fonts(part_path)
+            part_path.unlink()
+            print(f"  {font_name}: {extracted} font files extracted")
             return True
+        except zipfile.BadZipFile as e:
+            # Corrupt archive; a resumed download would stay corrupt, so start over next time.
+            part_path.unlink(missing_ok=True)
+            print(f"Failed to download font {font_name}: {e}")
+            return False
         except Exception as e:
-            print(f"Failed to download font: {e}")
+            print(f"Failed to download font {font_name}: {e}")
             return False
 
+    def _fetch_to_file(self, url: str, part_path: Path) -> None:
+        offset = part_path.stat().st_size if part_path.exists() else 0
+        headers = {'User-Agent': 'BrutalTerm/1.0'}
+        if offset:
+            headers['Range'] = f"bytes={offset}-"
+        
+        req = urllib.request.Request(url, headers=headers)
+        try:
+            response = urllib.request.urlopen(req, timeout=60)
+        except urllib.error.HTTPError as e:
+            if e.code != 416:
+                raise
+            # Range not satisfiable: the partial file already holds everything.
+            return
+        
+        with response:
+            if response.status == 206:
+                mode = 'ab'
+                content_range = response.headers.get('Content-Range', '')
+                total = content_range.rsplit('/', 1)[-1]
+                expected = int(total) if total.isdigit() else None
+            else:
+                mode = 'wb'
+                length = response.headers.get('Content-Length')
+                expected = int(length) if length and length.isdigit() else None
+            
+            with open(part_path, mode) as dst:
+                shutil.copyfileobj(response, dst, self.DOWNLOAD_CHUNK)
+        
+        size = part_path.stat().st_size
+        if expected is not None and size != expected:
+            raise IOError(f"incomplete download ({size} of {expected} bytes)")
+
+    def _wanted_member(self, name: str) -> bool:
+        base = os.path.basename(name)
+        return (base.endswith('.ttf') and 'NerdFont' in base
+                and ('Mono' in base or 'Regular' in base))
+
+    def _extract_fonts(self, archive_path: Path) -> int:
+        extracted = 0
+        with zipfile.ZipFile(archive_path) as zf:
+            for info in zf.infolist():
+                if info.is_dir() or not self._wanted_member(info.filename):
+                    continue
+                target_path = self._fonts_dir / os.path.basename(info.filename)
+                if target_path.exists() and target_path.stat().st_size == info.file_size:
+                    continue
+                
+                # ZipExtFile verifies the CRC as it streams, so a bad member never lands.
+                tmp_path = target_path.with_suffix(target_path.suffix + ".tmp")
+                try:
+                    with zf.open(info) as src, open(tmp_path, 'wb') as dst:
+                        shutil.copyfileobj(src, dst, self.DOWNLOAD_CHUNK)
+                except Exception:
+                    tmp_path.unlink(missing_ok=True)
+                    raise
+                os.replace(tmp_path, target_path)
+                extracted += 1
+                print(f"  Extracted: {target_path.name}")
+        return extracted
+
     def ensure_default_font(self) -> bool:
         if self.has_fonts():
             return True
@@ -141,6 +237,18 @@ class FontLoader:
     def set_font_size(self, size: float) -> None:
         self._font_size = size
 
+    def get_available_font_paths(self) -> List[Path]:
+        return list(self._available_fonts)
+
+    def get_font_cache(self) -> FontCache:
+        return self._font_cache
+
+    def use_as_base_font(self, font_path: Path, size: float = 16.0) -> Optional[imgui.ImFont]:
+        font = self.load_font(font_path, size)
+        if font:
+            self.glyph_manager.set_base_font(font_path, font, size)
+        return font
+
     def get_available_fonts(self) -> List[str]:
         return [f.name for f in self._available_fonts]
 
@@ -167,3 +275,9 @@ class FontLoader:
 
     def list_downloadable_fonts(self) -> List[str]:
         return list(self.POPULAR_NERD_FONTS.keys())
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or ["JetBrainsMono"]
+    results = FontLoader().download_nerd_fonts(names)
+    sys.exit(0 if all(results.values()) else 1)
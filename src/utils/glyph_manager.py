@@ -0,0 +1,173 @@
+"""On-demand glyph coverage: merge fallback fonts only for codepoints seen in output."""
+
+import bisect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, List, Set, Tuple, TYPE_CHECKING
+
+from imgui_bundle import imgui
+
+if TYPE_CHECKING:
+    from src.utils.font_loader import FontLoader
+
+
+class GlyphManager:
+    def __init__(self, font_loader: "FontLoader"):
+        self.font_loader = font_loader
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="brutal-glyphs")
+
+        self._base_font: Optional[imgui.ImFont] = None
+        self._base_path: Optional[Path] = None
+        self._size = 16.0
+
+        self._seen: Set[int] = set()
+        self._missing: Set[int] = set()
+        self._merged: List[Path] = []
+        self._pending: List[Path] = []
+
+        # Sorted, non-overlapping (start, end, font_path) runs; earlier fonts win.
+        self._index_starts: List[int] = []
+        self._index_runs: List[Tuple[int, int, Path]] = []
+        self._index_ready = False
+
+    def set_base_font(self, font_path: Path, font: imgui.ImFont, size: float) -> None:
+        with self._lock:
+            self._base_path = font_path
+            self._base_font = font
+            self._size = size
+            self._merged = [font_path]
+            self._pending = []
+            self._index_ready = False
+            seen = set(self._seen)
+        if seen:
+            self._executor.submit(self._resolve, seen)
+
+    def invalidate_index(self) -> None:
+        with self._lock:
+            self._index_ready = False
+
+    def observe(self, text: str) -> None:
+        if text.isascii():
+            return
+        codepoints = set(map(ord, text))
+        with self._lock:
+            new = codepoints - self._seen
+            if not new:
+                return
+            self._seen |= new
+            # Until a base font exists there is nothing to merge into; set_base_font
+            # resolves everything seen so far.
+            if self._base_font is None:
+                return
+        self._executor.submit(self._resolve, new)
+
+    def _build_index(self) -> None:
+        font_cache = self.font_loader.get_font_cache()
+        runs: List[Tuple[int, int, Path]] = []
+        covered: List[Tuple[int, int]] = []
+        font_paths = self.font_loader.get_available_font_paths()
+        with self._lock:
+            base_path = self._base_path
+        if base_path is not None:
+            # The base font owns everything it covers, so it is never merged twice.
+            font_paths = [base_path] + [p for p in font_paths if p != base_path]
+        for font_path in font_paths:
+            try:
+                coverage = font_cache.get(font_path)
+            except Exception:
+                continue
+            gaps = self._subtract(coverage, covered)
+            runs.extend((start, end, font_path) for start, end in gaps)
+            covered = sorted(covered + gaps)
+        font_cache.save()
+        runs.sort(key=lambda r: r[0])
+
+        with self._lock:
+            self._index_runs = runs
+            self._index_starts = [r[0] for r in runs]
+            self._index_ready = True
+
+    def _subtract(self, ranges: List[Tuple[int, int]],
+                  covered: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        # Both inputs are sorted and non-overlapping; codepoints already owned keep their font.
+        result = []
+        j = 0
+        for start, end in ranges:
+            while j < len(covered) and covered[j][1] < start:
+                j += 1
+            k = j
+            cursor = start
+            while k < len(covered) and covered[k][0] <= end:
+                if covered[k][0] > cursor:
+                    result.append((cursor, covered[k][0] - 1))
+                cursor = max(cursor, covered[k][1] + 1)
+                k += 1
+            if cursor <= end:
+                result.append((cursor, end))
+        return result
+
+    def font_for(self, codepoint: int) -> Optional[Path]:
+        with self._lock:
+            i = bisect.bisect_right(self._index_starts, codepoint) - 1
+            if i >= 0:
+                start, end, font_path = self._index_runs[i]
+                if start <= codepoint <= end:
+                    return font_path
+        return None
+
+    def _resolve(self, codepoints: Set[int]) -> None:
+        with self._lock:
+            ready = self._index_ready
+        if not ready:
+            self._build_index()
+
+        needed = []
+        for cp in codepoints:
+            font_path = self.font_for(cp)
+            if font_path is None:
+                with self._lock:
+                    self._missing.add(cp)
+                continue
+            with self._lock:
+                if font_path not in self._merged and font_path not in self._pending \
+                        and font_path not in needed:
+                    needed.append(font_path)
+
+        if needed:
+            with self._lock:
+                self._pending.extend(needed)
+
+    def apply_pending(self) -> None:
+        with self._lock:
+            if not self._pending or self._base_font is None:
+                return
+            pending, self._pending = self._pending, []
+            base_font = self._base_font
+            size = self._size
+
+        fonts = imgui.get_io().fonts
+        for font_path in pending:
+            try:
+                font_config = imgui.ImFontConfig()
+                font_config.merge_mode = True
+                font_config.dst_font = base_font
+                fonts.add_font_from_file_ttf(str(font_path), size, font_config)
+                with self._lock:
+                    self._merged.append(font_path)
+                print(f"Merged fallback font: {font_path.name}")
+            except Exception as e:
+                print(f"Failed to merge fallback font {font_path}: {e}")
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "seen": len(self._seen),
+                "missing": len(self._missing),
+                "merged_fonts": [p.name for p in self._merged],
+                "pending_fonts": [p.name for p in self._pending],
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
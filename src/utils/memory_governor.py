@@ -0,0 +1,130 @@
+"""Process-wide memory budget: per-subsystem accounting and least-recently-viewed eviction."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from src.utils.config import Config
+
+
+class _Account:
+    __slots__ = ("name", "subsystem", "usage", "evict", "last_used", "bytes")
+
+    def __init__(self, name: str, subsystem: str, usage: Callable[[], int],
+                 evict: Optional[Callable[[int], int]], last_used: Optional[Callable[[], float]]):
+        self.name = name
+        self.subsystem = subsystem
+        self.usage = usage
+        self.evict = evict
+        self.last_used = last_used
+        self.bytes = 0
+
+
+class MemoryGovernor:
+    CHECK_INTERVAL = 2.0
+    # Eviction aims a little under the budget so it doesn't fire again on the next check.
+    TARGET_RATIO = 0.9
+
+    def __init__(self, budget_bytes: int, check_interval: float = CHECK_INTERVAL):
+        self.budget_bytes = budget_bytes
+        self.check_interval = check_interval
+        self._accounts: Dict[str, _Account] = {}
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self._usage: Dict[str, int] = {}
+        self._stats = {"checks": 0, "evictions": 0, "evicted_bytes": 0}
+        self._worker: Optional[ThreadPoolExecutor] = None
+
+    @classmethod
+    def from_config(cls, config: Config) -> "MemoryGovernor":
+        return cls(int(config["memory_budget_mb"] * 1024 * 1024),
+                   config["memory_check_interval"])
+
+    def register(self, name: str, subsystem: str, usage: Callable[[], int],
+                 evict: Optional[Callable[[int], int]] = None,
+                 last_used: Optional[Callable[[], float]] = None) -> None:
+        # evict(bytes wanted) runs on the UI thread and returns the bytes it expects to free;
+        # slow work goes through run_async.
+        with self._lock:
+            self._accounts[name] = _Account(name, subsystem, usage, evict, last_used)
+
+    def unregister(self, name: str) -> None:
+        with self._lock:
+            self._accounts.pop(name, None)
+
+    def run_async(self, fn: Callable, *args) -> None:
+        if self._worker is None:
+            self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="brutal-memory")
+        self._worker.submit(fn, *args)
+
+    def update(self, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+
+        with self._lock:
+            accounts = list(self._accounts.values())
+        total = self._measure(accounts)
+        self._stats["checks"] += 1
+        if total <= self.budget_bytes:
+            return
+
+        wanted = total - int(self.budget_bytes * self.TARGET_RATIO)
+        # Least recently viewed first; accounts without a timestamp (shared caches) go last.
+        evictable = [a for a in accounts if a.evict is not None]
+        evictable.sort(key=lambda a: a.last_used() if a.last_used else now)
+        for account in evictable:
+            if wanted <= 0:
+                break
+            try:
+                freed = account.evict(wanted)
+            except Exception as e:
+                print(f"Memory eviction for '{account.name}' failed: {e}")
+                continue
+            if freed > 0:
+                wanted -= freed
+                self._stats["evictions"] += 1
+                self._stats["evicted_bytes"] += freed
+
+    def _measure(self, accounts: List[_Account]) -> int:
+        usage: Dict[str, int] = {}
+        total = 0
+        for account in accounts:
+            try:
+                account.bytes = max(0, int(account.usage()))
+            except Exception:
+                account.bytes = 0
+            usage[account.subsystem] = usage.get(account.subsystem, 0) + account.bytes
+            total += account.bytes
+        self._usage = usage
+        return total
+
+    def usage(self) -> Dict[str, int]:
+        # Per-subsystem bytes as of the last check.
+        return dict(self._usage)
+
+    def get_stats(self) -> dict:
+        stats = dict(self._stats)
+        stats["budget"] = self.budget_bytes
+        stats["total"] = sum(self._usage.values())
+        return stats
+
+    def report(self) -> str:
+        mb = 1024 * 1024
+        stats = self.get_stats()
+        lines = [f"memory: {stats['total'] / mb:.1f} MB of {self.budget_bytes / mb:.0f} MB budget, "
+                 f"{stats['evictions']} evictions ({stats['evicted_bytes'] / mb:.1f} MB)"]
+        for subsystem, size in sorted(self._usage.items(), key=lambda kv: -kv[1]):
+            lines.append(f"  {subsystem:>12} {size / mb:8.1f} MB")
+        with self._lock:
+            accounts = sorted(self._accounts.values(), key=lambda a: -a.bytes)
+        for account in accounts[:10]:
+            lines.append(f"  {account.name:>12} {account.bytes / mb:8.1f} MB ({account.subsystem})")
+        return "\n".join(lines)
+
+    def shutdown(self) -> None:
+        if self._worker:
+            self._worker.shutdown(wait=False, cancel_futures=True)
+            self._worker = None
@@ -0,0 +1,281 @@
+"""Per-tab terminal output logs written by one background thread with batching and rotation."""
+
+import codecs
+import gzip
+import os
+import re
+import shutil
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+
+from src.utils.config import Config
+
+
+_ESCAPE = re.compile(r"""
+      \x1b\][^\x07\x1b]*(?:\x07|\x1b\\)     # OSC ... BEL/ST
+    | \x1b[P_^X][^\x1b]*\x1b\\              # DCS / APC / PM / SOS ... ST
+    | \x1b\[[0-?]*[\ -/]*[@-~]              # CSI
+    | \x1b[\ -/]*[0-~]                      # two-character and nF escapes
+""", re.VERBOSE)
+_CONTROL = re.compile(r"[\x00-\x08\x0b-\x1f\x7f]")
+
+POLICIES = ("drop_oldest", "drop_newest", "block")
+
+
+class OutputLog:
+    # Handle for one tab's log. Everything below the first three attributes is
+    # owned by the writer thread.
+    MAX_CARRY = 4096
+
+    def __init__(self, logger: "OutputLogger", name: str):
+        self.logger = logger
+        self.name = name
+        self.dropped = 0
+
+        self._file = None
+        self._path: Optional[Path] = None
+        self._opened_at = 0.0
+        self._size = 0
+        self._dirty = False
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._carry = ""
+
+    def write(self, data: bytes) -> None:
+        self.logger._submit(self, data)
+
+    def close(self) -> None:
+        self.logger._submit(self, None)
+
+    def _to_text(self, data: bytes) -> bytes:
+        text = self._carry + self._decoder.decode(data)
+        self._carry = ""
+        # Hold back an escape sequence split across reads until the rest arrives.
+        tail = text.rfind("\x1b")
+        if tail != -1 and len(text) - tail < self.MAX_CARRY and not _ESCAPE.match(text, tail):
+            self._carry = text[tail:]
+            text = text[:tail]
+        text = _ESCAPE.sub("", text).replace("\r\n", "\n")
+        return _CONTROL.sub("", text).encode("utf-8")
+
+
+class OutputLogger:
+    BLOCK_TIMEOUT = 1.0
+    COMPRESS_WORKERS = 1
+
+    def __init__(self, log_dir: Optional[Path] = None, fmt: str = "text",
+                 max_bytes: int = 10 * 1024 * 1024, max_age: float = 86400.0,
+                 compress: bool = True, queue_bytes: int = 8 * 1024 * 1024,
+                 policy: str = "drop_oldest", fsync_interval: float = 2.0):
+        self.log_dir = log_dir or Path.home() / ".brutal" / "logs"
+        self.fmt = fmt
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compress = compress
+        self.queue_bytes = queue_bytes
+        self.policy = policy if policy in POLICIES else "drop_oldest"
+        self.fsync_interval = fsync_interval
+
+        self._queue: Deque[Tuple[OutputLog, Optional[bytes]]] = deque()
+        self._queued_bytes = 0
+        self._cond = threading.Condition()
+        self._running = True
+        self._logs: List[OutputLog] = []
+        self._stats = {"written": 0, "dropped": 0, "rotations": 0, "batches": 0}
+        self._compressor = ThreadPoolExecutor(max_workers=self.COMPRESS_WORKERS,
+                                              thread_name_prefix="brutal-log-gzip")
+
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="brutal-log-writer", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_config(cls, config: Config) -> "OutputLogger":
+        log_dir = config["log_dir"]
+        return cls(
+            log_dir=Path(log_dir).expanduser() if log_dir else None,
+            fmt=config["log_format"],
+            max_bytes=config["log_max_bytes"],
+            max_age=config["log_max_age_seconds"],
+            compress=config["log_compress"],
+            queue_bytes=config["log_queue_bytes"],
+            policy=config["log_drop_policy"],
+            fsync_interval=config["log_fsync_interval"],
+        )
+
+    def open(self, name: str) -> OutputLog:
+        return OutputLog(self, name)
+
+    def _submit(self, log: OutputLog, data: Optional[bytes]) -> None:
+        size = len(data) if data else 0
+        with self._cond:
+            if not self._running:
+                return
+            if size and self._queued_bytes + size > self.queue_bytes:
+                if self.policy == "block":
+                    # Backpressure: the PTY reader waits, which in turn throttles the shell.
+                    self._cond.wait_for(
+                        lambda: self._queued_bytes + size <= self.queue_bytes or not self._running,
+                        timeout=self.BLOCK_TIMEOUT)
+                elif self.policy == "drop_oldest":
+                    while self._queue and self._queued_bytes + size > self.queue_bytes:
+                        old_log, old = self._queue.popleft()
+                        if old is None:
+                            self._queue.appendleft((old_log, old))
+                            break
+                        self._queued_bytes -= len(old)
+                        old_log.dropped += len(old)
+                        self._stats["dropped"] += len(old)
+                if self._queued_bytes + size > self.queue_bytes:
+                    log.dropped += size
+                    self._stats["dropped"] += size
+                    return
+            self._queue.append((log, data))
+            self._queued_bytes += size
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        last_sync = time.monotonic()
+        while True:
+            with self._cond:
+                if not self._queue and self._running:
+                    self._cond.wait(timeout=self.fsync_interval)
+                batch = list(self._queue)
+                self._queue.clear()
+                self._queued_bytes = 0
+                running = self._running
+                self._cond.notify_all()
+
+            if batch:
+                self._write_batch(batch)
+
+            now = time.monotonic()
+            if now - last_sync >= self.fsync_interval or not running:
+                self._sync()
+                last_sync = now
+
+            if not running and not batch:
+                break
+
+        for log in self._logs:
+            self._close_file(log)
+
+    def _write_batch(self, batch: List[Tuple[OutputLog, Optional[bytes]]]) -> None:
+        self._stats["batches"] += 1
+        # Consecutive chunks for the same tab become one write.
+        grouped: Dict[OutputLog, List[bytes]] = {}
+        order: List[OutputLog] = []
+        for log, data in batch:
+            if data is None:
+                self._flush_group(log, grouped.pop(log, []))
+                self._close_file(log)
+                if log in order:
+                    order.remove(log)
+                continue
+            if log not in grouped:
+                grouped[log] = []
+                order.append(log)
+            grouped[log].append(data)
+
+        for log in order:
+            self._flush_group(log, grouped[log])
+
+    def _flush_group(self, log: OutputLog, chunks: List[bytes]) -> None:
+        if not chunks:
+            return
+        data = b"".join(chunks)
+        if self.fmt == "text":
+            data = log._to_text(data)
+        if log.dropped:
+            with self._cond:
+                dropped, log.dropped = log.dropped, 0
+            data = f"\n[brutalterm: dropped {dropped} bytes of output]\n".encode("utf-8") + data
+        if not data:
+            return
+
+        try:
+            if log._file is None or self._should_rotate(log):
+                self._rotate(log)
+            log._file.write(data)
+            log._size += len(data)
+            log._dirty = True
+            self._stats["written"] += len(data)
+        except OSError as e:
+            print(f"Output log '{log.name}' write failed: {e}")
+
+    def _should_rotate(self, log: OutputLog) -> bool:
+        return log._size >= self.max_bytes or time.time() - log._opened_at >= self.max_age
+
+    def _rotate(self, log: OutputLog) -> None:
+        if log._file is not None:
+            self._close_file(log)
+            self._stats["rotations"] += 1
+
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        suffix = ".raw" if self.fmt == "raw" else ".log"
+        path = self.log_dir / f"{log.name}-{stamp}{suffix}"
+        n = 1
+        while path.exists():
+            path = self.log_dir / f"{log.name}-{stamp}-{n}{suffix}"
+            n += 1
+
+        log._file = open(path, "ab")
+        log._path = path
+        log._opened_at = time.time()
+        log._size = 0
+        if log not in self._logs:
+            self._logs.append(log)
+
+    def _close_file(self, log: OutputLog) -> None:
+        if log._file is None:
+            return
+        try:
+            log._file.flush()
+            os.fsync(log._file.fileno())
+            log._file.close()
+        except OSError:
+            pass
+        path = log._path
+        log._file = None
+        log._path = None
+        log._dirty = False
+        if log in self._logs:
+            self._logs.remove(log)
+        if self.compress and path is not None:
+            self._compressor.submit(self._compress, path)
+
+    def _sync(self) -> None:
+        for log in self._logs:
+            if log._dirty:
+                try:
+                    log._file.flush()
+                    os.fsync(log._file.fileno())
+                except OSError:
+                    pass
+                log._dirty = False
+
+    @staticmethod
+    def _compress(path: Path) -> None:
+        try:
+            with open(path, "rb") as src, gzip.open(f"{path}.gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            path.unlink()
+        except Exception as e:
+            print(f"Failed to compress {path}: {e}")
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            stats = dict(self._stats)
+            stats["queued_bytes"] = self._queued_bytes
+        return stats
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._thread.join(timeout=5.0)
+        self._compressor.shutdown(wait=True)
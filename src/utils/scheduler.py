@@ -1,50 +1,198 @@
 """Background task scheduler for periodic operations."""
 
+import heapq
+import json
+import os
+import random
 import threading
 import time
-from typing import Callable, Dict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.utils.tracing import TRACER
 
 
 class BackgroundScheduler:
-    def __init__(self):
+    MAX_WORKERS = 2
+    STARTUP_SPREAD = 15.0
+
+    def __init__(self, state_file: Optional[Path] = None, max_workers: Optional[int] = None):
         self._tasks: Dict[str, dict] = {}
+        self._heap: List[Tuple[float, int, str, int]] = []
+        self._seq = 0
         self._running = False
         self._thread: threading.Thread | None = None
-        self._lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._max_workers = max_workers or self.MAX_WORKERS
+
+        self._state_file = state_file or Path.home() / ".brutal" / "scheduler.json"
+        self._last_runs: Dict[str, float] = self._load_state()
+
+    def _load_state(self) -> Dict[str, float]:
+        try:
+            if self._state_file.exists():
+                with open(self._state_file, "r") as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    return {k: float(v) for k, v in data.items()}
+        except Exception:
+            pass
+        return {}
+
+    def _save_state(self) -> None:
+        with self._cond:
+            data = dict(self._last_runs)
+        try:
+            self._state_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._state_file.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self._state_file)
+        except Exception:
+            pass
 
-    def schedule(self, name: str, interval_seconds: float, 
-                 callback: Callable[[], None]) -> None:
-        with self._lock:
+    def schedule(self, name: str, interval_seconds: float,
+                 callback: Callable[[], None], jitter: float = 0.1,
+                 initial_delay: Optional[float] = None) -> None:
+        now = time.time()
+        with self._cond:
+            last_run = self._last_runs.get(name, 0.0)
+            if initial_delay is not None:
+                due = now + initial_delay
+            elif last_run:
+                due = max(last_run + interval_seconds,
+                          now + random.uniform(0, self.STARTUP_SPREAD))
+            else:
+                # Spread first runs so a fresh launch doesn't fire every task at once.
+                due = now + random.uniform(0, min(self.STARTUP_SPREAD, interval_seconds))
+
+            previous = self._tasks.get(name)
             self._tasks[name] = {
                 "interval": interval_seconds,
                 "callback": callback,
-                "last_run": 0.0,
+                "jitter": jitter,
+                "last_run": last_run,
+                "next_run": due,
+                "generation": previous["generation"] + 1 if previous else 0,
+                "running": False,
+                "stats": previous["stats"] if previous else {
+                    "runs": 0,
+                    "errors": 0,
+                    "total_time": 0.0,
+                    "max_time": 0.0,
+                    "last_duration": 0.0,
+                },
             }
+            self._push_locked(name, due)
+
+    def unschedule(self, name: str) -> None:
+        with self._cond:
+            self._tasks.pop(name, None)
+            self._cond.notify()
+
+    def _push_locked(self, name: str, due: float) -> None:
+        task = self._tasks[name]
+        task["next_run"] = due
+        self._seq += 1
+        heapq.heappush(self._heap, (due, self._seq, name, task["generation"]))
+        self._cond.notify()
+
+    def _next_due(self, task: dict, start: float) -> float:
+        interval = task["interval"]
+        spread = interval * task["jitter"]
+        return start + interval + random.uniform(-spread, spread)
 
     def start(self) -> None:
         if self._running:
             return
-        
+
         self._running = True
+        self._executor = ThreadPoolExecutor(
+            max_workers=self._max_workers,
+            thread_name_prefix="brutal-sched"
+        )
         self._thread = threading.Thread(target=self._run_loop, daemon=True)
         self._thread.start()
 
     def stop(self) -> None:
-        self._running = False
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
         if self._thread:
             self._thread.join(timeout=1.0)
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._save_state()
 
     def _run_loop(self) -> None:
-        while self._running:
-            current_time = time.time()
-            
-            with self._lock:
-                for name, task in self._tasks.items():
-                    if current_time - task["last_run"] >= task["interval"]:
-                        try:
-                            task["callback"]()
-                        except Exception as e:
-                            print(f"Task '{name}' error: {e}")
-                        task["last_run"] = current_time
-            
-            time.sleep(1.0)
+        while True:
+            with self._cond:
+                while self._running:
+                    if self._heap:
+                        wait = self._heap[0][0] - time.time()
+                        if wait <= 0:
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+                if not self._running:
+                    return
+
+                due, _, name, generation = heapq.heappop(self._heap)
+                task = self._tasks.get(name)
+                if task is None or task["generation"] != generation:
+                    continue
+
+                if task["running"]:
+                    # Previous run still going; skip rather than pile up.
+                    self._push_locked(name, self._next_due(task, time.time()))
+                    continue
+
+                task["running"] = True
+
+            try:
+                self._executor.submit(self._run_task, name, task)
+            except RuntimeError:
+                return
+
+    def _run_task(self, name: str, task: dict) -> None:
+        start = time.time()
+        t0 = time.perf_counter()
+        failed = False
+        try:
+            with TRACER.span(f"task.{name}", "scheduler"):
+                task["callback"]()
+        except Exception as e:
+            failed = True
+            print(f"Task '{name}' error: {e}")
+        duration = time.perf_counter() - t0
+
+        with self._cond:
+            stats = task["stats"]
+            stats["runs"] += 1
+            stats["errors"] += int(failed)
+            stats["total_time"] += duration
+            stats["max_time"] = max(stats["max_time"], duration)
+            stats["last_duration"] = duration
+
+            task["running"] = False
+            task["last_run"] = start
+            self._last_runs[name] = start
+            if self._tasks.get(name) is task:
+                self._push_locked(name, self._next_due(task, start))
+
+        self._save_state()
+
+    def get_stats(self) -> Dict[str, dict]:
+        with self._cond:
+            result = {}
+            for name, task in self._tasks.items():
+                stats = dict(task["stats"])
+                stats["mean_time"] = stats["total_time"] / stats["runs"] if stats["runs"] else 0.0
+                stats["last_run"] = task["last_run"]
+                stats["next_run"] = task["next_run"]
+                stats["running"] = task["running"]
+                result[name] = stats
+            return result
@@ -0,0 +1,140 @@
+"""Span tracing into a preallocated ring buffer, dumped as Chrome Trace Event JSON (Perfetto)."""
+
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from array import array
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "cat", "args", "start")
+
+    def __init__(self, tracer: "Tracer", name: str, cat: str, args: Optional[dict]):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self.tracer.record(self.name, self.cat, self.start, time.perf_counter_ns(), self.args)
+        return False
+
+
+class Tracer:
+    DEFAULT_CAPACITY = 65536
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, enabled: bool = False):
+        self.enabled = enabled
+        self._epoch = time.perf_counter_ns()
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int) -> None:
+        # Slots are written lock-free from any thread; the counter hands out indices.
+        self.capacity = capacity
+        self._start = array("q", bytes(8 * capacity))
+        self._dur = array("q", bytes(8 * capacity))
+        self._tid = array("Q", bytes(8 * capacity))
+        self._name = [""] * capacity
+        self._cat = [""] * capacity
+        self._args: list = [None] * capacity
+        self._counter = itertools.count()
+        self._written = 0
+
+    def configure(self, enabled: bool, capacity: Optional[int] = None) -> None:
+        if capacity and capacity != self.capacity:
+            self._allocate(capacity)
+        self.enabled = enabled
+
+    def span(self, name: str, cat: str = "app", args: Optional[dict] = None) -> Any:
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, cat, args)
+
+    def record(self, name: str, cat: str, start_ns: int, end_ns: int,
+               args: Optional[dict] = None) -> None:
+        seq = next(self._counter)
+        i = seq % self.capacity
+        self._start[i] = start_ns
+        self._dur[i] = end_ns - start_ns
+        self._tid[i] = threading.get_ident()
+        self._name[i] = name
+        self._cat[i] = cat
+        self._args[i] = args
+        self._written = seq + 1
+
+    def clear(self) -> None:
+        self._counter = itertools.count()
+        self._written = 0
+
+    def events(self) -> list:
+        written = self._written
+        count = min(written, self.capacity)
+        first = written - count
+        pid = os.getpid()
+        events = []
+        for seq in range(first, written):
+            i = seq % self.capacity
+            event = {
+                "name": self._name[i],
+                "cat": self._cat[i],
+                "ph": "X",
+                "ts": (self._start[i] - self._epoch) / 1000.0,
+                "dur": self._dur[i] / 1000.0,
+                "pid": pid,
+                "tid": self._tid[i],
+            }
+            if self._args[i]:
+                event["args"] = self._args[i]
+            events.append(event)
+
+        for thread in threading.enumerate():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid,
+                           "tid": thread.ident, "args": {"name": thread.name}})
+        return events
+
+    def dump(self, path: Optional[Path] = None) -> Path:
+        if path is None:
+            stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            path = Path.home() / ".brutal" / "traces" / f"trace-{stamp}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.events(), "displayTimeUnit": "ms"}, f)
+        return path
+
+
+TRACER = Tracer(enabled=os.environ.get("BRUTAL_TRACE", "") not in ("", "0"))
+
+
+def traced(name: str, cat: str = "app") -> Callable:
+    def decorate(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return fn(*args, **kwargs)
+            with _Span(TRACER, name, cat, None):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
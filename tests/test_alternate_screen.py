@@ -0,0 +1,83 @@
+"""Alternate screen switching: modes 1049, 1047 and 47, scrollback and resizes."""
+
+from src.terminal.vt100_parser import VT100Parser
+
+
+def shell() -> VT100Parser:
+    parser = VT100Parser(20, 4)
+    parser.feed(b"$ ls\r\nfile1\r\n$ top")
+    return parser
+
+
+def rows(parser: VT100Parser) -> list:
+    return [line.rstrip() for line in parser.screen.display]
+
+
+def cursor(parser: VT100Parser) -> tuple:
+    return parser.screen.cursor.x, parser.screen.cursor.y
+
+
+def test_1049_saves_the_cursor_and_restores_the_shell():
+    parser = shell()
+    parser.feed(b"\x1b[?1049h")
+    assert parser.screen.in_alternate
+    assert rows(parser) == ["", "", "", ""]
+    parser.feed(b"\x1b[1;1Htop - load 0.42\x1b[4;1H")
+
+    parser.feed(b"\x1b[?1049l")
+    assert not parser.screen.in_alternate
+    assert rows(parser) == ["$ ls", "file1", "$ top", ""]
+    assert cursor(parser) == (5, 2)
+
+
+def test_alternate_scrolling_does_not_feed_scrollback():
+    parser = shell()
+    parser.feed(b"\x1b[?1049h" + b"line\r\n" * 20)
+    assert parser.scrollback.total_appended == 0
+    parser.feed(b"\x1b[?1049l\r\n\r\n\r\n")
+    # Only the shell rows pushed out after leaving reach history.
+    assert parser.scrollback.total_appended == 2
+    assert [parser.scrollback[i][0].data for i in range(2)] == ["$", "f"]
+
+
+def test_1047_clears_on_exit_and_keeps_the_cursor():
+    parser = shell()
+    parser.feed(b"\x1b[?1047hmenu\x1b[2;3H\x1b[?1047l")
+    assert rows(parser)[:3] == ["$ ls", "file1", "$ top"]
+    assert cursor(parser) == (2, 1)
+    parser.feed(b"\x1b[?47h")
+    assert rows(parser) == ["", "", "", ""]
+
+
+def test_47_keeps_the_alternate_contents():
+    parser = shell()
+    parser.feed(b"\x1b[?47h\x1b[Hmenu\x1b[?47l")
+    assert rows(parser)[0] == "$ ls"
+    parser.feed(b"\x1b[?47h")
+    assert rows(parser)[0] == "menu"
+
+
+def test_entering_twice_keeps_the_primary_grid():
+    parser = shell()
+    parser.feed(b"\x1b[?1049h\x1b[?1049hvim\x1b[?1049l")
+    assert rows(parser)[:3] == ["$ ls", "file1", "$ top"]
+
+
+def test_resize_in_alternate_applies_to_both_grids():
+    parser = shell()
+    parser.feed(b"\x1b[?1049h")
+    parser.resize(3, 3)
+    parser.feed(b"\x1b[?1049l")
+    assert len(parser.screen.display) == 3
+    assert all(len(line) == 3 for line in parser.screen.display)
+    assert max(max(line, default=0) for line in parser.screen.buffer.values()) < 3
+
+
+def test_erase_callback_only_fires_on_the_primary_screen():
+    parser = shell()
+    erased = []
+    parser.screen.on_erase = lambda: erased.append(True)
+    parser.feed(b"\x1b[?1049h\x1b[2J")
+    assert erased == []
+    parser.feed(b"\x1b[?1049l\x1b[2J")
+    assert erased == [True]
@@ -0,0 +1,106 @@
+"""Reader flow control: a tab pauses its PTY reader at the output budget and resumes at half."""
+
+import json
+import time
+from typing import List, Tuple
+
+import pytest
+
+from src.terminal.terminal_tab import TerminalTab
+from src.ui.theme import ThemeManager
+from src.utils.config import Config
+
+BUDGET = 1000
+BACKGROUND_BUDGET = 400
+
+
+class FakePtyManager:
+    def __init__(self):
+        self.calls: List[Tuple[str, int]] = []
+
+    def pause(self, pty_id: int) -> None:
+        self.calls.append(("pause", pty_id))
+
+    def resume(self, pty_id: int) -> None:
+        self.calls.append(("resume", pty_id))
+
+
+@pytest.fixture
+def tab(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"output_buffer_bytes": BUDGET,
+                                "background_output_buffer_bytes": BACKGROUND_BUDGET}))
+    tab = TerminalTab(FakePtyManager(), ThemeManager(), spawn=False, config=Config(path))
+    tab.pty_id = 7
+    return tab
+
+
+def set_pending(tab: TerminalTab, size: int) -> None:
+    with tab._output_lock:
+        tab._pending_output[:] = b"x" * size
+
+
+def to_background(tab: TerminalTab) -> None:
+    tab.last_viewed = time.monotonic() - 10 * tab.VISIBLE_SECONDS
+
+
+def test_reader_pauses_once_at_the_budget(tab):
+    tab._on_output(b"x" * (BUDGET - 1))
+    assert tab.pty_manager.calls == []
+    tab._on_output(b"x")
+    tab._on_output(b"x" * 100)
+    assert tab.pty_manager.calls == [("pause", 7)]
+    assert tab._reader_paused
+
+
+def test_reader_resumes_below_half_the_budget(tab):
+    tab._on_output(b"x" * BUDGET)
+    set_pending(tab, BUDGET // 2)
+    tab._update_flow()
+    assert tab.pty_manager.calls == [("pause", 7)]
+    set_pending(tab, BUDGET // 2 - 1)
+    tab._update_flow()
+    tab._update_flow()
+    assert tab.pty_manager.calls == [("pause", 7), ("resume", 7)]
+    assert not tab._reader_paused
+
+
+def test_background_tab_uses_the_smaller_budget(tab):
+    tab._on_output(b"x" * BACKGROUND_BUDGET)
+    tab._update_flow()
+    assert tab.pty_manager.calls == []
+
+    to_background(tab)
+    tab._update_flow()
+    assert tab.pty_manager.calls == [("pause", 7)]
+    assert tab._output_budget == BACKGROUND_BUDGET
+
+    # Back in view the full budget applies again, but resuming still waits for half of it.
+    set_pending(tab, BUDGET // 2)
+    tab.last_viewed = time.monotonic()
+    tab._update_flow()
+    assert tab.pty_manager.calls == [("pause", 7)]
+    set_pending(tab, BUDGET // 2 - 1)
+    tab._update_flow()
+    assert tab.pty_manager.calls == [("pause", 7), ("resume", 7)]
+
+
+def test_update_drains_a_background_tab_and_resumes(tab):
+    to_background(tab)
+    tab._update_flow()
+    tab._on_output(b"line\r\n" * 100)
+    assert tab.pty_manager.calls == [("pause", 7)]
+
+    for _ in range(100):
+        tab.update()
+        if not tab._pending_output:
+            break
+    assert tab.pty_manager.calls == [("pause", 7), ("resume", 7)]
+    assert tab.scrollback.total_appended > 0
+
+
+def test_tab_without_a_pty_is_left_alone(tab):
+    tab.pty_id = None
+    set_pending(tab, BUDGET * 2)
+    tab._update_flow()
+    assert tab.pty_manager.calls == []
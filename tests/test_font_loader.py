@@ -0,0 +1,142 @@
+"""Nerd Font downloads against a local stand-in for the release server."""
+
+import http.server
+import io
+import threading
+import zipfile
+from typing import List, Optional
+
+import pytest
+
+from src.utils.font_loader import FontLoader
+
+WANTED = ["HackNerdFont-Regular.ttf", "HackNerdFontMono-Bold.ttf"]
+SKIPPED = ["HackNerdFontPropo-Bold.ttf", "Hack-Regular.ttf", "HackNerdFont-Italic.otf",
+           "README.md"]
+
+
+def make_archive() -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name in WANTED + SKIPPED:
+            zf.writestr(f"fonts/{name}", f"{name} ".encode() * 64)
+    return buffer.getvalue()
+
+
+class StubServer(http.server.ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.archive = make_archive()
+        # Total size announced in Content-Range; None announces the real size.
+        self.claimed_size: Optional[int] = None
+        self.requests: List[Optional[str]] = []
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        body = self.server.archive
+        requested = self.headers.get("Range")
+        self.server.requests.append(requested)
+        start = int(requested[len("bytes="):].rstrip("-")) if requested else 0
+        if start >= len(body) and requested:
+            self.send_response(416)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if requested:
+            total = self.server.claimed_size or len(body)
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{total}")
+        else:
+            self.send_response(200)
+        data = body[start:]
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def server():
+    stub = StubServer()
+    thread = threading.Thread(target=stub.serve_forever, daemon=True)
+    thread.start()
+    yield stub
+    stub.shutdown()
+    stub.server_close()
+
+
+@pytest.fixture
+def loader(server, tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("BRUTAL_NERD_FONTS_URL", f"http://127.0.0.1:{server.server_port}/")
+    return FontLoader(scan=False)
+
+
+def part_path(loader: FontLoader):
+    return loader.get_fonts_dir() / ".downloads" / "Hack.zip.part"
+
+
+def installed(loader: FontLoader) -> List[str]:
+    return sorted(p.name for p in loader.get_fonts_dir().iterdir() if p.is_file())
+
+
+def test_full_download(server, loader):
+    assert loader.download_nerd_font("Hack")
+    assert server.requests == [None]
+    assert not part_path(loader).exists()
+    assert sorted(loader.get_available_fonts()) == sorted(WANTED)
+    font = loader.get_fonts_dir() / WANTED[0]
+    assert font.read_bytes() == f"{WANTED[0]} ".encode() * 64
+
+
+def test_extracts_only_the_wanted_nerd_font_ttfs(loader):
+    assert loader.download_nerd_font("Hack")
+    assert installed(loader) == sorted(WANTED)
+
+
+def test_resume_appends_the_missing_range(server, loader):
+    part = part_path(loader)
+    part.parent.mkdir(parents=True, exist_ok=True)
+    part.write_bytes(server.archive[:100])
+
+    assert loader.download_nerd_font("Hack")
+    assert server.requests == ["bytes=100-"]
+    assert installed(loader) == sorted(WANTED)
+
+
+def test_range_not_satisfiable_keeps_a_complete_part_file(server, loader):
+    part = part_path(loader)
+    part.parent.mkdir(parents=True, exist_ok=True)
+    part.write_bytes(server.archive)
+
+    assert loader.download_nerd_font("Hack")
+    assert server.requests == [f"bytes={len(server.archive)}-"]
+    assert installed(loader) == sorted(WANTED)
+    assert not part.exists()
+
+
+def test_size_mismatch_is_an_incomplete_download(server, loader):
+    part = part_path(loader)
+    part.parent.mkdir(parents=True, exist_ok=True)
+    part.write_bytes(server.archive[:100])
+    server.claimed_size = len(server.archive) + 50
+
+    with pytest.raises(IOError, match="incomplete download"):
+        loader._fetch_to_file(loader._font_url("Hack"), part)
+    # The family download reports failure and keeps the part file for the next resume.
+    part.write_bytes(server.archive[:100])
+    assert not loader.download_nerd_font("Hack")
+    assert part.stat().st_size == len(server.archive)
+    assert installed(loader) == []
+
+
+def test_corrupt_archive_deletes_the_part_file(server, loader):
+    server.archive = b"not a zip archive" * 64
+
+    assert not loader.download_nerd_font("Hack")
+    assert not part_path(loader).exists()
+    assert installed(loader) == []
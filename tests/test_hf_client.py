@@ -0,0 +1,156 @@
+"""HFClientService retries and circuit breaker against a local stub inference server."""
+
+import http.server
+import json
+import threading
+import time
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+
+from src.huggingface import client as hf_client
+from src.huggingface.client import CircuitBreaker, HFClientService
+
+
+class StubServer(http.server.ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        # Status codes for the next requests; the last one repeats.
+        self.statuses: List[int] = [200]
+        self.requests = 0
+
+    def next_status(self) -> int:
+        self.requests += 1
+        if len(self.statuses) > 1:
+            return self.statuses.pop(0)
+        return self.statuses[0]
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        status = self.server.next_status()
+        if status == 200:
+            body = [{"generated_text": "OK"}]
+        else:
+            body = {"error": f"stub {status}"}
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def server():
+    stub = StubServer()
+    thread = threading.Thread(target=stub.serve_forever, daemon=True)
+    thread.start()
+    yield stub
+    stub.shutdown()
+    stub.server_close()
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    # Full jitter at its upper bound, and sleeps recorded instead of waited out.
+    slept: List[float] = []
+    monkeypatch.setattr(hf_client.random, "uniform", lambda low, high: high)
+    monkeypatch.setattr(hf_client, "time", SimpleNamespace(monotonic=time.monotonic,
+                                                           sleep=slept.append))
+    return slept
+
+
+def make_service(server: StubServer) -> HFClientService:
+    service = HFClientService(token="stub", base_url=f"http://127.0.0.1:{server.server_port}",
+                              attempt_timeout=5.0)
+    service.BACKOFF_BASE = 0.01
+    return service
+
+
+def generate(client) -> str:
+    return client.text_generation("hello", max_new_tokens=4)
+
+
+def test_retries_server_errors_with_exponential_backoff(server, delays):
+    server.statuses = [503, 500, 200]
+    service = make_service(server)
+
+    assert service.call(generate, model="stub") == "OK"
+    assert server.requests == 3
+    assert delays == [0.01, 0.02]
+    assert service.get_breaker("stub").state == CircuitBreaker.CLOSED
+
+
+def test_retries_rate_limiting(server, delays):
+    server.statuses = [429, 200]
+    service = make_service(server)
+
+    assert service.call(generate, model="stub") == "OK"
+    assert server.requests == 2
+
+
+def test_client_errors_are_not_retried(server, delays):
+    server.statuses = [404]
+    service = make_service(server)
+
+    with pytest.raises(Exception) as error:
+        service.call(generate, model="stub")
+    assert error.value.response.status_code == 404
+    assert server.requests == 1
+    assert delays == []
+    assert service.get_breaker("stub").state == CircuitBreaker.CLOSED
+
+
+def test_breaker_trips_and_recovers(server, delays):
+    server.statuses = [503]
+    service = make_service(server)
+    breaker = service.get_breaker("stub")
+    breaker.reset_timeout = 0.2
+
+    # The third consecutive failure opens the breaker, which also ends the retries.
+    with pytest.raises(Exception):
+        service.call(generate, model="stub")
+    assert server.requests == breaker.failure_threshold
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # While open, requests fail fast without reaching the endpoint.
+    with pytest.raises(RuntimeError):
+        service.call(generate, model="stub")
+    fallbacks = []
+    assert service.submit("key", generate, model="stub",
+                          fallback=lambda: fallbacks.append(True)) is None
+    assert fallbacks == [True]
+    assert server.requests == breaker.failure_threshold
+
+    # After the reset timeout one trial request is let through; success closes it.
+    time.sleep(0.25)
+    server.statuses = [200]
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert service.call(generate, model="stub") == "OK"
+    assert breaker.state == CircuitBreaker.CLOSED
+    service.shutdown()
+
+
+def test_submit_shares_the_inflight_request(server):
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow(client):
+        started.set()
+        release.wait(5)
+        return generate(client)
+
+    service = make_service(server)
+    first = service.submit("key", slow, model="stub")
+    started.wait(5)
+    assert service.submit("key", slow, model="stub") is first
+    release.set()
+    assert first.result(5) == "OK"
+    assert server.requests == 1
+    service.shutdown()
@@ -0,0 +1,95 @@
+"""xterm key encoding for the modes the child can switch on."""
+
+from imgui_bundle import imgui
+
+from src.terminal.key_encoder import encode_frame, encode_key, encode_paste
+from src.terminal.screen import (APPLICATION_CURSOR, APPLICATION_KEYPAD, BRACKETED_PASTE,
+                                 MODIFY_OTHER_KEYS)
+
+K = imgui.Key
+NORMAL: frozenset = frozenset()
+OTHER_KEYS_1 = {MODIFY_OTHER_KEYS + 1}
+OTHER_KEYS_2 = {MODIFY_OTHER_KEYS + 2}
+
+
+def key(k: int, modes=NORMAL, shift=False, alt=False, ctrl=False):
+    return encode_key(k, shift, alt, ctrl, modes)
+
+
+def frame(keys, chars, modes=NORMAL, shift=False, alt=False, ctrl=False) -> str:
+    return encode_frame(keys, chars, shift, alt, ctrl, modes)
+
+
+def test_cursor_keys_follow_decckm():
+    assert key(K.up_arrow) == "\x1b[A"
+    assert key(K.up_arrow, {APPLICATION_CURSOR}) == "\x1bOA"
+    assert key(K.home, {APPLICATION_CURSOR}) == "\x1bOH"
+    # Modified cursor keys use the CSI form in either mode.
+    assert key(K.left_arrow, {APPLICATION_CURSOR}, ctrl=True) == "\x1b[1;5D"
+    assert key(K.left_arrow, ctrl=True, shift=True) == "\x1b[1;6D"
+
+
+def test_function_and_tilde_keys():
+    assert key(K.f1) == "\x1bOP"
+    assert key(K.f1, shift=True) == "\x1b[1;2P"
+    assert key(K.f5) == "\x1b[15~"
+    assert key(K.f5, ctrl=True, shift=True) == "\x1b[15;6~"
+    assert key(K.delete) == "\x1b[3~"
+
+
+def test_keypad_in_numeric_and_application_mode():
+    # Numeric mode: the digit arrives as typed text only.
+    assert frame([K.keypad5], ["5"]) == "5"
+    assert frame([K.keypad_enter], []) == "\r"
+    # Application mode replaces the typed character with the SS3 sequence.
+    assert frame([K.keypad5], ["5"], {APPLICATION_KEYPAD}) == "\x1bOu"
+    assert frame([K.keypad_add], ["+"], {APPLICATION_KEYPAD}) == "\x1bOk"
+    assert frame([K.keypad_enter], [], {APPLICATION_KEYPAD}) == "\x1bOM"
+
+
+def test_ctrl_keys_without_modify_other_keys():
+    assert frame([K.c], [], ctrl=True) == "\x03"
+    assert frame([K.a], [], ctrl=True, shift=True) == "\x01"
+    assert frame([K.minus], [], ctrl=True, shift=True) == "\x1f"
+    assert frame([K.x], [], alt=True, ctrl=True) == "\x1b\x18"
+    assert frame([K.backspace], [], ctrl=True) == "\x08"
+    assert frame([K.enter], [], shift=True) == "\r"
+    assert frame([K.tab], [], shift=True) == "\x1b[Z"
+
+
+def test_modify_other_keys_level_1():
+    # Ctrl combinations with a traditional control code keep it.
+    assert frame([K.c], [], OTHER_KEYS_1, ctrl=True) == "\x03"
+    assert frame([K.slash], [], OTHER_KEYS_1, ctrl=True) == "\x1f"
+    # The ones without a control code are reported instead of being lost.
+    assert frame([K.comma], [], OTHER_KEYS_1, ctrl=True) == "\x1b[27;5;44~"
+    assert frame([K.enter], [], OTHER_KEYS_1, ctrl=True) == "\x1b[27;5;13~"
+    assert frame([K.enter], [], OTHER_KEYS_1, shift=True) == "\x1b[27;2;13~"
+    assert frame([K.tab], [], OTHER_KEYS_1, ctrl=True) == "\x1b[27;5;9~"
+    # Alt stays a meta prefix at level 1.
+    assert frame([K.x], ["x"], OTHER_KEYS_1, alt=True) == "\x1bx"
+
+
+def test_modify_other_keys_level_2():
+    assert frame([K.c], [], OTHER_KEYS_2, ctrl=True) == "\x1b[27;5;99~"
+    assert frame([K.a], [], OTHER_KEYS_2, ctrl=True, shift=True) == "\x1b[27;6;65~"
+    assert frame([K.x], ["x"], OTHER_KEYS_2, alt=True) == "\x1b[27;3;120~"
+    # Unmodified and shifted typing is still plain text.
+    assert frame([K.a], ["A"], OTHER_KEYS_2, shift=True) == "A"
+
+
+def test_altgr_text_is_typed_not_encoded():
+    # AltGr arrives as Ctrl+Alt with the composed character as text.
+    assert frame([K.q], ["@"], ctrl=True, alt=True) == "@"
+    assert frame([K.e], ["€"], OTHER_KEYS_2, ctrl=True, alt=True) == "€"
+    # Non-character keys in the same frame keep their own sequence, without the modifiers.
+    assert frame([K.left_arrow], ["@"], ctrl=True, alt=True) == "@\x1b[D"
+
+
+def test_text_before_keys_in_one_frame():
+    assert frame([K.enter], ["l", "s"]) == "ls\r"
+
+
+def test_bracketed_paste():
+    assert encode_paste("a\r\nb\n", NORMAL) == "a\rb\r"
+    assert encode_paste("x\x1b[201~y", {BRACKETED_PASTE}) == "\x1b[200~xy\x1b[201~"
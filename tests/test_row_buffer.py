@@ -0,0 +1,89 @@
+"""Ring-buffer screen rows: full-screen scrolls and scrolls inside DECSTBM margins."""
+
+from pyte.screens import Char
+
+from src.terminal.row_buffer import RowBuffer
+from src.terminal.vt100_parser import VT100Parser
+
+BLANK = Char(" ")
+
+
+def filled(lines: int) -> RowBuffer:
+    buffer = RowBuffer(lines, BLANK)
+    for y in range(lines):
+        buffer[y][0] = Char(str(y))
+    return buffer
+
+
+def column(buffer: RowBuffer, lines: int) -> str:
+    return "".join(buffer[y][0].data for y in range(lines))
+
+
+def screen_rows(parser: VT100Parser) -> list:
+    return [line.rstrip() for line in parser.screen.display]
+
+
+def test_full_screen_scroll_rotates_without_moving_rows():
+    buffer = filled(5)
+    row = buffer[1]
+    assert buffer.scroll_up(0, 4)[0].data == "0"
+    assert column(buffer, 5) == "1234 "
+    # Row objects are rotated by reference, not copied.
+    assert buffer[0] is row
+    buffer.scroll_down(0, 4)
+    assert column(buffer, 5) == " 1234"
+
+
+def test_scroll_inside_margins_leaves_the_rest_alone():
+    buffer = filled(6)
+    buffer.scroll_up(0, 5)  # move the head off zero first
+    assert buffer.scroll_up(1, 3)[0].data == "2"
+    assert column(buffer, 6) == "134 5 "
+    # The blank row that entered at the bottom is the one pushed out again.
+    assert not buffer.scroll_down(1, 3)
+    assert column(buffer, 6) == "1 345 "
+
+
+def test_membership_and_resize():
+    buffer = RowBuffer(4, BLANK)
+    assert 2 not in buffer
+    buffer[2][0] = Char("x")
+    assert 2 in buffer and list(buffer) == [2]
+    buffer.resize(2)
+    assert list(buffer) == []
+    buffer.resize(3)
+    assert buffer[2][0] == BLANK
+
+
+def test_linefeed_at_the_bottom_margin_scrolls_only_the_region():
+    parser = VT100Parser(10, 5)
+    parser.feed(b"a\r\nb\r\nc\r\nd\r\ne")
+    # Region rows 2-4 (1-based), cursor on its bottom row.
+    parser.feed(b"\x1b[2;4r\x1b[4;1H\n")
+    assert screen_rows(parser) == ["a", "c", "d", "", "e"]
+    # Rows leaving a region that does not start at the top are not history.
+    assert parser.scrollback.total_appended == 0
+
+
+def test_reverse_index_at_the_top_margin_scrolls_down():
+    parser = VT100Parser(10, 5)
+    parser.feed(b"a\r\nb\r\nc\r\nd\r\ne")
+    parser.feed(b"\x1b[2;4r\x1b[2;1H\x1bM")
+    assert screen_rows(parser) == ["a", "", "b", "c", "e"]
+
+
+def test_region_starting_at_the_top_feeds_scrollback():
+    parser = VT100Parser(10, 5)
+    parser.feed(b"a\r\nb\r\nc\r\nd\r\ne")
+    parser.feed(b"\x1b[1;3r\x1b[3;1H\nx")
+    assert screen_rows(parser) == ["b", "c", "x", "d", "e"]
+    assert parser.scrollback.total_appended == 1
+    assert parser.scrollback[0][0].data == "a"
+
+
+def test_full_screen_scroll_after_resetting_margins():
+    parser = VT100Parser(10, 3)
+    parser.feed(b"\x1b[1;2r\x1b[r")
+    parser.feed(b"1\r\n2\r\n3\r\n4\r\n5")
+    assert screen_rows(parser) == ["3", "4", "5"]
+    assert parser.scrollback.total_appended == 2
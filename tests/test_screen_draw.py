@@ -0,0 +1,72 @@
+"""BrutalScreen.draw: wide characters and grapheme clusters, with and without the width table."""
+
+import pytest
+
+from src.terminal import char_width
+from src.terminal.char_width import WidthTable
+from src.terminal.vt100_parser import VT100Parser
+
+
+@pytest.fixture(scope="module")
+def width_table() -> WidthTable:
+    return WidthTable.build()
+
+
+@pytest.fixture(params=["wcwidth", "table"])
+def widths(request, width_table, monkeypatch):
+    # Draw reads the table when it is loaded and falls back to wcwidth before that.
+    table = width_table if request.param == "table" else None
+    monkeypatch.setattr(char_width._provider, "table", table)
+
+
+def draw(*reads: str, columns: int = 10) -> VT100Parser:
+    parser = VT100Parser(columns, 3)
+    for text in reads:
+        parser.feed(text.encode())
+    return parser
+
+
+def cells(parser: VT100Parser, count: int, y: int = 0) -> list:
+    return [parser.screen.buffer[y][x].data for x in range(count)]
+
+
+def test_table_matches_wcwidth(width_table):
+    for cp in (0x41, 0x301, 0x200D, 0x4E2D, 0x1F469, 0x1F1EF, 0xFE0F, 0x1F3FD, 0xE0001):
+        assert width_table.width(cp) == char_width._slow_width(cp)
+
+
+def test_wide_characters_take_two_cells(widths):
+    parser = draw("a漢b")
+    assert cells(parser, 4) == ["a", "漢", "", "b"]
+    assert parser.screen.cursor.x == 4
+    assert parser.screen.display[0].rstrip() == "a漢b"
+
+
+def test_zwj_sequence_is_one_cell(widths):
+    parser = draw("👩‍💻x")
+    assert cells(parser, 3) == ["👩‍💻", "", "x"]
+    assert parser.screen.cursor.x == 3
+
+
+def test_zwj_sequence_split_across_reads(widths):
+    parser = draw("👩‍", "💻x")
+    assert cells(parser, 3) == ["👩‍💻", "", "x"]
+
+
+def test_flag_pairs_regional_indicators(widths):
+    parser = draw("🇯🇵🇺🇸x")
+    assert cells(parser, 3) == ["🇯🇵", "🇺🇸", "x"]
+    # A lone indicator after a complete flag starts a new cell.
+    parser = draw("🇯🇵🇺", "x")
+    assert cells(parser, 3) == ["🇯🇵", "🇺", "x"]
+
+
+def test_flag_split_across_reads(widths):
+    parser = draw("🇯", "🇵x")
+    assert cells(parser, 2) == ["🇯🇵", "x"]
+
+
+def test_zero_width_marks_extend_the_previous_cell(widths):
+    parser = draw("éx", "👍🏽", "❤️")
+    # Combining marks are composed; modifiers and variation selectors are kept as is.
+    assert cells(parser, 5) == ["é", "x", "👍🏽", "", "❤️"]
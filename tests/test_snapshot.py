@@ -0,0 +1,68 @@
+"""Screen snapshot round trips, including the alternate screen."""
+
+import zlib
+
+from src.terminal.snapshot import decode_screen, encode_screen
+from src.terminal.vt100_parser import VT100Parser
+
+
+def shell_then_vim() -> VT100Parser:
+    parser = VT100Parser(40, 6)
+    parser.feed(b"$ ls\r\nfile1 file2\r\n$ \x1b[1;31mvim\x1b[0m")
+    parser.feed(b"\x1b[?1049h\x1b[H~\r\n~  VIM\x1b[3;5H")
+    return parser
+
+
+def rows(parser: VT100Parser, count: int = 3) -> list:
+    return [line.rstrip() for line in parser.screen.display[:count]]
+
+
+def test_primary_screen_round_trip():
+    parser = VT100Parser(40, 6)
+    parser.feed(b"$ ls\r\n\x1b[1;32mfile1\x1b[0m file2\r\n$ ")
+    restored = VT100Parser.from_snapshot(parser.snapshot())
+
+    assert rows(restored) == ["$ ls", "file1 file2", "$"]
+    assert restored.screen.buffer[1][0].fg == "green"
+    assert restored.screen.buffer[1][0].bold
+    assert (restored.screen.cursor.x, restored.screen.cursor.y) == (2, 2)
+    assert not restored.screen.in_alternate
+
+
+def test_alternate_screen_round_trip_returns_to_the_shell():
+    parser = shell_then_vim()
+    restored = VT100Parser.from_snapshot(parser.snapshot())
+
+    assert restored.screen.in_alternate
+    assert rows(restored, 2) == ["~", "~  VIM"]
+    assert (restored.screen.cursor.x, restored.screen.cursor.y) == (4, 2)
+
+    # Quitting vim after the restore brings back the shell grid and its cursor.
+    restored.feed(b"\x1b[?1049l")
+    assert not restored.screen.in_alternate
+    assert rows(restored) == ["$ ls", "file1 file2", "$ vim"]
+    assert restored.screen.buffer[2][2].fg == "red"
+    assert (restored.screen.cursor.x, restored.screen.cursor.y) == (5, 2)
+
+
+def test_snapshot_of_a_restored_alternate_screen_keeps_both_grids():
+    once = VT100Parser.from_snapshot(shell_then_vim().snapshot())
+    twice = VT100Parser.from_snapshot(once.snapshot())
+    twice.feed(b"\x1b[?1049l")
+    assert rows(twice) == ["$ ls", "file1 file2", "$ vim"]
+
+
+def test_plain_pyte_screen_decodes_the_live_grid():
+    screen = decode_screen(shell_then_vim().snapshot())
+    assert [line.rstrip() for line in screen.display[:2]] == ["~", "~  VIM"]
+
+
+def test_snapshot_without_alternate_section_still_decodes():
+    parser = VT100Parser(40, 6)
+    parser.feed(b"$ ls\r\nfile1")
+    # Snapshots written before the alternate section existed end right after the rows.
+    legacy = zlib.compress(zlib.decompress(encode_screen(parser.screen))[:-1])
+
+    restored = VT100Parser.from_snapshot(legacy)
+    assert rows(restored, 2) == ["$ ls", "file1"]
+    assert not restored.screen.in_alternate
@@ -0,0 +1,83 @@
+"""Trigger prefilter: literal extraction, the Aho-Corasick pass and the per-row cache."""
+
+from typing import List
+
+from src.terminal.triggers import AhoCorasick, Trigger, TriggerEngine, required_literals
+from src.terminal.vt100_parser import VT100Parser
+
+COLUMNS = 40
+
+
+def rows(*lines: str) -> list:
+    parser = VT100Parser(COLUMNS, len(lines))
+    parser.feed("\r\n".join(lines).encode())
+    return [parser.screen.buffer[y] for y in range(len(lines))]
+
+
+def test_automaton_reports_overlapping_literals():
+    automaton = AhoCorasick(["he", "she", "his", "hers"])
+    assert automaton.search("ushers") == {0, 1, 3}
+    # Following failure links: "his" is found while inside the "hers" path.
+    assert automaton.search("ahishers") == {0, 1, 2, 3}
+    assert automaton.search("nothing here") == {0}
+    assert automaton.search("xyz") == frozenset()
+
+
+def test_required_literals():
+    assert required_literals(r"\b(?:ERROR|FAILED|FAIL)\b") == ["ERROR", "FAILED", "FAIL"]
+    assert required_literals(r"\bfoo\d+") == ["foo"]
+    # An all-literal group beats a shorter plain run.
+    assert required_literals(r"(?:abc|de)x") == ["abc", "de"]
+    assert required_literals(r"error: (\w+)") == ["error: "]
+    # Nothing provable: the trigger runs on every row.
+    assert required_literals(r"\d+") == []
+    assert required_literals(r"a|\d") == []
+
+
+def test_rows_without_literals_skip_the_regex():
+    engine = TriggerEngine([Trigger("error", r"\b(?:ERROR|FAIL)\b")])
+    engine.scan_rows(rows("all good", "still fine", "build FAIL here"), COLUMNS)
+    stats = engine.get_stats()
+    assert (stats["rows"], stats["prefiltered"], stats["regex"]) == (3, 2, 1)
+
+
+def test_literal_hit_without_a_regex_match():
+    engine = TriggerEngine([Trigger("error", r"\bERROR\b")])
+    row = rows("TERRORS")[0]
+    # The automaton only proves the literal is there; the regex still decides.
+    assert engine.matches(row, COLUMNS) == []
+    assert engine.get_stats()["regex"] == 1
+
+
+def test_only_candidate_triggers_are_matched():
+    engine = TriggerEngine([Trigger("error", r"\bERROR\b"),
+                            Trigger("warn", r"\bWARN\b"),
+                            Trigger("number", r"\d+")])
+    row = rows("WARN 42 times")[0]
+    assert engine.matches(row, COLUMNS) == [(0, 4, 1, "WARN"), (5, 7, 2, "42")]
+
+
+def test_ignore_case_and_wide_columns():
+    engine = TriggerEngine([Trigger("fail", r"failed", ignore_case=True)])
+    row = rows("漢字 FAILED")[0]
+    # Text offsets are mapped back to columns past the wide characters.
+    assert engine.matches(row, COLUMNS) == [(5, 11, 0, "FAILED")]
+
+
+def test_notify_fires_once_per_new_match():
+    notified: List[str] = []
+    engine = TriggerEngine([Trigger("done", r"build (done|failed)", action="notify")],
+                           on_notify=lambda trigger, text: notified.append(text))
+    row = rows("build done")[0]
+    engine.scan_rows([row], COLUMNS)
+    engine.scan_rows([row], COLUMNS)
+    assert notified == ["build done"]
+    assert engine.get_stats()["cached_rows"] == 1
+
+
+def test_from_config_skips_bad_patterns():
+    config = {"trigger_builtins": False,
+              "triggers": [{"pattern": "("}, {"name": "todo", "pattern": "TODO"}]}
+    engine = TriggerEngine.from_config(config)
+    assert [t.name for t in engine.triggers] == ["todo"]
+    assert TriggerEngine.from_config({"trigger_builtins": False, "triggers": []}) is None